@@ -5,6 +5,7 @@ LLM API 및 SLLM 로컬 DB 관리
 
 from .llm_api import LLMAPI
 from .sllm_db import SLLMDB
+from .async_sllm_db import AsyncSLLMDB
 
-__all__ = ["LLMAPI", "SLLMDB"]
+__all__ = ["LLMAPI", "SLLMDB", "AsyncSLLMDB"]
 
@@ -0,0 +1,291 @@
+"""
+SLLM DB 비동기 접근 모듈
+동기 sqlite3 호출을 전용 스레드 풀에서 실행하여 이벤트 루프를 막지 않음
+"""
+import os
+import time
+import asyncio
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Callable, TypeVar, AsyncIterator
+import logging
+from .sllm_db import SLLMDB
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_DB_WORKERS = int(os.getenv("SLLM_DB_WORKERS", "4"))
+
+class AsyncSLLMDB:
+    """SLLMDB 비동기 파사드"""
+    
+    def __init__(self, db: SLLMDB, max_workers: int = DEFAULT_DB_WORKERS):
+        """
+        비동기 파사드 초기화
+        
+        Args:
+            db: 감쌀 SLLMDB 인스턴스
+            max_workers: DB 전용 스레드 수 (각 스레드는 자신의 연결을 재사용)
+        """
+        self.db = db
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="sllm-db"
+        )
+        
+        # DB 스레드 풀 대기/실행 시간 통계 (대기 시간이 길면 DB 작업이 스레드 수보다 많이 몰린 것)
+        self._stats = {
+            "calls": 0,
+            "queue_wait_ms_total": 0.0,
+            "queue_wait_ms_max": 0.0,
+            "run_ms_total": 0.0,
+            "run_ms_max": 0.0
+        }
+        self._stats_lock = threading.Lock()
+    
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        동기 DB 함수를 DB 전용 스레드에서 실행
+        
+        Args:
+            func: 실행할 동기 함수 (보통 SLLMDB 메서드)
+        
+        Returns:
+            함수 반환값
+        """
+        loop = asyncio.get_running_loop()
+        submitted = time.perf_counter()
+        call = functools.partial(func, *args, **kwargs)
+        
+        def timed_call():
+            started = time.perf_counter()
+            try:
+                return call()
+            finally:
+                self._record(started - submitted, time.perf_counter() - started)
+        
+        return await loop.run_in_executor(self._executor, timed_call)
+    
+    def _record(self, queue_wait: float, run_time: float):
+        queue_wait_ms = queue_wait * 1000
+        run_ms = run_time * 1000
+        with self._stats_lock:
+            stats = self._stats
+            stats["calls"] += 1
+            stats["queue_wait_ms_total"] += queue_wait_ms
+            stats["queue_wait_ms_max"] = max(stats["queue_wait_ms_max"], queue_wait_ms)
+            stats["run_ms_total"] += run_ms
+            stats["run_ms_max"] = max(stats["run_ms_max"], run_ms)
+    
+    def stats(self) -> Dict[str, Any]:
+        """DB 스레드 풀 대기/실행 시간 및 쓰기 트랜잭션 통계 (프로세스 시작 이후 누적)"""
+        with self._stats_lock:
+            executor = dict(self._stats)
+        return {
+            "executor": executor,
+            "transactions": self.db.transaction_stats()
+        }
+    
+    async def register_model(
+        self,
+        name: str,
+        model_type: str,
+        model_path: str,
+        config: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """모델 등록"""
+        return await self.run(self.db.register_model, name, model_type, model_path, config)
+    
+    async def get_model(self, name: str) -> Optional[Dict[str, Any]]:
+        """모델 정보 조회"""
+        # 스냅샷이 최신이면 DB를 읽지 않으므로 스레드 풀을 거치지 않고 바로 조회
+        if self.db.is_model_registry_fresh():
+            return self.db.get_model(name)
+        return await self.run(self.db.get_model, name)
+    
+    async def list_models(self) -> List[Dict[str, Any]]:
+        """등록된 모든 모델 조회"""
+        if self.db.is_model_registry_fresh():
+            return self.db.list_models()
+        return await self.run(self.db.list_models)
+    
+    async def save_conversation(
+        self,
+        session_id: str,
+        user_message: str,
+        model_response: str,
+        model_name: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """대화 기록 저장"""
+        return await self.run(
+            self.db.save_conversation,
+            session_id,
+            user_message,
+            model_response,
+            model_name,
+            metadata
+        )
+    
+    async def get_conversations(
+        self,
+        session_id: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        include_archive: bool = False
+    ) -> List[Dict[str, Any]]:
+        """대화 기록 조회"""
+        return await self.run(
+            self.db.get_conversations,
+            session_id=session_id,
+            limit=limit,
+            cursor=cursor,
+            columns=columns,
+            include_archive=include_archive
+        )
+    
+    async def get_conversations_page(
+        self,
+        session_id: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        include_archive: bool = False
+    ) -> Dict[str, Any]:
+        """대화 기록 페이지 조회 (keyset 페이지네이션)"""
+        return await self.run(
+            self.db.get_conversations_page,
+            session_id=session_id,
+            limit=limit,
+            cursor=cursor,
+            columns=columns,
+            include_archive=include_archive
+        )
+    
+    async def search_conversations(
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+        include_archive: bool = False
+    ) -> List[Dict[str, Any]]:
+        """대화 기록 전문 검색 (BM25 관련도 순, include_archive면 보관 DB 결과가 뒤에 이어짐)"""
+        return await self.run(
+            self.db.search_conversations,
+            query,
+            session_id=session_id,
+            since=since,
+            until=until,
+            limit=limit,
+            offset=offset,
+            include_archive=include_archive
+        )
+    
+    async def create_session(
+        self,
+        session_id: str,
+        model: str,
+        provider: str,
+        system_prompt: Optional[str] = None,
+        config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """채팅 세션 생성"""
+        return await self.run(self.db.create_session, session_id, model, provider, system_prompt, config)
+    
+    async def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """채팅 세션 정보 조회"""
+        return await self.run(self.db.get_session, session_id)
+    
+    async def get_session_history(
+        self,
+        session_id: str,
+        max_turns: int,
+        include_archive: bool = True
+    ) -> List[Dict[str, str]]:
+        """세션의 최근 대화를 메시지 리스트로 복원 (기본적으로 월별 보관 DB 포함)"""
+        return await self.run(self.db.get_session_history, session_id, max_turns, include_archive)
+    
+    async def iter_conversation_batches(
+        self,
+        session_id: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        batch_size: Optional[int] = None,
+        include_archive: bool = False
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        대화 기록 내보내기 (배치 단위 비동기 이터레이터)
+        
+        인자 검증은 첫 배치를 요청할 때 수행되며, 잘못된 값이면 ValueError가 발생합니다.
+        중간에 반복을 멈추면 (클라이언트 연결 종료 등) 전용 연결을 닫습니다.
+        """
+        kwargs = {"batch_size": batch_size} if batch_size else {}
+        batches = await self.run(
+            self.db.iter_conversation_batches,
+            session_id=session_id,
+            since=since,
+            until=until,
+            columns=columns,
+            include_archive=include_archive,
+            **kwargs
+        )
+        try:
+            while True:
+                batch = await self.run(next, batches, None)
+                if batch is None:
+                    break
+                yield batch
+        finally:
+            await self.run(batches.close)
+    
+    async def merge_usage_stats(self, counters: Dict[tuple, Dict[str, Any]]) -> int:
+        """메모리 사용량 집계를 DB 누적값에 합산"""
+        return await self.run(self.db.merge_usage_stats, counters)
+    
+    async def get_usage_stats(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> Dict[tuple, Dict[str, Any]]:
+        """일자별 사용량 누적값 조회"""
+        return await self.run(self.db.get_usage_stats, since, until, provider, model)
+    
+    async def cache_response(
+        self,
+        prompt_hash: str,
+        response: str,
+        model_name: Optional[str] = None
+    ):
+        """응답 캐시 저장"""
+        return await self.run(self.db.cache_response, prompt_hash, response, model_name)
+    
+    async def get_cached_response(self, prompt_hash: str) -> Optional[str]:
+        """캐시된 응답 조회"""
+        return await self.run(self.db.get_cached_response, prompt_hash)
+    
+    async def get_cached_responses(self, prompt_hashes: List[str]) -> Dict[str, str]:
+        """여러 캐시 응답 일괄 조회"""
+        return await self.run(self.db.get_cached_responses, prompt_hashes)
+    
+    async def archive_conversations(self, older_than_days: Optional[int] = None) -> Dict[str, Any]:
+        """오래된 대화 기록을 월별 보관 DB로 이동"""
+        return await self.run(self.db.archive_conversations, older_than_days)
+    
+    async def compact_cache(self) -> Dict[str, Any]:
+        """응답 캐시 정리 (만료/LRU 삭제 및 빈 페이지 회수)"""
+        return await self.run(self.db.compact_cache)
+    
+    def close(self):
+        """진행 중인 DB 작업을 마친 뒤 스레드 풀과 연결 종료"""
+        self._executor.shutdown(wait=True)
+        self.db.close()
+        logger.info("SLLM DB 비동기 파사드 종료")
@@ -0,0 +1,227 @@
+"""
+텍스트 압축 모듈
+SLLM DB에 저장되는 LLM 응답/대화 텍스트를 투명하게 압축 및 해제
+
+저장 형식 (행 단위 버전 관리):
+- str (TEXT): 압축하지 않은 값 (이전 버전 행 또는 min_size 미만의 짧은 텍스트)
+- bytes (BLOB): 1바이트 형식 헤더 + 본문
+    0x01 zlib
+    0x02 zlib + 사전 (헤더 뒤 4바이트 사전 ID)
+    0x03 zstd
+    0x04 zstd + 사전 (헤더 뒤 4바이트 사전 ID)
+"""
+import os
+import zlib
+import struct
+from typing import Optional, Union, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMAT_ZLIB = 0x01
+FORMAT_ZLIB_DICT = 0x02
+FORMAT_ZSTD = 0x03
+FORMAT_ZSTD_DICT = 0x04
+
+ALGORITHMS = ("none", "zlib", "zstd")
+
+# zlib 사전(zdict)은 최대 32KB까지만 사용됨
+ZLIB_MAX_DICT_SIZE = 32 * 1024
+
+StoredText = Union[str, bytes]
+
+class TextCodec:
+    """텍스트 압축/해제 코덱"""
+    
+    def __init__(
+        self,
+        algorithm: str = "zlib",
+        level: Optional[int] = None,
+        min_size: int = 256,
+        dictionary: Optional[bytes] = None
+    ):
+        """
+        코덱 초기화
+        
+        Args:
+            algorithm: "none", "zlib", "zstd" (zstandard 미설치 시 zlib 사용)
+            level: 압축 레벨 (None이면 알고리즘 기본값)
+            min_size: 이 크기(바이트) 미만의 텍스트는 압축하지 않음
+            dictionary: 학습된 압축 사전 (선택사항)
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"지원하지 않는 압축 알고리즘: {algorithm}")
+        if algorithm == "zstd" and zstandard is None:
+            logger.warning("zstandard 패키지가 설치되지 않아 zlib 압축을 사용합니다.")
+            algorithm = "zlib"
+        
+        self.algorithm = algorithm
+        self.level = level
+        self.min_size = min_size
+        self.dictionary = dictionary
+        self.dictionary_id = zlib.crc32(dictionary) if dictionary else None
+        
+        if algorithm == "zlib" and dictionary and len(dictionary) > ZLIB_MAX_DICT_SIZE:
+            # zlib은 사전의 마지막 32KB만 참조하므로 미리 잘라서 사용
+            self.dictionary = dictionary[-ZLIB_MAX_DICT_SIZE:]
+            self.dictionary_id = zlib.crc32(self.dictionary)
+        
+        self._zstd_dict = None
+        if zstandard is not None and self.dictionary:
+            self._zstd_dict = zstandard.ZstdCompressionDict(self.dictionary)
+    
+    @classmethod
+    def from_env(cls) -> "TextCodec":
+        """환경 변수 설정으로 코덱 생성"""
+        level = os.getenv("SLLM_COMPRESSION_LEVEL")
+        dictionary_path = os.getenv("SLLM_COMPRESSION_DICT")
+        dictionary = None
+        if dictionary_path:
+            try:
+                with open(dictionary_path, "rb") as f:
+                    dictionary = f.read()
+            except OSError as e:
+                logger.warning(f"압축 사전 로드 실패 ({dictionary_path}): {e}")
+        
+        return cls(
+            algorithm=os.getenv("SLLM_COMPRESSION", "zlib"),
+            level=int(level) if level else None,
+            min_size=int(os.getenv("SLLM_COMPRESSION_MIN_SIZE", "256")),
+            dictionary=dictionary
+        )
+    
+    def encode(self, text: Optional[str]) -> Optional[StoredText]:
+        """
+        저장용으로 텍스트 압축
+        
+        Returns:
+            압축 효과가 없거나 짧은 텍스트는 str 그대로, 압축하면 헤더가 붙은 bytes
+        """
+        if text is None or self.algorithm == "none":
+            return text
+        
+        raw = text.encode("utf-8")
+        if len(raw) < self.min_size:
+            return text
+        
+        if self.algorithm == "zstd":
+            encoded = self._encode_zstd(raw)
+        else:
+            encoded = self._encode_zlib(raw)
+        
+        # 압축 결과가 더 크면 원문 저장
+        return encoded if len(encoded) < len(raw) else text
+    
+    def decode(self, value: Optional[StoredText]) -> Optional[str]:
+        """저장된 값을 텍스트로 복원 (이전 버전의 비압축 행도 그대로 반환)"""
+        if value is None or isinstance(value, str):
+            return value
+        
+        value = bytes(value)
+        if not value:
+            return ""
+        
+        fmt = value[0]
+        if fmt == FORMAT_ZLIB:
+            return zlib.decompress(value[1:]).decode("utf-8")
+        if fmt == FORMAT_ZLIB_DICT:
+            dictionary = self._dictionary_for(value[1:5])
+            decompressor = zlib.decompressobj(zdict=dictionary)
+            return (decompressor.decompress(value[5:]) + decompressor.flush()).decode("utf-8")
+        if fmt in (FORMAT_ZSTD, FORMAT_ZSTD_DICT):
+            if zstandard is None:
+                raise RuntimeError("zstd로 압축된 행을 읽으려면 zstandard 패키지가 필요합니다.")
+            if fmt == FORMAT_ZSTD_DICT:
+                self._dictionary_for(value[1:5])
+                decompressor = zstandard.ZstdDecompressor(dict_data=self._zstd_dict)
+                return decompressor.decompress(value[5:]).decode("utf-8")
+            return zstandard.ZstdDecompressor().decompress(value[1:]).decode("utf-8")
+        
+        raise ValueError(f"알 수 없는 압축 형식: {fmt:#x}")
+    
+    def _encode_zlib(self, raw: bytes) -> bytes:
+        """zlib 압축 (사전이 있으면 사전 사용)"""
+        level = self.level if self.level is not None else 6
+        if self.dictionary:
+            compressor = zlib.compressobj(level, zdict=self.dictionary)
+            body = compressor.compress(raw) + compressor.flush()
+            return bytes([FORMAT_ZLIB_DICT]) + struct.pack(">I", self.dictionary_id) + body
+        return bytes([FORMAT_ZLIB]) + zlib.compress(raw, level)
+    
+    def _encode_zstd(self, raw: bytes) -> bytes:
+        """zstd 압축 (사전이 있으면 사전 사용)"""
+        level = self.level if self.level is not None else 3
+        if self._zstd_dict is not None:
+            compressor = zstandard.ZstdCompressor(level=level, dict_data=self._zstd_dict)
+            return (
+                bytes([FORMAT_ZSTD_DICT])
+                + struct.pack(">I", self.dictionary_id)
+                + compressor.compress(raw)
+            )
+        return bytes([FORMAT_ZSTD]) + zstandard.ZstdCompressor(level=level).compress(raw)
+    
+    def _dictionary_for(self, packed_id: bytes) -> bytes:
+        """행에 기록된 사전 ID가 현재 사전과 일치하는지 확인"""
+        dictionary_id = struct.unpack(">I", packed_id)[0]
+        if not self.dictionary or dictionary_id != self.dictionary_id:
+            raise ValueError(
+                f"압축 사전이 일치하지 않습니다 (행: {dictionary_id:#010x}, "
+                f"현재: {self.dictionary_id or 0:#010x})"
+            )
+        return self.dictionary
+
+
+def train_dictionary(samples: Iterable[str], size: int = 16 * 1024, algorithm: str = "zlib") -> bytes:
+    """
+    샘플 텍스트로 압축 사전 생성
+    
+    Args:
+        samples: 사전 학습에 사용할 텍스트 (실제 저장되는 응답/대화와 유사할수록 좋음)
+        size: 사전 크기 (바이트)
+        algorithm: "zstd"면 zstandard 학습기 사용, 그 외에는 최근 샘플을 이어 붙인 zlib용 사전
+    
+    Returns:
+        사전 바이트
+    """
+    encoded = [sample.encode("utf-8") for sample in samples if sample]
+    if not encoded:
+        raise ValueError("사전 학습에 사용할 샘플이 없습니다.")
+    
+    if algorithm == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd 사전 학습에는 zstandard 패키지가 필요합니다.")
+        return zstandard.train_dictionary(size, encoded).as_bytes()
+    
+    # zlib은 사전의 뒤쪽 내용을 더 가까운 거리로 참조하므로 샘플을 이어 붙여 마지막 size 바이트 사용
+    size = min(size, ZLIB_MAX_DICT_SIZE)
+    return b"".join(encoded)[-size:]
+
+
+if __name__ == "__main__":
+    # 사전 학습: python -m app.agent.compression <db_path> <output_path> [zlib|zstd]
+    import sys
+    import sqlite3
+    
+    if len(sys.argv) < 3:
+        print("사용법: python -m app.agent.compression <db_path> <output_path> [zlib|zstd]")
+        sys.exit(1)
+    
+    db_path, output_path = sys.argv[1], sys.argv[2]
+    target = sys.argv[3] if len(sys.argv) > 3 else "zlib"
+    codec = TextCodec.from_env()
+    
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("""
+        SELECT model_response FROM conversations ORDER BY id DESC LIMIT 2000
+    """).fetchall()
+    conn.close()
+    
+    dictionary = train_dictionary((codec.decode(row[0]) for row in rows), algorithm=target)
+    with open(output_path, "wb") as f:
+        f.write(dictionary)
+    print(f"압축 사전 저장 완료: {output_path} ({len(dictionary)} bytes)")
@@ -0,0 +1,254 @@
+"""
+대화 기록 write-behind 모듈
+대화 기록을 메모리 큐에 모았다가 백그라운드 스레드에서 배치로 저장
+"""
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List
+import logging
+from .sllm_db import SLLMDB
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = int(os.getenv("CONVERSATION_LOG_BATCH_SIZE", "100"))
+DEFAULT_FLUSH_INTERVAL_MS = int(os.getenv("CONVERSATION_LOG_FLUSH_MS", "200"))
+DEFAULT_MAX_QUEUE_SIZE = int(os.getenv("CONVERSATION_LOG_QUEUE_SIZE", "10000"))
+DEFAULT_OVERFLOW_POLICY = os.getenv("CONVERSATION_LOG_OVERFLOW", "drop_oldest")
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+class ConversationWriter:
+    """대화 기록 배치 저장기"""
+    
+    def __init__(
+        self,
+        db: SLLMDB,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval_ms: int = DEFAULT_FLUSH_INTERVAL_MS,
+        max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE,
+        overflow_policy: str = DEFAULT_OVERFLOW_POLICY,
+        block_timeout: float = 1.0
+    ):
+        """
+        배치 저장기 초기화
+        
+        Args:
+            db: 기록을 저장할 SLLMDB 인스턴스
+            batch_size: 한 트랜잭션에 저장할 최대 행 수 (이만큼 쌓이면 즉시 저장)
+            flush_interval_ms: 첫 행이 들어온 뒤 저장까지 기다리는 최대 시간 (밀리초)
+            max_queue_size: 큐 최대 크기
+            overflow_policy: 큐가 가득 찼을 때 정책
+                "drop_oldest" - 가장 오래된 행을 버리고 새 행 추가
+                "drop_newest" - 새 행을 버림
+                "block" - 최대 block_timeout 동안 대기 후 새 행을 버림
+            block_timeout: "block" 정책의 최대 대기 시간 (초)
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"지원하지 않는 overflow_policy: {overflow_policy}")
+        
+        self.db = db
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0, flush_interval_ms) / 1000.0
+        self.max_queue_size = max(1, max_queue_size)
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._flush_requested = False
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "batches": 0
+        }
+    
+    def start(self):
+        """백그라운드 저장 스레드 시작"""
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run,
+                name="conversation-writer",
+                daemon=True
+            )
+            self._thread.start()
+        logger.info(
+            f"대화 기록 배치 저장 시작 (batch_size={self.batch_size}, "
+            f"flush_interval={self.flush_interval * 1000:.0f}ms, policy={self.overflow_policy})"
+        )
+    
+    def enqueue(
+        self,
+        session_id: str,
+        user_message: str,
+        model_response: str,
+        model_name: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        대화 기록을 저장 큐에 추가
+        
+        "block" 정책이면 큐가 빌 때까지 호출한 스레드를 멈추므로 이벤트 루프에서는 enqueue_async 사용
+        
+        Returns:
+            큐에 추가되었으면 True, 오버플로 정책에 의해 버려졌으면 False
+        """
+        row = {
+            "session_id": session_id,
+            "user_message": user_message,
+            "model_response": model_response,
+            "model_name": model_name,
+            "metadata": metadata,
+            # 저장 시점이 아닌 요청 시점 기준으로 기록 (CURRENT_TIMESTAMP와 같은 UTC 형식)
+            "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        }
+        
+        with self._cond:
+            if len(self._queue) >= self.max_queue_size:
+                if self.overflow_policy == "drop_oldest":
+                    self._queue.popleft()
+                    self.stats["dropped"] += 1
+                elif self.overflow_policy == "block":
+                    self._cond.wait_for(
+                        lambda: len(self._queue) < self.max_queue_size,
+                        timeout=self.block_timeout
+                    )
+                
+                if len(self._queue) >= self.max_queue_size:
+                    self.stats["dropped"] += 1
+                    logger.warning(f"대화 기록 큐 가득 참, 기록 버림: session_id={session_id}")
+                    return False
+            
+            self._queue.append(row)
+            self.stats["enqueued"] += 1
+            self._cond.notify_all()
+        return True
+    
+    async def enqueue_async(
+        self,
+        session_id: str,
+        user_message: str,
+        model_response: str,
+        model_name: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        이벤트 루프에서 호출하는 enqueue
+        
+        "block" 정책에서 큐가 가득 찼으면 대기를 별도 스레드에서 수행해 이벤트 루프를 멈추지 않음
+        (큐를 채우는 쪽은 이벤트 루프뿐이므로 확인 후 enqueue 사이에 큐가 가득 차지는 않음)
+        """
+        if self.overflow_policy == "block" and len(self._queue) >= self.max_queue_size:
+            return await asyncio.to_thread(
+                self.enqueue, session_id, user_message, model_response, model_name, metadata
+            )
+        return self.enqueue(session_id, user_message, model_response, model_name, metadata)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        큐에 쌓인 기록이 모두 저장될 때까지 대기
+        
+        Args:
+            timeout: 최대 대기 시간 (초, None이면 무제한)
+        
+        Returns:
+            모두 저장되었으면 True
+        """
+        with self._cond:
+            if not self._thread or not self._thread.is_alive():
+                # 저장 스레드가 없으면 호출한 스레드에서 직접 저장
+                while self._queue:
+                    self._write_batch(self._take_batch())
+                return True
+            
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: not self._queue and self._in_flight == 0,
+                timeout=timeout
+            )
+    
+    def close(self, timeout: Optional[float] = 10.0):
+        """남은 기록을 모두 저장한 뒤 저장 스레드 종료"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            if self._thread.is_alive():
+                logger.warning("대화 기록 저장 스레드가 제한 시간 내에 종료되지 않았습니다.")
+            self._thread = None
+        
+        # 스레드 종료 후 남은 행이 있으면 직접 저장
+        with self._cond:
+            while self._queue:
+                self._write_batch(self._take_batch())
+        logger.info(f"대화 기록 배치 저장 종료: {self.stats}")
+    
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        """큐에서 최대 batch_size개 행을 꺼냄 (self._cond 보유 상태에서 호출)"""
+        count = min(self.batch_size, len(self._queue))
+        batch = [self._queue.popleft() for _ in range(count)]
+        self._in_flight += len(batch)
+        self._cond.notify_all()
+        return batch
+    
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        """배치를 한 트랜잭션으로 저장 (self._cond 보유 여부와 무관)"""
+        if not batch:
+            return
+        written = False
+        try:
+            self.db.save_conversations(batch)
+            written = True
+        except Exception as e:
+            logger.error(f"대화 기록 배치 저장 실패 ({len(batch)}건): {e}")
+        finally:
+            with self._cond:
+                if written:
+                    self.stats["written"] += len(batch)
+                    self.stats["batches"] += 1
+                else:
+                    self.stats["failed"] += len(batch)
+                self._in_flight -= len(batch)
+                self._cond.notify_all()
+    
+    def _run(self):
+        """저장 스레드 본체: batch_size가 차거나 flush_interval이 지나면 저장"""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._stopping)
+                
+                if not self._queue and self._stopping:
+                    return
+                
+                # 첫 행 이후 flush_interval 동안 추가 행을 기다려 배치를 채움
+                deadline = time.monotonic() + self.flush_interval
+                while (
+                    len(self._queue) < self.batch_size
+                    and not self._stopping
+                    and not self._flush_requested
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(timeout=remaining)
+                
+                batch = self._take_batch()
+                if not self._queue:
+                    self._flush_requested = False
+            
+            self._write_batch(batch)
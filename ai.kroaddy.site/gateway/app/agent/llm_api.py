@@ -1,33 +1,120 @@
 """
 LLM API 모듈
-외부 LLM API (OpenAI, Anthropic 등)와 통신
+외부 LLM API (OpenAI, Anthropic 등)와 통신, 로컬 SLLM 추론 엔진 연동
 """
 import os
+import asyncio
 import httpx
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
 import logging
 from dotenv import load_dotenv
+from .rate_limiter import RateScheduler
+from .token_budget import count_message_tokens
+
+if TYPE_CHECKING:
+    from .local_inference import LocalInferenceEngine
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# provider 측 프롬프트 접두사 캐싱 사용 여부 (Anthropic cache_control 표시)
+DEFAULT_PROMPT_CACHING = os.getenv("LLM_PROMPT_CACHING", "true").lower() == "true"
+
+ANTHROPIC_CACHE_CONTROL = {"type": "ephemeral"}
+
+def order_static_first(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    대화 시작 전(첫 user 메시지 앞)의 system 메시지를 원래 순서대로 맨 앞에 모음
+    
+    provider의 프롬프트 캐시는 요청 앞부분이 이전 요청과 정확히 같을 때만 적중하므로,
+    매 요청 동일한 지시문/프로필이 인사말 등 앞쪽 대화 메시지보다 먼저 오도록 정렬합니다.
+    대화 도중에 끼어 있는 system 메시지(도구 결과 안내, 상황 정보 등)는 해당 시점의 맥락이므로
+    위치를 바꾸지 않습니다.
+    """
+    first_user = next(
+        (i for i, msg in enumerate(messages) if msg.get("role") == "user"),
+        len(messages)
+    )
+    head = messages[:first_user]
+    system = [msg for msg in head if msg.get("role") == "system"]
+    if not system or len(system) == len(head):
+        return messages
+    return system + [msg for msg in head if msg.get("role") != "system"] + messages[first_user:]
+
+def extract_usage(provider: str, result: Dict[str, Any]) -> Optional[Dict[str, int]]:
+    """
+    provider별 usage 필드를 공통 형식으로 변환
+    
+    Returns:
+        {"prompt_tokens", "completion_tokens", "cached_tokens", "cache_write_tokens"}
+        (prompt_tokens는 캐시 적중/기록분을 포함한 전체 입력 토큰 수), usage가 없으면 None
+    """
+    usage = result.get("usage") if isinstance(result, dict) else None
+    if not usage:
+        return None
+    
+    if provider == "anthropic":
+        cached = usage.get("cache_read_input_tokens") or 0
+        written = usage.get("cache_creation_input_tokens") or 0
+        return {
+            "prompt_tokens": (usage.get("input_tokens") or 0) + cached + written,
+            "completion_tokens": usage.get("output_tokens") or 0,
+            "cached_tokens": cached,
+            "cache_write_tokens": written
+        }
+    
+    details = usage.get("prompt_tokens_details") or {}
+    return {
+        "prompt_tokens": usage.get("prompt_tokens") or 0,
+        "completion_tokens": usage.get("completion_tokens") or 0,
+        "cached_tokens": details.get("cached_tokens") or 0,
+        "cache_write_tokens": 0
+    }
+
 class LLMAPI:
     """LLM API 클라이언트"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        local_engine: Optional["LocalInferenceEngine"] = None,
+        prompt_caching: bool = DEFAULT_PROMPT_CACHING,
+        rate_scheduler: Optional[RateScheduler] = None
+    ):
+        """
+        LLM API 클라이언트 초기화
+        
+        Args:
+            local_engine: provider="local" 요청을 처리할 로컬 추론 엔진 (선택사항)
+            prompt_caching: Anthropic 요청에 cache_control 지점을 표시할지 여부
+            rate_scheduler: provider/모델별 rate limit 스케줄러 (없으면 기본 설정으로 생성)
+        """
+        self.local_engine = local_engine
+        self.prompt_caching = prompt_caching
+        self.rate_scheduler = rate_scheduler or RateScheduler()
         self.openai_api_key = os.getenv("OPENAI_API_KEY", "")
         self.anthropic_api_key = os.getenv("ANTHROPIC_API_KEY", "")
         self.openai_base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
         self.anthropic_base_url = os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com/v1")
     
+    def is_configured(self, provider: str) -> bool:
+        """provider의 API 키가 설정되어 있는지 확인"""
+        if provider == "openai":
+            return bool(self.openai_api_key)
+        elif provider == "anthropic":
+            return bool(self.anthropic_api_key)
+        elif provider == "local":
+            return self.local_engine is not None
+        return False
+    
     async def chat_completion(
         self,
         messages: list[Dict[str, str]],
         model: str = "gpt-3.5-turbo",
         provider: str = "openai",
         temperature: float = 0.7,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         LLM API를 호출하여 채팅 완성
@@ -35,30 +122,52 @@ class LLMAPI:
         Args:
             messages: 메시지 리스트 [{"role": "user", "content": "..."}]
             model: 모델 이름
-            provider: "openai" 또는 "anthropic"
+            provider: "openai", "anthropic" 또는 "local" (SLLM DB에 등록된 로컬 모델)
             temperature: 온도 파라미터
             max_tokens: 최대 토큰 수
+            timeout: provider 요청 1회의 제한 시간 (초, rate limit 대기와 재시도 간 대기는 포함하지 않음, None이면 제한 없음)
         
         Returns:
             API 응답 딕셔너리
         """
+        messages = order_static_first(messages)
         try:
             if provider == "openai":
-                return await self._openai_chat(messages, model, temperature, max_tokens)
+                return await self._openai_chat(messages, model, temperature, max_tokens, timeout)
             elif provider == "anthropic":
-                return await self._anthropic_chat(messages, model, temperature, max_tokens)
+                return await self._anthropic_chat(messages, model, temperature, max_tokens, timeout)
+            elif provider == "local":
+                return await asyncio.wait_for(self._local_chat(messages, model, temperature, max_tokens), timeout)
             else:
                 raise ValueError(f"지원하지 않는 provider: {provider}")
         except Exception as e:
             logger.error(f"LLM API 호출 실패: {e}")
             raise
     
-    async def _openai_chat(
+    async def _local_chat(
         self,
         messages: list[Dict[str, str]],
         model: str,
         temperature: float,
         max_tokens: Optional[int]
+    ) -> Dict[str, Any]:
+        """로컬 SLLM 추론 (OpenAI 응답 형식)"""
+        if self.local_engine is None:
+            raise ValueError("로컬 추론 엔진이 설정되지 않았습니다.")
+        return await self.local_engine.chat_completion(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+    
+    async def _openai_chat(
+        self,
+        messages: list[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        timeout: Optional[float] = None
     ) -> Dict[str, Any]:
         """OpenAI API 호출"""
         if not self.openai_api_key:
@@ -79,17 +188,15 @@ class LLMAPI:
         if max_tokens:
             payload["max_tokens"] = max_tokens
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
+        return await self._post("openai", model, url, payload, headers, messages, max_tokens, timeout)
     
     async def _anthropic_chat(
         self,
         messages: list[Dict[str, str]],
         model: str,
         temperature: float,
-        max_tokens: Optional[int]
+        max_tokens: Optional[int],
+        timeout: Optional[float] = None
     ) -> Dict[str, Any]:
         """Anthropic API 호출"""
         if not self.anthropic_api_key:
@@ -102,19 +209,22 @@ class LLMAPI:
             "Content-Type": "application/json"
         }
         
-        # Anthropic 형식으로 메시지 변환
-        system_message = None
+        # Anthropic 형식으로 메시지 변환 (system 메시지가 여러 개면 블록으로 순서대로 전달)
+        system_blocks = []
         conversation_messages = []
         
         for msg in messages:
             if msg["role"] == "system":
-                system_message = msg["content"]
+                system_blocks.append({"type": "text", "text": msg["content"]})
             else:
                 conversation_messages.append({
                     "role": msg["role"],
                     "content": msg["content"]
                 })
         
+        if self.prompt_caching:
+            self._mark_anthropic_cache_points(system_blocks, conversation_messages)
+        
         payload = {
             "model": model,
             "messages": conversation_messages,
@@ -122,11 +232,65 @@ class LLMAPI:
             "max_tokens": max_tokens or 1024
         }
         
-        if system_message:
-            payload["system"] = system_message
+        if system_blocks:
+            payload["system"] = system_blocks
+        
+        return await self._post("anthropic", model, url, payload, headers, messages, payload["max_tokens"], timeout)
+    
+    async def _post(
+        self,
+        provider: str,
+        model: str,
+        url: str,
+        payload: Dict[str, Any],
+        headers: Dict[str, str],
+        messages: list[Dict[str, str]],
+        max_tokens: Optional[int],
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        rate limit 스케줄러를 거쳐 provider API 호출
+        
+        한도가 부족하면 대기열에서 기다리고, 429/529 응답은 Retry-After 또는 지터 백오프 후 재시도합니다.
+        재시도 후에도 한도를 넘으면 RateLimitExceeded가 발생합니다.
+        """
+        # 토큰 한도는 프롬프트와 최대 응답 토큰을 합쳐 차감됨
+        estimated_tokens = count_message_tokens(messages, provider, model) + (max_tokens or 0)
         
         async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers, timeout=30.0)
+            async def send() -> httpx.Response:
+                return await client.post(url, json=payload, headers=headers, timeout=30.0)
+            
+            response = await self.rate_scheduler.call(
+                provider, model, estimated_tokens, send, attempt_timeout=timeout
+            )
             response.raise_for_status()
             return response.json()
-
+    
+    @staticmethod
+    def _mark_anthropic_cache_points(
+        system_blocks: List[Dict[str, Any]],
+        conversation_messages: List[Dict[str, Any]]
+    ):
+        """
+        Anthropic 프롬프트 캐시 지점(cache_control) 표시 (요청당 최대 4개 중 3개 사용)
+        
+        - 첫 system 블록: 모든 요청이 공유하는 고정 지시문
+        - 마지막 system 블록: 사용자별 프로필 등 system 전체
+        - 마지막 user 메시지 직전 메시지: 다음 턴에서 재사용되는 대화 이력
+        
+        캐시 최소 길이(모델별 1024~2048 토큰)보다 짧은 접두사는 provider가 무시합니다.
+        """
+        if system_blocks:
+            system_blocks[0]["cache_control"] = ANTHROPIC_CACHE_CONTROL
+            system_blocks[-1]["cache_control"] = ANTHROPIC_CACHE_CONTROL
+        
+        if len(conversation_messages) >= 2:
+            previous = conversation_messages[-2]
+            content = previous["content"]
+            if isinstance(content, str):
+                content = [{"type": "text", "text": content}]
+            else:
+                content = [dict(block) for block in content]
+            content[-1]["cache_control"] = ANTHROPIC_CACHE_CONTROL
+            conversation_messages[-2] = {"role": previous["role"], "content": content}
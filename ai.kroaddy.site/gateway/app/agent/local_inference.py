@@ -0,0 +1,382 @@
+"""
+로컬 SLLM 추론 모듈
+SLLM DB에 등록된 경량 모델(GGUF/ONNX)을 워커 프로세스 풀에서 CPU로 실행
+
+- 워커마다 최근 사용한 모델을 LRU로 메모리에 유지
+- 같은 모델에 대한 동시 요청은 짧은 대기 시간 동안 모아 워커 수만큼 나눠 여러 워커에서 동시에 실행
+- 모델 로드 시간과 추론 시간을 응답 및 통계로 제공
+"""
+import os
+import time
+import asyncio
+import multiprocessing
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Dict, Any, List, Callable, Awaitable, Tuple, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCAL_WORKERS = int(os.getenv("SLLM_LOCAL_WORKERS", "2"))
+DEFAULT_MAX_LOADED_MODELS = int(os.getenv("SLLM_LOCAL_MAX_LOADED_MODELS", "2"))
+DEFAULT_BATCH_WINDOW_MS = int(os.getenv("SLLM_LOCAL_BATCH_WINDOW_MS", "10"))
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv("SLLM_LOCAL_MAX_BATCH_SIZE", "8"))
+
+# llama.cpp(GGUF)로 실행하는 model_type
+GGUF_MODEL_TYPES = {"gguf", "llama", "llama.cpp", "mistral", "phi", "qwen", "gemma"}
+ONNX_MODEL_TYPES = {"onnx"}
+
+# ============================================================================
+# 워커 프로세스 측 (모듈 수준 함수만 프로세스 간에 전달 가능)
+# ============================================================================
+
+_worker_models: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+_worker_max_models = DEFAULT_MAX_LOADED_MODELS
+
+def _init_worker(max_models: int):
+    """워커 프로세스 초기화"""
+    global _worker_max_models
+    _worker_max_models = max(1, max_models)
+
+def _backend_for(model_type: str, model_path: str) -> str:
+    """model_type/경로로 실행 백엔드 결정"""
+    model_type = (model_type or "").lower()
+    if model_type in ONNX_MODEL_TYPES:
+        return "onnx"
+    if model_type in GGUF_MODEL_TYPES or model_path.lower().endswith(".gguf"):
+        return "gguf"
+    raise ValueError(f"지원하지 않는 로컬 모델 타입: {model_type}")
+
+def _load_model(backend: str, model_path: str, config: Dict[str, Any]) -> Any:
+    """백엔드별 모델 로드 (선택 의존성은 워커에서만 import)"""
+    if backend == "gguf":
+        try:
+            from llama_cpp import Llama
+        except ImportError as e:
+            raise RuntimeError("GGUF 모델 실행에는 llama-cpp-python 패키지가 필요합니다.") from e
+        return Llama(
+            model_path=model_path,
+            n_ctx=int(config.get("n_ctx", 2048)),
+            n_threads=config.get("n_threads"),
+            chat_format=config.get("chat_format"),
+            verbose=False
+        )
+    
+    try:
+        import onnxruntime_genai as og
+    except ImportError as e:
+        raise RuntimeError("ONNX 모델 실행에는 onnxruntime-genai 패키지가 필요합니다.") from e
+    model = og.Model(model_path)
+    return {"model": model, "tokenizer": og.Tokenizer(model)}
+
+def _get_model(backend: str, model_path: str, config: Dict[str, Any]) -> Tuple[Any, float]:
+    """
+    LRU 캐시에서 모델 조회 (없으면 로드하고 가장 오래 쓰지 않은 모델 해제)
+    
+    Returns:
+        (모델, 로드 시간(ms)) - 캐시 적중이면 로드 시간은 0
+    """
+    key = (backend, model_path)
+    if key in _worker_models:
+        _worker_models.move_to_end(key)
+        return _worker_models[key], 0.0
+    
+    started = time.perf_counter()
+    model = _load_model(backend, model_path, config)
+    load_ms = (time.perf_counter() - started) * 1000
+    
+    _worker_models[key] = model
+    while len(_worker_models) > _worker_max_models:
+        _worker_models.popitem(last=False)
+    return model, load_ms
+
+def _format_prompt(messages: List[Dict[str, str]], config: Dict[str, Any]) -> str:
+    """ONNX 모델용 프롬프트 구성 (config의 prompt_template 사용, 기본은 역할 태그 형식)"""
+    template = config.get("prompt_template", "<|{role}|>\n{content}<|end|>\n")
+    prompt = "".join(template.format(role=msg["role"], content=msg["content"]) for msg in messages)
+    return prompt + config.get("assistant_prefix", "<|assistant|>\n")
+
+def _generate(backend: str, model: Any, request: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """요청 하나에 대한 추론 (OpenAI 응답 형식으로 반환)"""
+    max_tokens = request.get("max_tokens") or int(config.get("max_tokens", 512))
+    temperature = request.get("temperature", 0.7)
+    
+    if backend == "gguf":
+        return model.create_chat_completion(
+            messages=request["messages"],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+    
+    import onnxruntime_genai as og
+    tokenizer = model["tokenizer"]
+    input_tokens = tokenizer.encode(_format_prompt(request["messages"], config))
+    params = og.GeneratorParams(model["model"])
+    params.set_search_options(
+        max_length=len(input_tokens) + max_tokens,
+        temperature=max(temperature, 1e-5),
+        do_sample=temperature > 0
+    )
+    generator = og.Generator(model["model"], params)
+    generator.append_tokens(input_tokens)
+    while not generator.is_done():
+        generator.generate_next_token()
+    output_tokens = generator.get_sequence(0)[len(input_tokens):]
+    return {
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": tokenizer.decode(output_tokens)},
+            "finish_reason": "length" if len(output_tokens) >= max_tokens else "stop"
+        }],
+        "usage": {
+            "prompt_tokens": len(input_tokens),
+            "completion_tokens": len(output_tokens),
+            "total_tokens": len(input_tokens) + len(output_tokens)
+        }
+    }
+
+def _run_batch(spec: Dict[str, Any], requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    워커에서 같은 모델에 대한 요청 묶음 실행 (묶음 하나는 워커 하나에서 순서대로 실행)
+    
+    Returns:
+        요청 순서대로 {"result": ..., "load_ms": ..., "inference_ms": ...} 또는 {"error": ...}
+    """
+    try:
+        model, load_ms = _get_model(spec["backend"], spec["model_path"], spec["config"])
+    except Exception as e:
+        return [{"error": f"{type(e).__name__}: {e}"} for _ in requests]
+    
+    outputs = []
+    for position, request in enumerate(requests):
+        started = time.perf_counter()
+        try:
+            result = _generate(spec["backend"], model, request, spec["config"])
+            outputs.append({
+                "result": result,
+                # 로드 시간은 묶음의 첫 요청에만 반영
+                "load_ms": load_ms if position == 0 else 0.0,
+                "inference_ms": (time.perf_counter() - started) * 1000
+            })
+        except Exception as e:
+            outputs.append({"error": f"{type(e).__name__}: {e}"})
+    return outputs
+
+# ============================================================================
+# 게이트웨이 프로세스 측
+# ============================================================================
+
+class LocalInferenceEngine:
+    """로컬 SLLM 추론 엔진"""
+    
+    def __init__(
+        self,
+        model_lookup: Callable[[str], Awaitable[Optional[Dict[str, Any]]]],
+        max_workers: int = DEFAULT_LOCAL_WORKERS,
+        max_loaded_models: int = DEFAULT_MAX_LOADED_MODELS,
+        batch_window_ms: int = DEFAULT_BATCH_WINDOW_MS,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE
+    ):
+        """
+        추론 엔진 초기화
+        
+        Args:
+            model_lookup: 모델 이름으로 등록 정보를 조회하는 비동기 함수 (예: AsyncSLLMDB.get_model)
+            max_workers: 추론 워커 프로세스 수 (모아진 요청이 동시에 실행되는 최대 수, 워커마다 모델을 따로 로드)
+            max_loaded_models: 워커별로 메모리에 유지할 최대 모델 수
+            batch_window_ms: 같은 모델 요청을 모으는 최대 대기 시간 (밀리초)
+            max_batch_size: 한 번에 워커로 보내는 최대 요청 수
+        """
+        self.model_lookup = model_lookup
+        self.max_workers = max(1, max_workers)
+        self.max_loaded_models = max_loaded_models
+        self.batch_window = max(0, batch_window_ms) / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, List[Tuple[Dict[str, Any], asyncio.Future]]] = defaultdict(list)
+        self._specs: Dict[str, Dict[str, Any]] = {}
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+        # 실행 중인 dispatch 작업 (참조를 유지해야 가비지 컬렉션되지 않음)
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {
+            "requests": 0,
+            "errors": 0,
+            "batches": 0,
+            "loads": 0,
+            "load_ms": 0.0,
+            "inference_ms": 0.0,
+            "queue_ms": 0.0
+        })
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """워커 풀은 첫 로컬 요청 시 생성 (spawn으로 게이트웨이 상태를 복제하지 않음)"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.max_loaded_models,)
+            )
+            logger.info(f"로컬 추론 워커 풀 시작 (workers={self.max_workers})")
+        return self._executor
+    
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        등록된 로컬 모델로 채팅 완성
+        
+        Returns:
+            OpenAI 형식 응답 + "timings" (load_ms, inference_ms, queue_ms)
+        """
+        model_info = await self.model_lookup(model)
+        if not model_info:
+            raise ValueError(f"등록되지 않은 로컬 모델: {model}")
+        
+        self._specs[model] = {
+            "backend": _backend_for(model_info["model_type"], model_info["model_path"]),
+            "model_path": model_info["model_path"],
+            "config": model_info.get("config") or {}
+        }
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        request = {
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "enqueued_at": time.perf_counter()
+        }
+        
+        pending = self._pending[model]
+        pending.append((request, future))
+        if len(pending) >= self.max_batch_size:
+            self._flush(model)
+        elif model not in self._flush_handles:
+            self._flush_handles[model] = loop.call_later(self.batch_window, self._flush, model)
+        
+        return await future
+    
+    def _flush(self, model: str):
+        """모아둔 요청을 워커로 전달"""
+        handle = self._flush_handles.pop(model, None)
+        if handle:
+            handle.cancel()
+        
+        batch = self._pending.pop(model, [])
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._dispatch(model, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _dispatch(self, model: str, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        """
+        모아진 요청을 워커 수만큼 나눠 동시에 실행하고 각 요청의 future에 결과 설정
+        
+        llama.cpp 채팅 API는 요청 하나씩만 생성하므로, 묶음의 이점은 여러 워커에서 병렬로 실행하는 데서 얻습니다.
+        """
+        stats = self._stats[model]
+        stats["batches"] += 1
+        dispatched_at = time.perf_counter()
+        
+        chunk_count = min(self.max_workers, len(batch))
+        chunks = [batch[index::chunk_count] for index in range(chunk_count)]
+        
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        
+        async def run_chunk(chunk: List[Tuple[Dict[str, Any], asyncio.Future]]) -> List[Dict[str, Any]]:
+            requests = [
+                {key: value for key, value in request.items() if key != "enqueued_at"}
+                for request, _ in chunk
+            ]
+            try:
+                return await loop.run_in_executor(executor, _run_batch, self._specs[model], requests)
+            except Exception as e:
+                return [{"error": f"{type(e).__name__}: {e}"} for _ in chunk]
+        
+        try:
+            chunk_outputs = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+        except asyncio.CancelledError:
+            # 종료 중 취소되면 기다리는 호출 측이 멈춰 있지 않도록 함께 취소
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
+            raise
+        
+        for (request, future), output in (
+            pair
+            for chunk, outputs in zip(chunks, chunk_outputs)
+            for pair in zip(chunk, outputs)
+        ):
+            stats["requests"] += 1
+            if future.done():
+                continue
+            if "error" in output:
+                stats["errors"] += 1
+                future.set_exception(RuntimeError(f"로컬 추론 실패 ({model}): {output['error']}"))
+                continue
+            
+            queue_ms = (dispatched_at - request["enqueued_at"]) * 1000
+            if output["load_ms"]:
+                stats["loads"] += 1
+            stats["load_ms"] += output["load_ms"]
+            stats["inference_ms"] += output["inference_ms"]
+            stats["queue_ms"] += queue_ms
+            
+            result = output["result"]
+            result["timings"] = {
+                "load_ms": round(output["load_ms"], 1),
+                "inference_ms": round(output["inference_ms"], 1),
+                "queue_ms": round(queue_ms, 1),
+                "batch_size": len(batch)
+            }
+            future.set_result(result)
+    
+    def stats(self) -> Dict[str, Any]:
+        """모델별 요청 수, 로드/추론/대기 시간 통계"""
+        summary = {}
+        for model, stats in self._stats.items():
+            completed = max(1, stats["requests"] - stats["errors"])
+            summary[model] = {
+                "requests": int(stats["requests"]),
+                "errors": int(stats["errors"]),
+                "batches": int(stats["batches"]),
+                "loads": int(stats["loads"]),
+                "total_load_ms": round(stats["load_ms"], 1),
+                "avg_inference_ms": round(stats["inference_ms"] / completed, 1),
+                "avg_queue_ms": round(stats["queue_ms"] / completed, 1)
+            }
+        return summary
+    
+    async def close(self):
+        """
+        예약된 배치 전달과 진행 중인 배치 작업을 취소한 뒤 워커 풀 종료
+        
+        타이머 핸들과 작업은 이벤트 루프에서 취소하고, 워커 종료 대기만 별도 스레드에서 수행합니다.
+        """
+        for handle in self._flush_handles.values():
+            handle.cancel()
+        self._flush_handles.clear()
+        # 아직 워커로 전달되지 않은 요청은 기다리는 호출 측에 취소로 전달
+        for pending in self._pending.values():
+            for _, future in pending:
+                if not future.done():
+                    future.cancel()
+        self._pending.clear()
+        
+        # 완료 콜백이 집합을 변경하므로 복사본을 순회
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+            logger.info("로컬 추론 워커 풀 종료")
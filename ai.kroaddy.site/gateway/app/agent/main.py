@@ -1,22 +1,75 @@
 """
 Agent 서비스 - LLM API 및 SLLM 관리
 """
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
-from .llm_api import LLMAPI
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Literal
+from .llm_api import LLMAPI, extract_usage
 from .sllm_db import SLLMDB
+from .async_sllm_db import AsyncSLLMDB
+from .conversation_writer import ConversationWriter
+from .provider_router import ProviderRouter, DEFAULT_ROUTING_ENABLED
+from .token_budget import trim_messages, DEFAULT_PROMPT_TOKEN_BUDGET
+from .local_inference import LocalInferenceEngine
+from .session_store import SessionStore
+from .rate_limiter import RateLimitExceeded
+from .usage_stats import (
+    UsageRecorder,
+    DEFAULT_USAGE_FLUSH_INTERVAL,
+    new_counters,
+    merge_counters,
+    summarize_counters
+)
+from datetime import datetime, timedelta, timezone
+import os
+import json
+import asyncio
 import logging
+import math
+import time
 import hashlib
+import httpx
 
 logger = logging.getLogger(__name__)
 
+# 대화 기록 조회 페이지 최대 크기
+MAX_CONVERSATION_PAGE_SIZE = 1000
+
+# 대화 기록 검색 결과 최대 개수
+MAX_SEARCH_RESULTS = 100
+
+# 배치 채팅 최대 요청 수 및 LLM API 동시 호출 상한
+MAX_BATCH_SIZE = int(os.getenv("AGENT_BATCH_MAX_SIZE", "500"))
+BATCH_CONCURRENCY = int(os.getenv("AGENT_BATCH_CONCURRENCY", "8"))
+
+# 응답 캐시 정리 주기 (초, 0이면 비활성화)
+CACHE_COMPACT_INTERVAL = float(os.getenv("SLLM_CACHE_COMPACT_INTERVAL", "300"))
+
+# 오래된 대화 기록 보관 주기 (초, SLLM_ARCHIVE_AFTER_DAYS가 0이면 실행하지 않음)
+ARCHIVE_INTERVAL = float(os.getenv("SLLM_ARCHIVE_INTERVAL", "3600"))
+
+# 사용량 통계 조회 최대 기간 (일)
+MAX_STATS_DAYS = 366
+
 # Agent 라우터
 agent_router = APIRouter(prefix="/agent", tags=["agent"])
 
 # LLM API 및 SLLM DB 초기화
-llm_api = LLMAPI()
 sllm_db = SLLMDB()
+# 이벤트 루프를 막지 않도록 DB 호출은 전용 스레드 풀에서 실행
+async_db = AsyncSLLMDB(sllm_db)
+# 등록된 로컬 모델은 provider="local"로 워커 프로세스에서 실행
+local_engine = LocalInferenceEngine(model_lookup=async_db.get_model)
+llm_api = LLMAPI(local_engine=local_engine)
+# provider별 지연 시간/오류율 추적 및 동등 모델 간 장애 전환
+provider_router = ProviderRouter(llm_api)
+# 대화 기록은 응답 경로에서 디스크를 기다리지 않도록 배치로 저장
+conversation_writer = ConversationWriter(sllm_db)
+# 서버 측 채팅 세션 (최근 대화를 메모리에 유지, 캐시 미스 시 대화 기록에서 복원)
+session_store = SessionStore(async_db, conversation_writer)
+# provider/모델/일자별 토큰 사용량, 지연 시간, 비용 집계 (주기적으로 DB에 합산)
+usage_recorder = UsageRecorder()
 
 # ============================================================================
 # 요청/응답 모델
@@ -25,16 +78,59 @@ sllm_db = SLLMDB()
 class ChatRequest(BaseModel):
     messages: List[Dict[str, str]]
     model: Optional[str] = "gpt-3.5-turbo"
-    provider: Optional[str] = "openai"
+    provider: Optional[str] = "openai"  # "openai", "anthropic" 또는 "local"
     temperature: Optional[float] = 0.7
     max_tokens: Optional[int] = None
     use_cache: Optional[bool] = True
+    routing: Optional[bool] = None  # None이면 LLM_ROUTING_ENABLED 설정 사용
+    max_prompt_tokens: Optional[int] = None  # None이면 AGENT_PROMPT_TOKEN_BUDGET 설정 사용 (0이면 정리 안 함)
+    trim_strategy: Optional[Literal["drop", "collapse"]] = "drop"
 
 class ChatResponse(BaseModel):
     response: str
-    model: str
-    provider: str
+    model: str  # 실제 응답한 모델
+    provider: str  # 실제 응답한 provider
     cached: bool = False
+    failover: bool = False  # 요청과 다른 provider/모델이 응답했는지 여부
+    prompt_tokens: Optional[int] = None  # 전송한 프롬프트의 추정 토큰 수
+    trimmed_tokens: int = 0  # 토큰 예산 때문에 제외된 추정 토큰 수
+    timings: Optional[Dict[str, Any]] = None  # 로컬 모델의 로드/추론/대기 시간 (ms)
+    usage: Optional[Dict[str, int]] = None  # provider가 보고한 토큰 사용량 (프롬프트 캐시 적중 cached_tokens 포함)
+
+class BatchChatRequest(BaseModel):
+    requests: List[ChatRequest]
+    max_concurrency: Optional[int] = Field(None, ge=1)  # None이면 BATCH_CONCURRENCY (그보다 크면 BATCH_CONCURRENCY로 제한)
+    stream: Optional[bool] = False
+
+class BatchChatItem(BaseModel):
+    index: int
+    success: bool
+    result: Optional[ChatResponse] = None
+    error: Optional[str] = None
+
+class BatchChatResponse(BaseModel):
+    results: List[BatchChatItem]
+    count: int
+    cached_count: int
+    failed_count: int
+
+class SessionCreateRequest(BaseModel):
+    model: Optional[str] = "gpt-3.5-turbo"
+    provider: Optional[str] = "openai"
+    system_prompt: Optional[str] = None
+    temperature: Optional[float] = 0.7
+    max_tokens: Optional[int] = None
+    routing: Optional[bool] = None
+    max_prompt_tokens: Optional[int] = None
+    trim_strategy: Optional[Literal["drop", "collapse"]] = "drop"
+
+class SessionChatRequest(BaseModel):
+    message: str
+    temperature: Optional[float] = None  # None이면 세션 생성 시 설정 사용
+    max_tokens: Optional[int] = None
+
+class SessionChatResponse(ChatResponse):
+    session_id: str
 
 class ModelRegisterRequest(BaseModel):
     name: str
@@ -46,6 +142,72 @@ class ConversationRequest(BaseModel):
     session_id: str
     limit: Optional[int] = 100
 
+# ============================================================================
+# 수명 주기
+# ============================================================================
+
+_background_tasks: List[asyncio.Task] = []
+
+async def _cache_compaction_loop():
+    """주기적으로 응답 캐시 정리"""
+    while True:
+        await asyncio.sleep(CACHE_COMPACT_INTERVAL)
+        try:
+            await async_db.compact_cache()
+        except Exception as e:
+            logger.error(f"응답 캐시 정리 실패: {e}")
+
+async def _archive_loop():
+    """주기적으로 오래된 대화 기록을 월별 보관 DB로 이동"""
+    while True:
+        await asyncio.sleep(ARCHIVE_INTERVAL)
+        try:
+            await async_db.archive_conversations()
+        except Exception as e:
+            logger.error(f"대화 기록 보관 실패: {e}")
+
+async def _flush_usage_stats():
+    """메모리 사용량 집계를 DB에 합산 (실패하면 다음 주기에 다시 시도)"""
+    counters = usage_recorder.drain()
+    if not counters:
+        return
+    try:
+        await async_db.merge_usage_stats(counters)
+    except Exception as e:
+        usage_recorder.restore(counters)
+        logger.error(f"사용량 통계 저장 실패: {e}")
+
+async def _usage_flush_loop():
+    """주기적으로 사용량 통계 저장"""
+    while True:
+        await asyncio.sleep(DEFAULT_USAGE_FLUSH_INTERVAL)
+        await _flush_usage_stats()
+
+@agent_router.on_event("startup")
+async def startup_agent():
+    """대화 기록 배치 저장 및 캐시 정리 작업 시작"""
+    conversation_writer.start()
+    if CACHE_COMPACT_INTERVAL > 0:
+        _background_tasks.append(asyncio.create_task(_cache_compaction_loop()))
+    if DEFAULT_USAGE_FLUSH_INTERVAL > 0:
+        _background_tasks.append(asyncio.create_task(_usage_flush_loop()))
+    if ARCHIVE_INTERVAL > 0 and sllm_db.archive_after_days > 0:
+        _background_tasks.append(asyncio.create_task(_archive_loop()))
+
+@agent_router.on_event("shutdown")
+async def shutdown_agent():
+    """백그라운드 작업 중단, 남은 대화 기록 저장 후 DB 스레드 풀 및 연결 정리"""
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+    
+    await _flush_usage_stats()
+    await async_db.run(conversation_writer.close)
+    await async_db.run(sllm_db.flush_cache_hits)
+    await local_engine.close()
+    async_db.close()
+
 # ============================================================================
 # API 엔드포인트
 # ============================================================================
@@ -60,18 +222,113 @@ async def agent_root():
         "sllm_db_ready": True
     }
 
+def _prompt_hash(messages: List[Dict[str, str]]) -> str:
+    """응답 캐시 키 (메시지 리스트 해시)"""
+    return hashlib.md5(str(messages).encode()).hexdigest()
+
+def _extract_response_text(provider: str, result: Dict[str, Any]) -> str:
+    """provider별 응답 형식에서 텍스트 추출"""
+    if provider in ("openai", "local"):
+        return result["choices"][0]["message"]["content"]
+    elif provider == "anthropic":
+        return result["content"][0]["text"]
+    return str(result)
+
+def _rate_limit_error(error: RateLimitExceeded) -> HTTPException:
+    """provider rate limit 초과를 Retry-After가 포함된 429 응답으로 변환"""
+    headers = None
+    if error.retry_after is not None:
+        headers = {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+    return HTTPException(status_code=429, detail=str(error), headers=headers)
+
+def _upstream_timeout_error(error: Exception) -> HTTPException:
+    """provider 응답 시간 초과를 503 응답으로 변환"""
+    return HTTPException(status_code=503, detail=f"LLM provider 응답 시간 초과: {type(error).__name__}")
+
+async def _complete_chat(request: ChatRequest, session_id: Optional[str] = None) -> ChatResponse:
+    """
+    LLM API 호출 후 응답 캐시 및 대화 기록 저장 (캐시 조회는 호출 측에서 수행)
+    
+    session_id가 없으면 메시지 리스트 해시로 대화 기록의 session_id를 정합니다.
+    """
+    # 토큰 예산 초과 시 오래된 대화 정리 (system 및 최근 메시지 유지)
+    budget = request.max_prompt_tokens if request.max_prompt_tokens is not None else DEFAULT_PROMPT_TOKEN_BUDGET
+    trimmed = trim_messages(
+        request.messages,
+        budget=budget,
+        provider=request.provider,
+        model=request.model,
+        strategy=request.trim_strategy or "drop"
+    )
+    
+    routing = request.routing if request.routing is not None else DEFAULT_ROUTING_ENABLED
+    started = time.perf_counter()
+    try:
+        result, provider, model = await provider_router.chat_completion(
+            messages=trimmed["messages"],
+            model=request.model,
+            provider=request.provider,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens,
+            routing=routing
+        )
+    except Exception:
+        usage_recorder.record_error(request.provider, request.model)
+        raise
+    latency_ms = (time.perf_counter() - started) * 1000
+    failover = (provider, model) != (request.provider, request.model)
+    
+    response_text = _extract_response_text(provider, result)
+    usage = extract_usage(provider, result)
+    usage_recorder.record(provider, model, latency_ms, usage)
+    if usage and usage["cached_tokens"]:
+        logger.info(f"프롬프트 캐시 적중: {provider}/{model} {usage['cached_tokens']}/{usage['prompt_tokens']} 토큰")
+    
+    # 캐시 저장
+    if request.use_cache:
+        await async_db.cache_response(_prompt_hash(request.messages), response_text, model)
+    
+    # 대화 기록 저장
+    if request.messages:
+        last_message = request.messages[-1]
+        if last_message.get("role") == "user":
+            if session_id is None:
+                session_id = _prompt_hash(request.messages)[:16]
+            await conversation_writer.enqueue_async(
+                session_id=session_id,
+                user_message=last_message["content"],
+                model_response=response_text,
+                model_name=model,
+                metadata={
+                    "provider": provider,
+                    "requested_provider": request.provider,
+                    "requested_model": request.model
+                }
+            )
+    
+    return ChatResponse(
+        response=response_text,
+        model=model,
+        provider=provider,
+        cached=False,
+        failover=failover,
+        prompt_tokens=trimmed["prompt_tokens"],
+        trimmed_tokens=trimmed["trimmed_tokens"],
+        timings=result.get("timings"),
+        usage=usage
+    )
+
 @agent_router.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """LLM API를 통한 채팅"""
     try:
         # 캐시 확인
         if request.use_cache:
-            prompt_text = str(request.messages)
-            prompt_hash = hashlib.md5(prompt_text.encode()).hexdigest()
-            cached_response = sllm_db.get_cached_response(prompt_hash)
+            cached_response = await async_db.get_cached_response(_prompt_hash(request.messages))
             
             if cached_response:
                 logger.info("캐시된 응답 사용")
+                usage_recorder.record_cache_hit(request.provider, request.model)
                 return ChatResponse(
                     response=cached_response,
                     model=request.model,
@@ -79,57 +336,257 @@ async def chat(request: ChatRequest):
                     cached=True
                 )
         
-        # LLM API 호출
-        result = await llm_api.chat_completion(
-            messages=request.messages,
-            model=request.model,
-            provider=request.provider,
-            temperature=request.temperature,
-            max_tokens=request.max_tokens
+        return await _complete_chat(request)
+    
+    except RateLimitExceeded as e:
+        logger.warning(f"채팅 처리 실패: {e}")
+        raise _rate_limit_error(e)
+    except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+        logger.warning(f"채팅 처리 실패: {type(e).__name__}")
+        raise _upstream_timeout_error(e)
+    except Exception as e:
+        logger.error(f"채팅 처리 실패: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@agent_router.post("/chat/batch")
+async def chat_batch(request: BatchChatRequest):
+    """
+    여러 채팅 요청을 한 번에 처리
+    
+    캐시는 한 번의 쿼리로 조회하고, 캐시 미스는 동시성 제한 하에 LLM API로 병렬 호출합니다.
+    stream=true면 완료되는 순서대로 NDJSON 한 줄씩 전송하고, 아니면 입력 순서대로 반환합니다.
+    """
+    if len(request.requests) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"배치 크기는 최대 {MAX_BATCH_SIZE}개입니다."
         )
-        
-        # 응답 추출
-        if request.provider == "openai":
-            response_text = result["choices"][0]["message"]["content"]
-        elif request.provider == "anthropic":
-            response_text = result["content"][0]["text"]
-        else:
-            response_text = str(result)
-        
-        # 캐시 저장
-        if request.use_cache:
-            prompt_hash = hashlib.md5(str(request.messages).encode()).hexdigest()
-            sllm_db.cache_response(prompt_hash, response_text, request.model)
-        
-        # 대화 기록 저장
-        if request.messages:
-            last_message = request.messages[-1]
-            if last_message.get("role") == "user":
-                session_id = hashlib.md5(str(request.messages).encode()).hexdigest()[:16]
-                sllm_db.save_conversation(
-                    session_id=session_id,
-                    user_message=last_message["content"],
-                    model_response=response_text,
-                    model_name=request.model,
-                    metadata={"provider": request.provider}
+    
+    concurrency = min(request.max_concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY)
+    
+    try:
+        # 캐시 일괄 조회
+        hashes = {
+            index: _prompt_hash(item.messages)
+            for index, item in enumerate(request.requests)
+            if item.use_cache
+        }
+        cached = await async_db.get_cached_responses(list(set(hashes.values()))) if hashes else {}
+    except Exception as e:
+        logger.error(f"배치 캐시 조회 실패: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    results: Dict[int, BatchChatItem] = {}
+    pending: List[int] = []
+    for index, item in enumerate(request.requests):
+        cached_response = cached.get(hashes.get(index))
+        if cached_response:
+            usage_recorder.record_cache_hit(item.provider, item.model)
+            results[index] = BatchChatItem(
+                index=index,
+                success=True,
+                result=ChatResponse(
+                    response=cached_response,
+                    model=item.model,
+                    provider=item.provider,
+                    cached=True
                 )
+            )
+        else:
+            pending.append(index)
+    
+    logger.info(f"배치 채팅: 전체 {len(request.requests)}건, 캐시 {len(results)}건, 호출 {len(pending)}건 (동시성 {concurrency})")
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run_one(index: int) -> BatchChatItem:
+        async with semaphore:
+            try:
+                result = await _complete_chat(request.requests[index])
+                return BatchChatItem(index=index, success=True, result=result)
+            except Exception as e:
+                logger.error(f"배치 채팅 항목 {index} 처리 실패: {e}")
+                return BatchChatItem(index=index, success=False, error=str(e))
+    
+    if request.stream:
+        async def stream_results():
+            tasks = [asyncio.create_task(run_one(index)) for index in pending]
+            try:
+                for item in results.values():
+                    yield item.model_dump_json() + "\n"
+                for task in asyncio.as_completed(tasks):
+                    item = await task
+                    yield item.model_dump_json() + "\n"
+            finally:
+                # 클라이언트 연결이 끊기면 남은 호출 취소
+                for task in tasks:
+                    task.cancel()
         
-        return ChatResponse(
-            response=response_text,
+        return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+    
+    for item in await asyncio.gather(*(run_one(index) for index in pending)):
+        results[item.index] = item
+    
+    ordered = [results[index] for index in range(len(request.requests))]
+    return BatchChatResponse(
+        results=ordered,
+        count=len(ordered),
+        cached_count=sum(1 for item in ordered if item.result and item.result.cached),
+        failed_count=sum(1 for item in ordered if not item.success)
+    )
+
+@agent_router.post("/sessions")
+async def create_session(request: SessionCreateRequest):
+    """
+    채팅 세션 생성
+    
+    이후 /sessions/{session_id}/chat에는 새 user 메시지만 보내면 서버가 이전 대화를 이어 붙입니다.
+    """
+    try:
+        config = request.model_dump(exclude={"model", "provider", "system_prompt"})
+        session = await session_store.create(
             model=request.model,
             provider=request.provider,
-            cached=False
+            system_prompt=request.system_prompt,
+            config=config
         )
+        return {
+            "success": True,
+            "session": session
+        }
+    except Exception as e:
+        logger.error(f"채팅 세션 생성 실패: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@agent_router.post("/sessions/{session_id}/chat", response_model=SessionChatResponse)
+async def session_chat(session_id: str, request: SessionChatRequest):
+    """세션에 새 user 메시지를 보내고 응답 받기 (같은 세션의 턴은 순서대로 처리)"""
+    entry = await session_store.get(session_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"세션을 찾을 수 없습니다: {session_id}")
+    
+    session = entry["session"]
+    config = session["config"]
+    try:
+        async with entry["lock"]:
+            chat_request = ChatRequest(
+                messages=session_store.build_messages(entry, request.message),
+                model=session["model"],
+                provider=session["provider"],
+                temperature=request.temperature if request.temperature is not None else config.get("temperature", 0.7),
+                max_tokens=request.max_tokens if request.max_tokens is not None else config.get("max_tokens"),
+                # 세션 턴은 이전 대화 전체가 키가 되어 재사용되지 않으므로 응답 캐시 생략
+                use_cache=False,
+                routing=config.get("routing"),
+                max_prompt_tokens=config.get("max_prompt_tokens"),
+                trim_strategy=config.get("trim_strategy") or "drop"
+            )
+            response = await _complete_chat(chat_request, session_id=session_id)
+            session_store.append_turn(entry, request.message, response.response)
+        
+        return SessionChatResponse(session_id=session_id, **response.model_dump())
+    except RateLimitExceeded as e:
+        logger.warning(f"세션 채팅 처리 실패 ({session_id}): {e}")
+        raise _rate_limit_error(e)
+    except (asyncio.TimeoutError, httpx.TimeoutException) as e:
+        logger.warning(f"세션 채팅 처리 실패 ({session_id}): {type(e).__name__}")
+        raise _upstream_timeout_error(e)
+    except Exception as e:
+        logger.error(f"세션 채팅 처리 실패 ({session_id}): {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@agent_router.get("/sessions/{session_id}")
+async def get_session(session_id: str):
+    """채팅 세션 정보 및 메모리에 유지 중인 최근 대화"""
+    entry = await session_store.get(session_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"세션을 찾을 수 없습니다: {session_id}")
+    return {
+        "success": True,
+        "session": entry["session"],
+        "messages": entry["messages"]
+    }
+
+@agent_router.get("/providers/health")
+async def providers_health():
+    """provider/모델별 최근 지연 시간, 오류율 및 rate limit 상태"""
+    return {
+        "success": True,
+        "routing_enabled": DEFAULT_ROUTING_ENABLED,
+        "providers": provider_router.snapshot(),
+        "rate_limits": llm_api.rate_scheduler.snapshot()
+    }
+
+@agent_router.get("/stats")
+async def usage_stats(
+    days: int = Query(7, ge=1, le=MAX_STATS_DAYS),
+    provider: Optional[str] = None,
+    model: Optional[str] = None
+):
+    """
+    provider/모델별 사용량 통계 (최근 days일, UTC 기준, 아직 저장되지 않은 집계 포함)
     
+    - daily: 일자/provider/모델별 통계
+    - models: 기간 전체의 provider/모델별 통계
+    - total: 기간 전체 합계
+    """
+    since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    try:
+        stored = await async_db.get_usage_stats(since=since, provider=provider, model=model)
     except Exception as e:
-        logger.error(f"채팅 처리 실패: {e}")
+        logger.error(f"사용량 통계 조회 실패: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    daily: Dict[tuple, Dict[str, Any]] = {}
+    for source in (stored, usage_recorder.pending()):
+        for key, counters in source.items():
+            day, key_provider, key_model = key
+            if day < since or (provider and key_provider != provider) or (model and key_model != model):
+                continue
+            merge_counters(daily.setdefault(key, new_counters()), counters)
+    
+    by_model: Dict[tuple, Dict[str, Any]] = {}
+    total = new_counters()
+    for (day, key_provider, key_model), counters in daily.items():
+        merge_counters(by_model.setdefault((key_provider, key_model), new_counters()), counters)
+        merge_counters(total, counters)
+    
+    return {
+        "success": True,
+        "since": since,
+        "daily": [
+            {"day": day, "provider": key_provider, "model": key_model, **summarize_counters(counters)}
+            for (day, key_provider, key_model), counters in sorted(daily.items())
+        ],
+        "models": [
+            {"provider": key_provider, "model": key_model, **summarize_counters(counters)}
+            for (key_provider, key_model), counters in sorted(by_model.items())
+        ],
+        "total": summarize_counters(total)
+    }
+
+@agent_router.get("/db/stats")
+async def db_stats():
+    """SLLM DB 경합 지표 (스레드 풀 대기 시간, 쓰기 트랜잭션 소요 시간, 대화 기록 큐 상태)"""
+    return {
+        "success": True,
+        **async_db.stats(),
+        "conversation_writer": dict(conversation_writer.stats)
+    }
+
+@agent_router.get("/local/stats")
+async def local_stats():
+    """로컬 SLLM 모델별 요청 수, 로드/추론/대기 시간"""
+    return {
+        "success": True,
+        "models": local_engine.stats()
+    }
 
 @agent_router.post("/models/register")
 async def register_model(request: ModelRegisterRequest):
     """SLLM 모델 등록"""
     try:
-        model_id = sllm_db.register_model(
+        model_id = await async_db.register_model(
             name=request.name,
             model_type=request.model_type,
             model_path=request.model_path,
@@ -148,7 +605,7 @@ async def register_model(request: ModelRegisterRequest):
 async def list_models():
     """등록된 모델 목록 조회"""
     try:
-        models = sllm_db.list_models()
+        models = await async_db.list_models()
         return {
             "success": True,
             "models": models,
@@ -162,7 +619,7 @@ async def list_models():
 async def get_model(model_name: str):
     """특정 모델 정보 조회"""
     try:
-        model = sllm_db.get_model(model_name)
+        model = await async_db.get_model(model_name)
         if not model:
             raise HTTPException(status_code=404, detail=f"모델 '{model_name}'을 찾을 수 없습니다.")
         return {
@@ -175,17 +632,146 @@ async def get_model(model_name: str):
         logger.error(f"모델 조회 실패: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@agent_router.get("/conversations/export")
+async def export_conversations(
+    session_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_archive: bool = False
+):
+    """
+    대화 기록 NDJSON 스트리밍 내보내기 (오래된 순)
+    
+    - since / until: 기간 필터 (ISO 8601, since 포함 ~ until 미포함, 시간대가 없으면 UTC)
+    - fields: 내보낼 컬럼 (쉼표 구분)
+    - include_archive: 월별 보관 DB로 옮겨진 대화도 함께 내보내기 (기본값은 hot DB만)
+    
+    DB 커서에서 배치 단위로 읽어 바로 전송하므로 내보내는 행 수와 무관하게 메모리 사용량이 일정합니다.
+    """
+    columns = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    batches = async_db.iter_conversation_batches(
+        session_id=session_id,
+        since=since,
+        until=until,
+        columns=columns,
+        include_archive=include_archive
+    )
+    
+    # 응답을 시작하기 전에 첫 배치를 읽어 잘못된 필터/컬럼은 400으로 응답
+    try:
+        first_batch = await batches.__anext__()
+    except StopAsyncIteration:
+        first_batch = []
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"대화 기록 내보내기 실패: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    async def stream_rows():
+        try:
+            batch = first_batch
+            while batch:
+                yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in batch)
+                batch = await batches.__anext__()
+        except StopAsyncIteration:
+            pass
+        finally:
+            await batches.aclose()
+    
+    return StreamingResponse(stream_rows(), media_type="application/x-ndjson")
+
+@agent_router.post("/conversations/archive")
+async def archive_conversations(older_than_days: Optional[int] = Query(None, ge=1)):
+    """
+    오래된 대화 기록을 월별 보관 DB로 즉시 이동
+    
+    - older_than_days: 이 일수보다 오래된 대화 이동 (없으면 SLLM_ARCHIVE_AFTER_DAYS 설정)
+    """
+    try:
+        result = await async_db.archive_conversations(older_than_days)
+        return {
+            "success": True,
+            **result
+        }
+    except Exception as e:
+        logger.error(f"대화 기록 보관 실패: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@agent_router.get("/conversations/search")
+async def search_conversations(
+    q: str = Query(..., min_length=1),
+    session_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_RESULTS),
+    offset: int = Query(0, ge=0),
+    include_archive: bool = False
+):
+    """
+    대화 기록 키워드 검색 (BM25 관련도 순)
+    
+    - q: 검색어 (공백으로 구분된 단어가 모두 포함된 대화)
+    - since / until: 기간 필터 (ISO 8601, since 포함 ~ until 미포함, 시간대가 없으면 UTC)
+    - include_archive: hot DB 결과 뒤에 월별 보관 DB의 일치 대화를 최신순으로 추가 (색인 없이 순차 검사, score는 null)
+    - 결과의 snippet은 일치 구간을 <mark>로 표시한 발췌문
+    """
+    try:
+        results = await async_db.search_conversations(
+            q,
+            session_id=session_id,
+            since=since,
+            until=until,
+            limit=limit,
+            offset=offset,
+            include_archive=include_archive
+        )
+        return {
+            "success": True,
+            "results": results,
+            "count": len(results)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"대화 기록 검색 실패: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @agent_router.get("/conversations")
-async def get_conversations(session_id: Optional[str] = None, limit: int = 100):
-    """대화 기록 조회"""
+async def get_conversations(
+    session_id: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=MAX_CONVERSATION_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_archive: bool = False
+):
+    """
+    대화 기록 조회 (최신순)
+    
+    - cursor: 이전 응답의 next_cursor를 전달하면 다음 페이지 조회
+    - fields: 반환할 컬럼 (쉼표 구분, 예: "id,user_message,created_at")
+    - include_archive: 월별 보관 DB로 옮겨진 오래된 대화도 함께 조회
+    """
     try:
-        conversations = sllm_db.get_conversations(session_id=session_id, limit=limit)
+        columns = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+        page = await async_db.get_conversations_page(
+            session_id=session_id,
+            limit=limit,
+            cursor=cursor,
+            columns=columns,
+            include_archive=include_archive
+        )
         return {
             "success": True,
-            "conversations": conversations,
-            "count": len(conversations)
+            "conversations": page["conversations"],
+            "count": len(page["conversations"]),
+            "next_cursor": page["next_cursor"]
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"대화 기록 조회 실패: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-
@@ -0,0 +1,253 @@
+"""
+Provider 라우팅 모듈
+provider/모델별 지연 시간과 오류율을 추적하여 가장 건강한 동등 모델로 라우팅하고 장애 시 전환
+"""
+import os
+import json
+import time
+import asyncio
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple
+import logging
+import httpx
+from .llm_api import LLMAPI
+from .rate_limiter import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+# (provider, model)
+Target = Tuple[str, str]
+
+# 기본 동등 모델 그룹 (같은 그룹 안에서는 서로 대체 가능)
+DEFAULT_EQUIVALENCE = [
+    ["openai:gpt-3.5-turbo", "anthropic:claude-3-haiku-20240307"],
+    ["openai:gpt-4o-mini", "anthropic:claude-3-5-haiku-latest"],
+    ["openai:gpt-4o", "anthropic:claude-3-5-sonnet-latest"]
+]
+
+DEFAULT_ROUTING_ENABLED = os.getenv("LLM_ROUTING_ENABLED", "false").lower() == "true"
+DEFAULT_ROUTING_TIMEOUT = float(os.getenv("LLM_ROUTING_TIMEOUT", "30"))
+
+# 장애 전환 대상이 되는 HTTP 상태 코드 (인증 오류는 해당 provider만의 문제이므로 포함)
+FAILOVER_STATUS_CODES = {401, 403, 408, 409, 429}
+
+def load_equivalence_map() -> Dict[Target, List[Target]]:
+    """
+    LLM_MODEL_EQUIVALENCE 환경 변수(JSON)에서 동등 모델 맵 로드
+    
+    형식: [["openai:gpt-4o-mini", "anthropic:claude-3-5-haiku-latest"], ...]
+    """
+    raw = os.getenv("LLM_MODEL_EQUIVALENCE")
+    groups = DEFAULT_EQUIVALENCE
+    if raw:
+        try:
+            groups = json.loads(raw)
+        except json.JSONDecodeError as e:
+            logger.warning(f"LLM_MODEL_EQUIVALENCE 파싱 실패, 기본값 사용: {e}")
+    
+    equivalence: Dict[Target, List[Target]] = {}
+    for group in groups:
+        targets = [tuple(entry.split(":", 1)) for entry in group if ":" in entry]
+        for target in targets:
+            equivalence[target] = targets
+    return equivalence
+
+
+class ProviderHealth:
+    """provider/모델 하나의 최근 호출 통계"""
+    
+    def __init__(self, window: int = 50, max_age: float = 300.0):
+        # (기록 시각, 지연 시간, 성공 여부)
+        self.samples: deque = deque(maxlen=window)
+        self.max_age = max_age
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+    
+    def _prune(self):
+        """max_age보다 오래된 샘플 제거 (한 번 실패한 provider도 시간이 지나면 다시 후보가 됨)"""
+        cutoff = time.monotonic() - self.max_age
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+    
+    def record(self, latency: float, ok: bool, cooldown: float, failure_threshold: int):
+        """호출 결과 기록 (연속 실패가 임계치를 넘으면 cooldown 동안 후순위로 밀림)"""
+        self.samples.append((time.monotonic(), latency, ok))
+        if ok:
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+        else:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= failure_threshold:
+                self.open_until = time.monotonic() + cooldown
+    
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.open_until
+    
+    @property
+    def error_rate(self) -> float:
+        self._prune()
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, _, ok in self.samples if not ok) / len(self.samples)
+    
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        self._prune()
+        latencies = sorted(latency for _, latency, ok in self.samples if ok)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, int(len(latencies) * percentile))
+        return latencies[index]
+    
+    def score(self) -> float:
+        """낮을수록 건강함 (p50 지연 시간에 오류율 가중치 적용, 샘플이 없으면 0)"""
+        p50 = self.latency_percentile(0.5)
+        self._prune()
+        if p50 is None:
+            return 0.0 if not self.samples else float("inf")
+        return p50 * (1.0 + 4.0 * self.error_rate)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "samples": len(self.samples),
+            "error_rate": round(self.error_rate, 4),
+            "p50_ms": _to_ms(self.latency_percentile(0.5)),
+            "p95_ms": _to_ms(self.latency_percentile(0.95)),
+            "available": self.available
+        }
+
+
+def _to_ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+class ProviderRouter:
+    """지연 시간/오류율 기반 provider 라우터"""
+    
+    def __init__(
+        self,
+        llm_api: LLMAPI,
+        equivalence: Optional[Dict[Target, List[Target]]] = None,
+        timeout: float = DEFAULT_ROUTING_TIMEOUT,
+        window: int = 50,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0
+    ):
+        """
+        라우터 초기화
+        
+        Args:
+            llm_api: 실제 호출에 사용할 LLMAPI
+            equivalence: 동등 모델 맵 (없으면 환경 변수/기본값 사용)
+            timeout: 라우팅 시 provider 요청 1회의 제한 시간 (초, 넘으면 다음 후보로 전환)
+            window: provider/모델별로 유지할 최근 호출 수
+            failure_threshold: 후순위로 밀리기까지의 연속 실패 횟수
+            cooldown: 연속 실패 후 후순위로 유지할 시간 (초)
+        """
+        self.llm_api = llm_api
+        self.equivalence = equivalence if equivalence is not None else load_equivalence_map()
+        self.timeout = timeout
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._health: Dict[Target, ProviderHealth] = {}
+    
+    def _health_for(self, target: Target) -> ProviderHealth:
+        health = self._health.get(target)
+        if health is None:
+            health = self._health[target] = ProviderHealth(self.window)
+        return health
+    
+    def candidates(self, provider: str, model: str) -> List[Target]:
+        """
+        요청된 모델과 동등한 후보를 건강한 순서로 정렬
+        
+        사용 가능 여부 → 점수 → 요청된 provider 우선 순으로 정렬하며,
+        API 키가 설정되지 않은 provider는 제외합니다.
+        """
+        requested = (provider, model)
+        group = self.equivalence.get(requested, [requested])
+        if requested not in group:
+            group = [requested] + list(group)
+        
+        targets = [
+            target for target in group
+            if target == requested or self.llm_api.is_configured(target[0])
+        ]
+        return sorted(
+            targets,
+            key=lambda target: (
+                not self._health_for(target).available,
+                self._health_for(target).score(),
+                target != requested
+            )
+        )
+    
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: str,
+        provider: str,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        routing: bool = False
+    ) -> Tuple[Dict[str, Any], str, str]:
+        """
+        LLM 호출 (routing=True면 건강한 동등 모델로 라우팅하고 실패 시 다음 후보로 전환)
+        
+        Returns:
+            (API 응답, 실제 응답한 provider, 실제 응답한 모델)
+        """
+        targets = self.candidates(provider, model) if routing else [(provider, model)]
+        last_error: Optional[Exception] = None
+        
+        for attempt, (target_provider, target_model) in enumerate(targets):
+            health = self._health_for((target_provider, target_model))
+            started = time.perf_counter()
+            try:
+                # 제한 시간은 provider 요청 1회에만 적용 (rate limit 대기/Retry-After는 스케줄러의 max_wait로 제한)
+                result = await self.llm_api.chat_completion(
+                    messages=messages,
+                    model=target_model,
+                    provider=target_provider,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    timeout=self.timeout if routing else None
+                )
+            except Exception as e:
+                health.record(time.perf_counter() - started, False, self.cooldown, self.failure_threshold)
+                last_error = e
+                if not routing or not self._should_failover(e):
+                    raise
+                logger.warning(
+                    f"LLM 호출 실패, 다음 후보로 전환: {target_provider}/{target_model} "
+                    f"({type(e).__name__}: {e})"
+                )
+                continue
+            
+            health.record(time.perf_counter() - started, True, self.cooldown, self.failure_threshold)
+            if attempt > 0 or (target_provider, target_model) != (provider, model):
+                logger.info(
+                    f"라우팅: {provider}/{model} 요청을 {target_provider}/{target_model}에서 처리"
+                )
+            return result, target_provider, target_model
+        
+        raise last_error or RuntimeError("사용 가능한 LLM provider가 없습니다.")
+    
+    @staticmethod
+    def _should_failover(error: Exception) -> bool:
+        """다른 provider로 재시도할 만한 오류인지 판단"""
+        if isinstance(error, (asyncio.TimeoutError, httpx.TransportError, RateLimitExceeded)):
+            return True
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            return status >= 500 or status in FAILOVER_STATUS_CODES
+        # API 키 미설정 등 provider 설정 오류
+        return isinstance(error, ValueError)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """provider/모델별 상태 요약"""
+        return {
+            f"{provider}/{model}": health.snapshot()
+            for (provider, model), health in self._health.items()
+        }
@@ -0,0 +1,346 @@
+"""
+Rate limit 스케줄러 모듈
+provider/모델별 분당 요청 수(RPM)와 토큰 수(TPM) 한도를 응답 헤더에서 추적하여,
+한도를 넘는 호출은 대기열에서 기다리게 하고 429 응답은 Retry-After 및 지터 백오프로 재시도
+"""
+import os
+import re
+import time
+import random
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, Tuple, Callable, Awaitable
+import logging
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RETRIES = int(os.getenv("LLM_RATE_MAX_RETRIES", "3"))
+DEFAULT_BACKOFF_BASE = float(os.getenv("LLM_RATE_BACKOFF_BASE", "0.5"))
+DEFAULT_BACKOFF_MAX = float(os.getenv("LLM_RATE_BACKOFF_MAX", "30"))
+# 한도 때문에 기다릴 수 있는 최대 시간 (초, 넘으면 RateLimitExceeded)
+DEFAULT_MAX_WAIT = float(os.getenv("LLM_RATE_MAX_WAIT", "20"))
+
+# 재시도 대상 상태 코드 (Anthropic은 과부하 시 529 반환)
+RETRY_STATUS_CODES = {429, 529}
+
+# provider별 rate limit 헤더 이름 (한도, 남은 양, 초기화 시점)
+RATE_LIMIT_HEADERS = {
+    "openai": {
+        "requests": (
+            "x-ratelimit-limit-requests",
+            "x-ratelimit-remaining-requests",
+            "x-ratelimit-reset-requests"
+        ),
+        "tokens": (
+            "x-ratelimit-limit-tokens",
+            "x-ratelimit-remaining-tokens",
+            "x-ratelimit-reset-tokens"
+        )
+    },
+    "anthropic": {
+        "requests": (
+            "anthropic-ratelimit-requests-limit",
+            "anthropic-ratelimit-requests-remaining",
+            "anthropic-ratelimit-requests-reset"
+        ),
+        "tokens": (
+            "anthropic-ratelimit-tokens-limit",
+            "anthropic-ratelimit-tokens-remaining",
+            "anthropic-ratelimit-tokens-reset"
+        )
+    }
+}
+
+_DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class RateLimitExceeded(Exception):
+    """한도 대기 시간 또는 재시도 횟수를 넘은 경우"""
+    
+    def __init__(self, provider: str, model: str, retry_after: Optional[float] = None):
+        self.provider = provider
+        self.model = model
+        self.retry_after = retry_after
+        message = f"{provider}/{model} rate limit 초과"
+        if retry_after is not None:
+            message += f" ({retry_after:.1f}초 후 재시도 가능)"
+        super().__init__(message)
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    """
+    한도 초기화 시점을 '지금부터 남은 초'로 변환
+    
+    OpenAI는 "6m0s", "20ms" 같은 기간, Anthropic은 RFC 3339 시각을 사용합니다.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    matches = _DURATION_PATTERN.findall(value)
+    if matches and "".join(number + unit for number, unit in matches) == value:
+        return sum(float(number) * _DURATION_UNITS[unit] for number, unit in matches)
+    try:
+        reset_at = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if reset_at.tzinfo is None:
+        reset_at = reset_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def parse_retry_after(headers: httpx.Headers) -> Optional[float]:
+    """Retry-After (초 또는 HTTP 날짜) / retry-after-ms 헤더를 초 단위로 변환"""
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000.0)
+        except ValueError:
+            pass
+    
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateBudget:
+    """한도 하나 (요청 수 또는 토큰 수)의 남은 양과 초기화 시점"""
+    
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[float] = None
+        self.reset_at = 0.0
+    
+    def update(self, limit: Optional[str], remaining: Optional[str], reset: Optional[str]):
+        """응답 헤더 값으로 갱신 (헤더가 없으면 그대로 유지)"""
+        try:
+            if limit is not None:
+                self.limit = int(limit)
+            if remaining is not None:
+                self.remaining = float(remaining)
+        except ValueError:
+            return
+        reset_in = _parse_reset(reset)
+        if reset_in is not None:
+            self.reset_at = time.monotonic() + reset_in
+    
+    def wait_time(self, amount: float, now: float) -> float:
+        """amount만큼 사용하려면 기다려야 하는 시간 (초)"""
+        if self.remaining is None:
+            return 0.0
+        if now >= self.reset_at and self.limit is not None:
+            # 초기화 시점이 지났으면 다음 응답 헤더를 받기 전까지 한도가 다시 찼다고 가정
+            self.remaining = float(self.limit)
+        # 한 번의 요청이 한도 전체보다 큰 경우에는 다 찬 상태에서 보내도록 허용
+        needed = min(amount, self.limit) if self.limit else amount
+        if self.remaining >= needed:
+            return 0.0
+        return max(0.0, self.reset_at - now)
+    
+    def consume(self, amount: float):
+        if self.remaining is not None:
+            self.remaining -= amount
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "remaining": int(self.remaining) if self.remaining is not None else None,
+            "reset_in": round(max(0.0, self.reset_at - time.monotonic()), 3)
+        }
+
+
+class ProviderRateLimiter:
+    """provider/모델 하나의 요청/토큰 한도 및 대기열"""
+    
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.requests = RateBudget()
+        self.tokens = RateBudget()
+        self.blocked_until = 0.0
+        # 대기 중인 호출이 도착 순서대로 한도를 차지하도록 직렬화
+        self._lock = asyncio.Lock()
+        self.stats = {
+            "acquired": 0,
+            "queued": 0,
+            "retries": 0,
+            "rate_limited": 0
+        }
+    
+    async def acquire(self, estimated_tokens: int, max_wait: float) -> bool:
+        """
+        한도가 허용할 때까지 대기한 뒤 요청 1회와 예상 토큰 수를 차지
+        
+        Returns:
+            max_wait 안에 차지했으면 True
+        """
+        deadline = time.monotonic() + max_wait
+        # 앞선 호출이 대기 중이면 그 뒤에 줄을 서되, 줄 서는 시간도 max_wait에 포함
+        try:
+            await asyncio.wait_for(self._lock.acquire(), timeout=max_wait)
+        except asyncio.TimeoutError:
+            return False
+        
+        try:
+            queued = False
+            while True:
+                now = time.monotonic()
+                wait = max(
+                    self.blocked_until - now,
+                    self.requests.wait_time(1, now),
+                    self.tokens.wait_time(estimated_tokens, now)
+                )
+                if wait <= 0:
+                    self.requests.consume(1)
+                    self.tokens.consume(estimated_tokens)
+                    self.stats["acquired"] += 1
+                    return True
+                if now + wait > deadline:
+                    return False
+                if not queued:
+                    queued = True
+                    self.stats["queued"] += 1
+                await asyncio.sleep(wait)
+        finally:
+            self._lock.release()
+    
+    def wait_hint(self) -> float:
+        """클라이언트에 전달할 대략적인 재시도 대기 시간 (초)"""
+        now = time.monotonic()
+        return max(
+            0.0,
+            self.blocked_until - now,
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(1, now)
+        )
+    
+    def update(self, headers: httpx.Headers):
+        """응답 헤더에서 남은 한도 갱신"""
+        names = RATE_LIMIT_HEADERS.get(self.provider)
+        if not names:
+            return
+        self.requests.update(*(headers.get(name) for name in names["requests"]))
+        self.tokens.update(*(headers.get(name) for name in names["tokens"]))
+    
+    def block_for(self, seconds: float):
+        """Retry-After 동안 이 provider/모델로의 모든 호출 보류"""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests.snapshot(),
+            "tokens": self.tokens.snapshot(),
+            "blocked_for": round(max(0.0, self.blocked_until - time.monotonic()), 3),
+            **self.stats
+        }
+
+
+class RateScheduler:
+    """provider/모델별 rate limit 스케줄러"""
+    
+    def __init__(
+        self,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+        max_wait: float = DEFAULT_MAX_WAIT
+    ):
+        """
+        스케줄러 초기화
+        
+        Args:
+            max_retries: 429/529 응답 시 최대 재시도 횟수
+            backoff_base: Retry-After가 없을 때 지수 백오프 기본 대기 시간 (초)
+            backoff_max: 백오프 최대 대기 시간 (초)
+            max_wait: 한도/Retry-After 때문에 기다릴 수 있는 최대 시간 (초)
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_wait = max_wait
+        self._limiters: Dict[Tuple[str, str], ProviderRateLimiter] = {}
+    
+    def limiter_for(self, provider: str, model: str) -> ProviderRateLimiter:
+        limiter = self._limiters.get((provider, model))
+        if limiter is None:
+            limiter = self._limiters[(provider, model)] = ProviderRateLimiter(provider)
+        return limiter
+    
+    def _backoff(self, attempt: int) -> float:
+        """full jitter 지수 백오프 (동시에 실패한 호출들이 같은 시각에 몰리지 않도록 분산)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    
+    async def call(
+        self,
+        provider: str,
+        model: str,
+        estimated_tokens: int,
+        send: Callable[[], Awaitable[httpx.Response]],
+        attempt_timeout: Optional[float] = None
+    ) -> httpx.Response:
+        """
+        한도 안에서 요청을 보내고, 429/529면 Retry-After 또는 지터 백오프 후 재시도
+        
+        Args:
+            provider: provider 이름
+            model: 모델 이름
+            estimated_tokens: 이 요청이 차지할 예상 토큰 수 (프롬프트 + 최대 응답 토큰)
+            send: 실제 HTTP 요청을 보내는 함수
+            attempt_timeout: 요청 1회의 제한 시간 (초, 한도 대기와 재시도 간 대기는 max_wait로 따로 제한)
+        
+        Returns:
+            429/529가 아닌 응답 (다른 오류 상태 코드 판단은 호출 측에서 수행)
+        
+        Raises:
+            RateLimitExceeded: max_wait 안에 한도를 얻지 못했거나 재시도 횟수를 모두 사용한 경우
+            asyncio.TimeoutError: 요청 1회가 attempt_timeout을 넘은 경우
+        """
+        limiter = self.limiter_for(provider, model)
+        started = time.monotonic()
+        
+        for attempt in range(self.max_retries + 1):
+            remaining_wait = self.max_wait - (time.monotonic() - started)
+            if not await limiter.acquire(estimated_tokens, max(0.0, remaining_wait)):
+                limiter.stats["rate_limited"] += 1
+                raise RateLimitExceeded(provider, model, limiter.wait_hint())
+            
+            if attempt_timeout is not None:
+                response = await asyncio.wait_for(send(), timeout=attempt_timeout)
+            else:
+                response = await send()
+            limiter.update(response.headers)
+            if response.status_code not in RETRY_STATUS_CODES:
+                return response
+            
+            retry_after = parse_retry_after(response.headers)
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+            # 한 호출의 429가 같은 provider/모델의 다른 호출도 멈추도록 보류 시간 공유
+            limiter.block_for(delay)
+            
+            if attempt == self.max_retries:
+                break
+            limiter.stats["retries"] += 1
+            logger.warning(
+                f"{provider}/{model} {response.status_code} 응답, {delay:.2f}초 후 재시도 "
+                f"({attempt + 1}/{self.max_retries})"
+            )
+        
+        limiter.stats["rate_limited"] += 1
+        raise RateLimitExceeded(provider, model, limiter.wait_hint())
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """provider/모델별 남은 한도 및 대기/재시도 통계"""
+        return {
+            f"{provider}/{model}": limiter.snapshot()
+            for (provider, model), limiter in self._limiters.items()
+        }
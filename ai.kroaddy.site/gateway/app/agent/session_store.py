@@ -0,0 +1,143 @@
+"""
+채팅 세션 모듈
+서버 측 세션의 최근 대화를 메모리에 유지하여, 클라이언트는 매 턴 새 메시지만 전송
+"""
+import os
+import uuid
+import asyncio
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List
+import logging
+from .async_sllm_db import AsyncSLLMDB
+from .conversation_writer import ConversationWriter
+
+logger = logging.getLogger(__name__)
+
+# 메모리에 유지할 최대 세션 수 및 세션별 최대 대화 턴 수
+DEFAULT_SESSION_CACHE_SIZE = int(os.getenv("AGENT_SESSION_CACHE_SIZE", "1000"))
+DEFAULT_SESSION_HISTORY_TURNS = int(os.getenv("AGENT_SESSION_HISTORY_TURNS", "50"))
+
+# 세션을 DB에서 다시 불러오기 전 대화 기록 큐를 비우는 최대 대기 시간 (초)
+WRITER_FLUSH_TIMEOUT = 5.0
+
+class SessionStore:
+    """채팅 세션 캐시 (최근 사용 순 LRU, 캐시 미스 시 DB에서 대화 복원)"""
+    
+    def __init__(
+        self,
+        async_db: AsyncSLLMDB,
+        conversation_writer: ConversationWriter,
+        max_sessions: int = DEFAULT_SESSION_CACHE_SIZE,
+        history_turns: int = DEFAULT_SESSION_HISTORY_TURNS
+    ):
+        """
+        세션 캐시 초기화
+        
+        Args:
+            async_db: 세션 정보 및 대화 기록을 조회할 비동기 DB
+            conversation_writer: 대화 기록 배치 저장기 (DB 복원 전 큐를 비우는 데 사용)
+            max_sessions: 메모리에 유지할 최대 세션 수
+            history_turns: 세션별로 유지/복원할 최대 대화 턴 수 (턴 하나 = user + assistant)
+        """
+        self.async_db = async_db
+        self.conversation_writer = conversation_writer
+        self.max_sessions = max(1, max_sessions)
+        self.history_turns = max(1, history_turns)
+        
+        # {session_id: {"session": 세션 정보, "messages": 최근 대화, "lock": 턴 직렬화용 잠금}}
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # 캐시 미스 복원 중인 세션별 잠금 (같은 세션을 동시에 두 번 복원하지 않도록)
+        self._loading: Dict[str, asyncio.Lock] = {}
+        
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+    
+    async def create(
+        self,
+        model: str,
+        provider: str,
+        system_prompt: Optional[str] = None,
+        config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """새 세션 생성 후 캐시에 등록"""
+        session_id = uuid.uuid4().hex
+        session = await self.async_db.create_session(session_id, model, provider, system_prompt, config)
+        self._put(session_id, {"session": session, "messages": [], "lock": asyncio.Lock()})
+        return session
+    
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        세션 조회 (캐시에 없으면 DB에서 세션 정보와 최근 대화를 복원)
+        
+        Returns:
+            세션 항목 또는 존재하지 않는 세션이면 None
+        """
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            self._sessions.move_to_end(session_id)
+            self.stats["hits"] += 1
+            return entry
+        
+        # 같은 세션의 동시 캐시 미스는 하나만 복원하고 나머지는 그 결과를 사용
+        # (각자 복원하면 늦게 등록된 항목이 먼저 등록된 항목에 추가된 새 턴을 덮어씀)
+        lock = self._loading.get(session_id)
+        if lock is None:
+            lock = self._loading[session_id] = asyncio.Lock()
+        try:
+            async with lock:
+                entry = self._sessions.get(session_id)
+                if entry is not None:
+                    self._sessions.move_to_end(session_id)
+                    self.stats["hits"] += 1
+                    return entry
+                return await self._load(session_id)
+        finally:
+            if not lock.locked() and self._loading.get(session_id) is lock:
+                del self._loading[session_id]
+    
+    async def _load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """DB에서 세션 정보와 최근 대화(월별 보관 DB 포함)를 복원해 캐시에 등록"""
+        self.stats["misses"] += 1
+        session = await self.async_db.get_session(session_id)
+        if session is None:
+            return None
+        
+        # 아직 큐에 남아 있는 이 세션의 대화가 DB에 반영된 뒤 복원
+        await self.async_db.run(self.conversation_writer.flush, WRITER_FLUSH_TIMEOUT)
+        messages = await self.async_db.get_session_history(
+            session_id, self.history_turns, include_archive=True
+        )
+        
+        entry = {"session": session, "messages": messages, "lock": asyncio.Lock()}
+        self._put(session_id, entry)
+        return entry
+    
+    def build_messages(self, entry: Dict[str, Any], user_message: str) -> List[Dict[str, str]]:
+        """system 프롬프트 + 최근 대화 + 새 user 메시지로 LLM 요청 메시지 구성"""
+        messages = []
+        system_prompt = entry["session"].get("system_prompt")
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.extend(entry["messages"])
+        messages.append({"role": "user", "content": user_message})
+        return messages
+    
+    def append_turn(self, entry: Dict[str, Any], user_message: str, response: str):
+        """완료된 턴을 세션 대화에 추가 (history_turns를 넘으면 오래된 턴 제거)"""
+        messages = entry["messages"]
+        messages.append({"role": "user", "content": user_message})
+        messages.append({"role": "assistant", "content": response})
+        overflow = len(messages) - self.history_turns * 2
+        if overflow > 0:
+            del messages[:overflow]
+    
+    def _put(self, session_id: str, entry: Dict[str, Any]):
+        self._sessions[session_id] = entry
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.stats["evictions"] += 1
+
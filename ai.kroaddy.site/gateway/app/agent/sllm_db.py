@@ -5,26 +5,152 @@ SLLM (Small Language Model) 로컬 DB 모듈
 import os
 import sqlite3
 import json
-from typing import Optional, Dict, Any, List
+import base64
+import time
+import threading
+from urllib.parse import quote
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Iterator
 import logging
-from datetime import datetime
+from datetime import datetime, timezone, timedelta
 from pathlib import Path
+from .compression import TextCodec
+from .usage_stats import COUNTER_FIELDS, new_counters, merge_counters
 
 logger = logging.getLogger(__name__)
 
+# 연결 튜닝 기본값 (환경 변수로 조정 가능)
+DEFAULT_MMAP_SIZE = int(os.getenv("SLLM_DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DEFAULT_CACHE_SIZE_KB = int(os.getenv("SLLM_DB_CACHE_SIZE_KB", str(16 * 1024)))
+DEFAULT_CACHED_STATEMENTS = int(os.getenv("SLLM_DB_CACHED_STATEMENTS", "256"))
+DEFAULT_BUSY_TIMEOUT = float(os.getenv("SLLM_DB_BUSY_TIMEOUT", "5.0"))
+
+# 응답 캐시 한도 기본값 (0이면 해당 한도 비활성화)
+DEFAULT_CACHE_TTL_SECONDS = int(os.getenv("SLLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+DEFAULT_CACHE_MAX_ROWS = int(os.getenv("SLLM_CACHE_MAX_ROWS", "100000"))
+DEFAULT_CACHE_MAX_BYTES = int(os.getenv("SLLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# 다른 프로세스의 모델 등록을 확인하는 주기 (초, 0이면 조회마다 확인)
+DEFAULT_MODEL_REGISTRY_CHECK_INTERVAL = float(os.getenv("SLLM_MODEL_REGISTRY_CHECK_INTERVAL", "2.0"))
+
+# meta 테이블의 모델 레지스트리 버전 키
+MODELS_VERSION_KEY = "models_version"
+
+# 캐시 적중 기록을 DB에 반영하기 전 메모리에 모아둘 최대 항목 수
+CACHE_HIT_BUFFER_SIZE = 1000
+
+# 대화 기록 내보내기 시 한 번에 읽어오는 행 수
+EXPORT_BATCH_SIZE = int(os.getenv("SLLM_EXPORT_BATCH_SIZE", "1000"))
+
+# 대화 기록 보관: 이 일수보다 오래된 대화를 월별 보관 DB로 이동 (0이면 보관하지 않음)
+DEFAULT_ARCHIVE_AFTER_DAYS = int(os.getenv("SLLM_ARCHIVE_AFTER_DAYS", "0"))
+# 월별 보관 DB 디렉토리 (비우면 DB 파일 옆 archive/)
+DEFAULT_ARCHIVE_DIR = os.getenv("SLLM_ARCHIVE_DIR", "")
+# 보관 시 한 트랜잭션에서 옮기는 최대 행 수 (쓰기 잠금을 짧게 유지)
+ARCHIVE_BATCH_SIZE = 5000
+
+# 대화 기록 전문 검색 (FTS5) 토크나이저
+# unicode61은 공백/문장부호 단위 토큰 + 접두사 검색 (예: "맛집"이 "맛집을"과 일치),
+# trigram은 LIKE처럼 단어 중간도 일치하지만 색인이 크고 3글자 미만 검색어는 찾지 못함
+# 이미 만들어진 색인의 토크나이저는 바뀌지 않으므로 변경 시 conversations_fts 테이블을 삭제 후 재시작
+DEFAULT_FTS_TOKENIZER = os.getenv("SLLM_FTS_TOKENIZER", "unicode61 remove_diacritics 2")
+
+# 검색 결과 스니펫 (일치 구간 표시, 최대 토큰 수)
+SEARCH_SNIPPET_START = "<mark>"
+SEARCH_SNIPPET_END = "</mark>"
+SEARCH_SNIPPET_TOKENS = 16
+
+# 대화 기록 조회 시 선택 가능한 컬럼
+CONVERSATION_COLUMNS = (
+    "id",
+    "session_id",
+    "user_message",
+    "model_response",
+    "model_name",
+    "metadata",
+    "created_at"
+)
+
 class SLLMDB:
     """SLLM 로컬 데이터베이스 관리"""
     
-    def __init__(self, db_path: str = "./agent/sllm.db"):
+    def __init__(
+        self,
+        db_path: str = "./agent/sllm.db",
+        mmap_size: int = DEFAULT_MMAP_SIZE,
+        cache_size_kb: int = DEFAULT_CACHE_SIZE_KB,
+        cached_statements: int = DEFAULT_CACHED_STATEMENTS,
+        busy_timeout: float = DEFAULT_BUSY_TIMEOUT,
+        cache_ttl_seconds: int = DEFAULT_CACHE_TTL_SECONDS,
+        cache_max_rows: int = DEFAULT_CACHE_MAX_ROWS,
+        cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+        codec: Optional[TextCodec] = None,
+        model_registry_check_interval: float = DEFAULT_MODEL_REGISTRY_CHECK_INTERVAL,
+        fts_tokenizer: str = DEFAULT_FTS_TOKENIZER,
+        archive_after_days: int = DEFAULT_ARCHIVE_AFTER_DAYS,
+        archive_dir: str = DEFAULT_ARCHIVE_DIR
+    ):
         """
         SLLM DB 초기화
         
         Args:
             db_path: SQLite DB 파일 경로
+            mmap_size: 메모리 맵 I/O 크기 (바이트, 0이면 비활성화)
+            cache_size_kb: 연결별 페이지 캐시 크기 (KiB)
+            cached_statements: 연결별 prepared statement 캐시 개수
+            busy_timeout: 잠금 대기 시간 (초)
+            cache_ttl_seconds: 응답 캐시 유효 시간 (초, 0이면 만료 없음)
+            cache_max_rows: 응답 캐시 최대 행 수 (0이면 제한 없음)
+            cache_max_bytes: 응답 캐시 최대 크기 (바이트, 0이면 제한 없음)
+            codec: 응답/대화 텍스트 압축 코덱 (없으면 환경 변수 설정 사용)
+            model_registry_check_interval: 다른 프로세스의 모델 변경을 확인하는 주기 (초)
+            fts_tokenizer: 대화 기록 전문 검색 색인의 FTS5 토크나이저 (색인을 처음 만들 때만 적용)
+            archive_after_days: 이 일수보다 오래된 대화를 월별 보관 DB로 이동 (0이면 보관하지 않음)
+            archive_dir: 월별 보관 DB 디렉토리 (비우면 DB 파일 옆 archive/)
         """
         self.db_path = db_path
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.cached_statements = cached_statements
+        self.busy_timeout = busy_timeout
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.cache_max_rows = cache_max_rows
+        self.cache_max_bytes = cache_max_bytes
+        self.codec = codec or TextCodec.from_env()
+        self.model_registry_check_interval = model_registry_check_interval
+        self.fts_tokenizer = fts_tokenizer
+        self.archive_after_days = archive_after_days
+        self.archive_dir = archive_dir or os.path.join(os.path.dirname(self.db_path) or ".", "archive")
+        # SQLite가 FTS5 없이 빌드된 경우 _init_database에서 False로 변경
+        self.fts_enabled = True
+        
+        # 모델 레지스트리 스냅샷 (버전, 이름별 모델, created_at 역순 목록) - 통째로 교체되므로 읽기에 잠금 불필요
+        self._models: tuple = (-1, {}, [])
+        self._models_checked_at = 0.0
+        self._models_lock = threading.Lock()
+        
+        # 캐시 적중 기록 버퍼 {prompt_hash: (적중 횟수, 마지막 접근 시각)}
+        self._cache_hits: Dict[str, tuple] = {}
+        self._cache_hits_lock = threading.Lock()
+        
+        # 쓰기 트랜잭션 경합 통계 (잠금 대기는 busy_timeout 안에서 일어나므로 트랜잭션 소요 시간에 포함됨)
+        self._tx_stats = {
+            "transactions": 0,
+            "rollbacks": 0,
+            "locked_errors": 0,
+            "transaction_ms_total": 0.0,
+            "transaction_ms_max": 0.0
+        }
+        self._tx_stats_lock = threading.Lock()
+        
+        # 스레드별 연결 (sqlite3 연결은 스레드 간 공유하지 않음)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        
         self._ensure_db_directory()
         self._init_database()
+        self._load_models()
     
     def _ensure_db_directory(self):
         """DB 디렉토리 생성"""
@@ -32,9 +158,94 @@ class SLLMDB:
         if db_dir:
             Path(db_dir).mkdir(parents=True, exist_ok=True)
     
+    def _connect(self) -> sqlite3.Connection:
+        """튜닝된 PRAGMA가 적용된 새 연결 생성"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            cached_statements=self.cached_statements,
+            check_same_thread=False
+        )
+        
+        # 새 DB는 점진적 vacuum 모드로 생성 (기존 DB는 compact_cache의 VACUUM 이후 적용)
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        # WAL 모드: 읽기와 쓰기가 서로를 막지 않음 (DB 파일에 영구 저장됨)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL에서는 NORMAL로도 손상 없이 안전하며, 커밋마다 fsync하지 않음
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        # 전문 검색 색인 트리거와 뷰가 압축된 대화 텍스트를 풀 때 사용 (모든 연결에 등록 필요)
+        conn.create_function("sllm_decompress", 1, self._sql_decompress, deterministic=True)
+        return conn
+    
+    def _sql_decompress(self, value: Any) -> Optional[str]:
+        """SQL 함수 sllm_decompress (해제할 수 없는 행은 색인에서 제외되도록 NULL 반환)"""
+        try:
+            return self.codec.decode(value)
+        except Exception as e:
+            logger.warning(f"대화 텍스트 해제 실패, 검색 색인에서 제외: {e}")
+            return None
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """현재 스레드의 연결 반환 (없으면 생성하여 재사용)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """현재 스레드 연결로 트랜잭션 실행 (성공 시 커밋, 실패 시 롤백)"""
+        conn = self._get_connection()
+        started = time.perf_counter()
+        ok = False
+        locked = False
+        try:
+            yield conn
+            conn.commit()
+            ok = True
+        except Exception as e:
+            locked = isinstance(e, sqlite3.OperationalError) and "locked" in str(e)
+            conn.rollback()
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._tx_stats_lock:
+                stats = self._tx_stats
+                stats["transactions"] += 1
+                stats["rollbacks"] += 0 if ok else 1
+                stats["locked_errors"] += 1 if locked else 0
+                stats["transaction_ms_total"] += elapsed_ms
+                stats["transaction_ms_max"] = max(stats["transaction_ms_max"], elapsed_ms)
+    
+    def transaction_stats(self) -> Dict[str, Any]:
+        """쓰기 트랜잭션 수, 롤백/잠금 오류 수, 소요 시간 (프로세스 시작 이후 누적)"""
+        with self._tx_stats_lock:
+            return dict(self._tx_stats)
+    
+    def close(self):
+        """열려 있는 모든 연결 종료"""
+        with self._connections_lock:
+            connections = self._connections
+            self._connections = []
+        
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"SLLM DB 연결 종료 실패: {e}")
+        
+        # 이후 호출에서는 새 연결을 생성하도록 현재 스레드 연결 초기화
+        self._local = threading.local()
+    
     def _init_database(self):
         """데이터베이스 초기화"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._get_connection()
         cursor = conn.cursor()
         
         # 모델 정보 테이블
@@ -50,6 +261,18 @@ class SLLMDB:
             )
         """)
         
+        # 메타 정보 테이블 (모델 레지스트리 버전 등, 프로세스 간 변경 감지용)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            ) WITHOUT ROWID
+        """)
+        cursor.execute(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES (?, 0)",
+            (MODELS_VERSION_KEY,)
+        )
+        
         # 대화 기록 테이블
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS conversations (
@@ -63,6 +286,51 @@ class SLLMDB:
             )
         """)
         
+        # 채팅 세션 테이블 (대화 내용은 conversations에 session_id로 저장)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS chat_sessions (
+                id TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                system_prompt TEXT,
+                config TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # 사용량 통계 테이블 (provider/모델/일자별 누적, latency_buckets는 고정 구간 히스토그램 JSON)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS usage_stats (
+                day TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                requests INTEGER NOT NULL DEFAULT 0,
+                errors INTEGER NOT NULL DEFAULT 0,
+                cache_hits INTEGER NOT NULL DEFAULT 0,
+                prompt_tokens INTEGER NOT NULL DEFAULT 0,
+                completion_tokens INTEGER NOT NULL DEFAULT 0,
+                cached_tokens INTEGER NOT NULL DEFAULT 0,
+                cache_write_tokens INTEGER NOT NULL DEFAULT 0,
+                unpriced_requests INTEGER NOT NULL DEFAULT 0,
+                cost_usd REAL NOT NULL DEFAULT 0,
+                latency_sum_ms REAL NOT NULL DEFAULT 0,
+                latency_buckets TEXT,
+                PRIMARY KEY (day, provider, model)
+            ) WITHOUT ROWID
+        """)
+        
+        # 대화 기록 인덱스 (id는 rowid라 모든 인덱스의 마지막 키로 포함됨)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_conversations_session_created
+            ON conversations (session_id, created_at)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_conversations_created
+            ON conversations (created_at)
+        """)
+        
+        self._init_search_index(cursor)
+        
         # 모델 캐시 테이블
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS model_cache (
@@ -70,14 +338,105 @@ class SLLMDB:
                 prompt_hash TEXT UNIQUE NOT NULL,
                 response TEXT NOT NULL,
                 model_name TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                hit_count INTEGER NOT NULL DEFAULT 0,
+                last_accessed TIMESTAMP,
+                size_bytes INTEGER NOT NULL DEFAULT 0
             )
         """)
         
+        # 이전 버전 DB의 모델 캐시 테이블에 적중/크기 컬럼 추가
+        existing = {row[1] for row in cursor.execute("PRAGMA table_info(model_cache)")}
+        for column, ddl in (
+            ("hit_count", "INTEGER NOT NULL DEFAULT 0"),
+            ("last_accessed", "TIMESTAMP"),
+            ("size_bytes", "INTEGER NOT NULL DEFAULT 0")
+        ):
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE model_cache ADD COLUMN {column} {ddl}")
+        if "size_bytes" not in existing:
+            cursor.execute("""
+                UPDATE model_cache
+                SET last_accessed = COALESCE(last_accessed, created_at),
+                    size_bytes = length(CAST(response AS BLOB))
+            """)
+        
+        # TTL 만료 및 LRU 제거용 인덱스
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_model_cache_created
+            ON model_cache (created_at)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_model_cache_last_accessed
+            ON model_cache (last_accessed)
+        """)
+        
         conn.commit()
-        conn.close()
         logger.info(f"SLLM DB 초기화 완료: {self.db_path}")
     
+    def _init_search_index(self, cursor: sqlite3.Cursor):
+        """
+        대화 기록 전문 검색 색인 생성
+        
+        conversations의 텍스트는 압축되어 저장되므로, sllm_decompress로 푼 텍스트를 보여주는 뷰를
+        external content로 사용하는 FTS5 테이블을 만들고 트리거로 동기화합니다.
+        색인에는 토큰만 저장되고 원문은 중복 저장되지 않습니다 (스니펫은 뷰에서 원문을 읽어 생성).
+        """
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'conversations_fts'"
+        ).fetchone()
+        
+        cursor.execute("""
+            CREATE VIEW IF NOT EXISTS conversations_fts_source AS
+            SELECT id,
+                   sllm_decompress(user_message) AS user_message,
+                   sllm_decompress(model_response) AS model_response
+            FROM conversations
+        """)
+        try:
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5(
+                    user_message,
+                    model_response,
+                    content = 'conversations_fts_source',
+                    content_rowid = 'id',
+                    tokenize = '{self.fts_tokenizer.replace("'", "''")}',
+                    prefix = '2 3'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            self.fts_enabled = False
+            logger.warning(f"FTS5를 사용할 수 없어 대화 기록 검색을 비활성화합니다: {e}")
+            return
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversations_fts_insert AFTER INSERT ON conversations BEGIN
+                INSERT INTO conversations_fts (rowid, user_message, model_response)
+                VALUES (new.id, sllm_decompress(new.user_message), sllm_decompress(new.model_response));
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversations_fts_delete AFTER DELETE ON conversations BEGIN
+                INSERT INTO conversations_fts (conversations_fts, rowid, user_message, model_response)
+                VALUES ('delete', old.id, sllm_decompress(old.user_message), sllm_decompress(old.model_response));
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS conversations_fts_update
+            AFTER UPDATE OF user_message, model_response ON conversations BEGIN
+                INSERT INTO conversations_fts (conversations_fts, rowid, user_message, model_response)
+                VALUES ('delete', old.id, sllm_decompress(old.user_message), sllm_decompress(old.model_response));
+                INSERT INTO conversations_fts (rowid, user_message, model_response)
+                VALUES (new.id, sllm_decompress(new.user_message), sllm_decompress(new.model_response));
+            END
+        """)
+        
+        if not exists:
+            # 색인 도입 이전에 저장된 대화 기록 색인 (최초 1회)
+            started = time.perf_counter()
+            cursor.execute("INSERT INTO conversations_fts (conversations_fts) VALUES ('rebuild')")
+            logger.info(f"대화 기록 검색 색인 생성: {(time.perf_counter() - started) * 1000:.0f}ms")
+    
     def register_model(
         self,
         name: str,
@@ -97,74 +456,170 @@ class SLLMDB:
         Returns:
             모델 ID
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute("""
-                INSERT OR REPLACE INTO models (name, model_type, model_path, config, updated_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                name,
-                model_type,
-                model_path,
-                json.dumps(config) if config else None,
-                datetime.now().isoformat()
-            ))
+            with self._transaction() as conn:
+                cursor = conn.execute("""
+                    INSERT OR REPLACE INTO models (name, model_type, model_path, config, updated_at)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (
+                    name,
+                    model_type,
+                    model_path,
+                    json.dumps(config) if config else None,
+                    datetime.now().isoformat()
+                ))
+                model_id = cursor.lastrowid
+                # 같은 트랜잭션에서 버전을 올려 다른 프로세스도 변경을 감지하도록 함
+                conn.execute(
+                    "UPDATE meta SET value = value + 1 WHERE key = ?",
+                    (MODELS_VERSION_KEY,)
+                )
             
-            model_id = cursor.lastrowid
-            conn.commit()
+            self._load_models()
             logger.info(f"모델 등록 완료: {name} (ID: {model_id})")
             return model_id
         except Exception as e:
-            conn.rollback()
             logger.error(f"모델 등록 실패: {e}")
             raise
-        finally:
-            conn.close()
     
     def get_model(self, name: str) -> Optional[Dict[str, Any]]:
-        """모델 정보 조회"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """모델 정보 조회 (메모리 스냅샷에서 조회)"""
+        self._refresh_models_if_stale()
+        model = self._models[1].get(name)
+        return dict(model) if model else None
+    
+    def list_models(self) -> List[Dict[str, Any]]:
+        """등록된 모든 모델 조회 (created_at 역순, 메모리 스냅샷에서 조회)"""
+        self._refresh_models_if_stale()
+        return [dict(model) for model in self._models[2]]
+    
+    def is_model_registry_fresh(self) -> bool:
+        """버전 확인 없이 스냅샷을 바로 사용할 수 있는지 여부 (True면 get_model이 DB를 읽지 않음)"""
+        return time.monotonic() - self._models_checked_at < self.model_registry_check_interval
+    
+    def _refresh_models_if_stale(self):
+        """확인 주기가 지났으면 DB의 레지스트리 버전을 확인하고, 바뀌었으면 다시 로드"""
+        if self.is_model_registry_fresh():
+            return
+        self._models_checked_at = time.monotonic()
+        if self._read_models_version() != self._models[0]:
+            self._load_models()
+    
+    def _read_models_version(self) -> int:
+        conn = self._get_connection()
+        row = conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (MODELS_VERSION_KEY,)
+        ).fetchone()
+        return row[0] if row else 0
+    
+    def _load_models(self):
+        """모델 테이블 전체를 읽어 스냅샷 교체"""
+        with self._models_lock:
+            # 버전을 먼저 읽으므로, 사이에 등록이 끼어들어도 다음 확인에서 다시 로드됨
+            version = self._read_models_version()
+            conn = self._get_connection()
+            rows = conn.execute("SELECT * FROM models ORDER BY created_at DESC").fetchall()
+            ordered = [self._model_record(row) for row in rows]
+            self._models = (version, {model["name"]: model for model in ordered}, ordered)
+            self._models_checked_at = time.monotonic()
+        logger.debug(f"모델 레지스트리 로드: {len(ordered)}개 (버전 {version})")
+    
+    @staticmethod
+    def _model_record(row: tuple) -> Dict[str, Any]:
+        return {
+            "id": row[0],
+            "name": row[1],
+            "model_type": row[2],
+            "model_path": row[3],
+            "config": json.loads(row[4]) if row[4] else None,
+            "created_at": row[5],
+            "updated_at": row[6]
+        }
+    
+    def create_session(
+        self,
+        session_id: str,
+        model: str,
+        provider: str,
+        system_prompt: Optional[str] = None,
+        config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        채팅 세션 생성
         
-        cursor.execute("SELECT * FROM models WHERE name = ?", (name,))
-        row = cursor.fetchone()
-        conn.close()
+        Args:
+            session_id: 세션 ID
+            model: 세션에서 사용할 모델
+            provider: 세션에서 사용할 provider
+            system_prompt: 매 턴 맨 앞에 붙는 system 메시지 (선택사항)
+            config: temperature, max_tokens 등 세션 기본 설정 (선택사항)
+        
+        Returns:
+            세션 정보
+        """
+        with self._transaction() as conn:
+            conn.execute("""
+                INSERT INTO chat_sessions (id, model, provider, system_prompt, config)
+                VALUES (?, ?, ?, ?, ?)
+            """, (
+                session_id,
+                model,
+                provider,
+                system_prompt,
+                json.dumps(config) if config else None
+            ))
+        
+        logger.info(f"채팅 세션 생성: {session_id} ({provider}/{model})")
+        return self.get_session(session_id)
+    
+    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """채팅 세션 정보 조회"""
+        conn = self._get_connection()
+        row = conn.execute("""
+            SELECT id, model, provider, system_prompt, config, created_at
+            FROM chat_sessions WHERE id = ?
+        """, (session_id,)).fetchone()
         
         if row:
             return {
-                "id": row[0],
-                "name": row[1],
-                "model_type": row[2],
-                "model_path": row[3],
-                "config": json.loads(row[4]) if row[4] else None,
-                "created_at": row[5],
-                "updated_at": row[6]
+                "session_id": row[0],
+                "model": row[1],
+                "provider": row[2],
+                "system_prompt": row[3],
+                "config": json.loads(row[4]) if row[4] else {},
+                "created_at": row[5]
             }
         return None
     
-    def list_models(self) -> List[Dict[str, Any]]:
-        """등록된 모든 모델 조회"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def get_session_history(
+        self,
+        session_id: str,
+        max_turns: int,
+        include_archive: bool = True
+    ) -> List[Dict[str, str]]:
+        """
+        세션의 최근 대화를 메시지 리스트로 복원 (오래된 순)
         
-        cursor.execute("SELECT * FROM models ORDER BY created_at DESC")
-        rows = cursor.fetchall()
-        conn.close()
+        Args:
+            session_id: 세션 ID
+            max_turns: 불러올 최대 턴 수 (턴 하나 = user 메시지 + assistant 응답)
+            include_archive: 월별 보관 DB로 옮겨진 대화도 포함 (최근 대화가 모두 보관된 세션도 복원)
         
-        return [
-            {
-                "id": row[0],
-                "name": row[1],
-                "model_type": row[2],
-                "model_path": row[3],
-                "config": json.loads(row[4]) if row[4] else None,
-                "created_at": row[5],
-                "updated_at": row[6]
-            }
-            for row in rows
-        ]
+        Returns:
+            [{"role": "user", ...}, {"role": "assistant", ...}, ...]
+        """
+        turns = self.get_conversations(
+            session_id=session_id,
+            limit=max_turns,
+            columns=["user_message", "model_response"],
+            include_archive=include_archive
+        )
+        
+        messages = []
+        for turn in reversed(turns):
+            messages.append({"role": "user", "content": turn["user_message"]})
+            messages.append({"role": "assistant", "content": turn["model_response"]})
+        return messages
     
     def save_conversation(
         self,
@@ -175,67 +630,736 @@ class SLLMDB:
         metadata: Optional[Dict[str, Any]] = None
     ):
         """대화 기록 저장"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute("""
-                INSERT INTO conversations (session_id, user_message, model_response, model_name, metadata)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                session_id,
-                user_message,
-                model_response,
-                model_name,
-                json.dumps(metadata) if metadata else None
-            ))
-            conn.commit()
+            with self._transaction() as conn:
+                conn.execute("""
+                    INSERT INTO conversations (session_id, user_message, model_response, model_name, metadata)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (
+                    session_id,
+                    self.codec.encode(user_message),
+                    self.codec.encode(model_response),
+                    model_name,
+                    json.dumps(metadata) if metadata else None
+                ))
             logger.debug(f"대화 기록 저장: session_id={session_id}")
         except Exception as e:
-            conn.rollback()
             logger.error(f"대화 기록 저장 실패: {e}")
             raise
+    
+    def save_conversations(self, rows: List[Dict[str, Any]]) -> int:
+        """
+        대화 기록 여러 건을 한 트랜잭션으로 저장
+        
+        Args:
+            rows: save_conversation 인자와 같은 키를 가진 딕셔너리 리스트
+                (created_at이 있으면 그 값을, 없으면 현재 시각을 사용)
+        
+        Returns:
+            저장된 행 수
+        """
+        if not rows:
+            return 0
+        
+        params = [
+            (
+                row["session_id"],
+                self.codec.encode(row["user_message"]),
+                self.codec.encode(row["model_response"]),
+                row.get("model_name"),
+                json.dumps(row["metadata"]) if row.get("metadata") else None,
+                row.get("created_at")
+            )
+            for row in rows
+        ]
+        
+        try:
+            with self._transaction() as conn:
+                conn.executemany("""
+                    INSERT INTO conversations (session_id, user_message, model_response, model_name, metadata, created_at)
+                    VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+                """, params)
+            logger.debug(f"대화 기록 배치 저장: {len(params)}건")
+            return len(params)
+        except Exception as e:
+            logger.error(f"대화 기록 배치 저장 실패: {e}")
+            raise
+    
+    def get_conversations(
+        self,
+        session_id: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        include_archive: bool = False
+    ) -> List[Dict[str, Any]]:
+        """대화 기록 조회 (최신순)"""
+        return self.get_conversations_page(
+            session_id=session_id,
+            limit=limit,
+            cursor=cursor,
+            columns=columns,
+            include_archive=include_archive
+        )["conversations"]
+    
+    def get_conversations_page(
+        self,
+        session_id: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        include_archive: bool = False
+    ) -> Dict[str, Any]:
+        """
+        대화 기록 페이지 조회 (최신순, (created_at, id) 기준 keyset 페이지네이션)
+        
+        Args:
+            session_id: 세션 ID (없으면 전체)
+            limit: 페이지 크기
+            cursor: 이전 페이지의 next_cursor (없으면 첫 페이지)
+            columns: 반환할 컬럼 목록 (없으면 전체)
+            include_archive: 월별 보관 DB의 대화도 함께 조회 (커서는 보관 DB 경계를 넘어 이어짐)
+        
+        Returns:
+            {"conversations": [...], "next_cursor": 다음 페이지 커서 또는 None}
+        """
+        selected = self._resolve_conversation_columns(columns)
+        # 커서 계산을 위해 id와 created_at은 항상 조회
+        query_columns = list(dict.fromkeys(selected + ["id", "created_at"]))
+        
+        where = []
+        params: List[Any] = []
+        cursor_created_at = None
+        if session_id:
+            where.append("session_id = ?")
+            params.append(session_id)
+        if cursor:
+            cursor_created_at, cursor_id = self._decode_cursor(cursor)
+            where.append("(created_at, id) < (?, ?)")
+            params.extend([cursor_created_at, cursor_id])
+        
+        sql = f"SELECT {', '.join(query_columns)} FROM conversations"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        
+        conn = self._get_connection()
+        records = [dict(zip(query_columns, row)) for row in conn.execute(sql, params)]
+        if include_archive:
+            records = self._merge_archived_conversations(
+                records, sql, params, query_columns, limit, cursor_created_at
+            )
+        
+        conversations = [self._conversation_record(record, selected) for record in records]
+        
+        next_cursor = None
+        if records and len(records) == limit:
+            last = records[-1]
+            next_cursor = self._encode_cursor(last["created_at"], last["id"])
+        
+        return {
+            "conversations": conversations,
+            "next_cursor": next_cursor
+        }
+    
+    def _merge_archived_conversations(
+        self,
+        records: List[Dict[str, Any]],
+        sql: str,
+        params: List[Any],
+        columns: List[str],
+        limit: int,
+        cursor_created_at: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """최신 보관 월부터 같은 조건으로 조회하여 hot DB 결과와 병합 (페이지가 채워지면 중단)"""
+        for month in self.list_archive_months():
+            month_start, month_end = self._month_range(month)
+            if cursor_created_at and month_start > cursor_created_at:
+                continue
+            # 이 달의 모든 행이 현재 페이지의 마지막 행보다 오래되었으면 이후 달도 마찬가지
+            if len(records) >= limit and month_end <= records[limit - 1]["created_at"]:
+                break
+            
+            conn = self._open_archive(month, read_only=True)
+            try:
+                archived = [dict(zip(columns, row)) for row in conn.execute(sql, params)]
+            except sqlite3.Error as e:
+                logger.warning(f"보관 DB 조회 실패 ({month}): {e}")
+                continue
+            finally:
+                conn.close()
+            
+            # 보관 도중 중단되어 hot DB와 보관 DB에 모두 남은 행은 한 번만 반환
+            seen = {record["id"] for record in records}
+            records.extend(record for record in archived if record["id"] not in seen)
+            records.sort(key=lambda record: (record["created_at"], record["id"]), reverse=True)
+            del records[limit:]
+        return records
+    
+    def archive_conversations(
+        self,
+        older_than_days: Optional[int] = None,
+        batch_size: int = ARCHIVE_BATCH_SIZE
+    ) -> Dict[str, Any]:
+        """
+        오래된 대화 기록을 월별 보관 DB(archive_dir/conversations-YYYY-MM.db)로 이동
+        
+        배치마다 보관 DB에 먼저 커밋한 뒤 hot DB에서 삭제하므로, 중간에 중단되어도 기록이 유실되지 않습니다
+        (다시 실행하면 남은 행을 이어서 옮기고, 이미 옮긴 행은 건너뜀). 대화 텍스트는 압축된 그대로 복사됩니다.
+        
+        Args:
+            older_than_days: 이 일수보다 오래된 대화를 이동 (없으면 archive_after_days 설정)
+            batch_size: 한 트랜잭션에서 옮기는 최대 행 수
+        
+        Returns:
+            {"archived": 이동한 행 수, "months": {월: 행 수}, "vacuum": 빈 페이지 회수 방식}
+        """
+        days = self.archive_after_days if older_than_days is None else older_than_days
+        stats: Dict[str, Any] = {"archived": 0, "months": {}, "vacuum": None}
+        if days <= 0:
+            return stats
+        
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        conn = self._get_connection()
+        months = [row[0] for row in conn.execute(
+            "SELECT DISTINCT substr(created_at, 1, 7) FROM conversations WHERE created_at < ?",
+            (cutoff,)
+        )]
+        
+        columns = ", ".join(CONVERSATION_COLUMNS)
+        placeholders = ", ".join("?" for _ in CONVERSATION_COLUMNS)
+        for month in months:
+            month_start, month_end = self._month_range(month)
+            upper = min(month_end, cutoff)
+            archive = self._open_archive(month)
+            moved = 0
+            try:
+                while True:
+                    rows = conn.execute(f"""
+                        SELECT {columns} FROM conversations
+                        WHERE created_at >= ? AND created_at < ?
+                        ORDER BY created_at, id
+                        LIMIT ?
+                    """, (month_start, upper, max(1, batch_size))).fetchall()
+                    if not rows:
+                        break
+                    
+                    with archive:
+                        archive.executemany(
+                            f"INSERT OR IGNORE INTO conversations ({columns}) VALUES ({placeholders})",
+                            rows
+                        )
+                    with self._transaction() as tx:
+                        tx.executemany("DELETE FROM conversations WHERE id = ?", [(row[0],) for row in rows])
+                    moved += len(rows)
+                
+                # 다 찬 달의 보관 DB는 더 이상 쓰지 않으므로 압축
+                if moved and month_end <= cutoff:
+                    archive.execute("VACUUM")
+            finally:
+                archive.close()
+            
+            if moved:
+                stats["months"][month] = moved
+                stats["archived"] += moved
+        
+        if stats["archived"]:
+            stats["vacuum"] = self._reclaim_free_pages(vacuum_pages=10000, vacuum_threshold=0.25)
+            logger.info(f"대화 기록 보관 완료: {stats}")
+        return stats
+    
+    def list_archive_months(self) -> List[str]:
+        """보관 DB가 있는 월 목록 (최신순, "YYYY-MM")"""
+        if not os.path.isdir(self.archive_dir):
+            return []
+        months = [
+            name[len("conversations-"):-len(".db")]
+            for name in os.listdir(self.archive_dir)
+            if name.startswith("conversations-") and name.endswith(".db")
+        ]
+        return sorted(months, reverse=True)
+    
+    def _open_archive(self, month: str, read_only: bool = False) -> sqlite3.Connection:
+        """월별 보관 DB 연결 (쓰기용이면 없을 때 생성)"""
+        path = os.path.join(self.archive_dir, f"conversations-{month}.db")
+        if read_only:
+            # 보관 DB는 읽기 전용으로 열어 조회 중 실수로 변경되지 않도록 함
+            return sqlite3.connect(
+                f"file:{quote(os.path.abspath(path))}?mode=ro",
+                uri=True,
+                timeout=self.busy_timeout,
+                check_same_thread=False
+            )
+        
+        Path(self.archive_dir).mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, timeout=self.busy_timeout, check_same_thread=False)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS conversations (
+                id INTEGER PRIMARY KEY,
+                session_id TEXT NOT NULL,
+                user_message TEXT NOT NULL,
+                model_response TEXT NOT NULL,
+                model_name TEXT,
+                metadata TEXT,
+                created_at TIMESTAMP
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_conversations_session_created
+            ON conversations (session_id, created_at)
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_conversations_created
+            ON conversations (created_at)
+        """)
+        conn.commit()
+        return conn
+    
+    @staticmethod
+    def _month_range(month: str) -> tuple:
+        """"YYYY-MM"의 [시작, 다음 달 시작) created_at 범위"""
+        year, month_number = int(month[:4]), int(month[5:7])
+        next_year, next_month = (year + 1, 1) if month_number == 12 else (year, month_number + 1)
+        return f"{year:04d}-{month_number:02d}-01 00:00:00", f"{next_year:04d}-{next_month:02d}-01 00:00:00"
+    
+    def iter_conversation_batches(
+        self,
+        session_id: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+        include_archive: bool = False
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        대화 기록 내보내기 (오래된 순, 최대 batch_size개씩 나누어 반환)
+        
+        스레드별 연결과 별도의 전용 연결에서 서버 측 커서로 읽으므로, 전체 결과를 메모리에 올리지 않고
+        반복할 때마다 다음 배치만 가져옵니다. 반복이 끝나거나 close()되면 연결을 닫습니다.
+        인자 검증은 호출 시점에 수행되어 잘못된 값이면 즉시 ValueError가 발생합니다.
+        
+        Args:
+            session_id: 세션 ID (없으면 전체)
+            since: 이 시각 이후(포함) 기록만 (ISO 8601 또는 "YYYY-MM-DD HH:MM:SS", 시간대가 없으면 UTC)
+            until: 이 시각 이전(미포함) 기록만
+            columns: 반환할 컬럼 목록 (없으면 전체)
+            batch_size: 한 번에 읽어올 행 수
+            include_archive: 기간이 겹치는 월별 보관 DB를 오래된 달부터 먼저 내보낸 뒤 hot DB를 내보냄
+        
+        Returns:
+            대화 기록 배치 이터레이터
+        """
+        selected = self._resolve_conversation_columns(columns)
+        # 보관 DB와 hot DB에 모두 남은 행을 가려내기 위해 id는 항상 조회
+        query_columns = list(dict.fromkeys(selected + ["id"])) if include_archive else selected
+        
+        where = []
+        params: List[Any] = []
+        since_at = self._normalize_timestamp(since) if since else None
+        until_at = self._normalize_timestamp(until) if until else None
+        if session_id:
+            where.append("session_id = ?")
+            params.append(session_id)
+        if since_at:
+            where.append("created_at >= ?")
+            params.append(since_at)
+        if until_at:
+            where.append("created_at < ?")
+            params.append(until_at)
+        
+        sql = f"SELECT {', '.join(query_columns)} FROM conversations"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at, id"
+        
+        months = []
+        if include_archive:
+            for month in sorted(self.list_archive_months()):
+                month_start, month_end = self._month_range(month)
+                if (since_at and month_end <= since_at) or (until_at and month_start >= until_at):
+                    continue
+                months.append(month)
+        
+        return self._conversation_batches(sql, params, query_columns, selected, max(1, batch_size), months)
+    
+    def _conversation_batches(
+        self,
+        sql: str,
+        params: List[Any],
+        query_columns: List[str],
+        columns: List[str],
+        batch_size: int,
+        archive_months: List[str]
+    ) -> Iterator[List[Dict[str, Any]]]:
+        # 이터레이터는 여러 스레드에서 번갈아 진행될 수 있으므로 스레드별 연결 대신 전용 연결 사용
+        conn = self._connect()
+        # 보관 도중 중단되어 hot DB에도 남아 있는 행의 id (hot DB를 내보낼 때 건너뜀)
+        duplicates = set()
+        try:
+            for month in archive_months:
+                try:
+                    archive = self._open_archive(month, read_only=True)
+                except sqlite3.Error as e:
+                    logger.warning(f"보관 DB 열기 실패 ({month}): {e}")
+                    continue
+                try:
+                    cursor = archive.execute(sql, params)
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        records = [dict(zip(query_columns, row)) for row in rows]
+                        ids = [record["id"] for record in records]
+                        placeholders = ", ".join("?" for _ in ids)
+                        duplicates.update(row[0] for row in conn.execute(
+                            f"SELECT id FROM conversations WHERE id IN ({placeholders})", ids
+                        ))
+                        yield [self._conversation_record(record, columns) for record in records]
+                finally:
+                    archive.close()
+            
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                records = [dict(zip(query_columns, row)) for row in rows]
+                if duplicates:
+                    records = [record for record in records if record["id"] not in duplicates]
+                if records:
+                    yield [self._conversation_record(record, columns) for record in records]
         finally:
             conn.close()
     
-    def get_conversations(
+    def search_conversations(
         self,
+        query: str,
         session_id: Optional[str] = None,
-        limit: int = 100
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+        include_archive: bool = False
     ) -> List[Dict[str, Any]]:
-        """대화 기록 조회"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """
+        대화 기록 전문 검색 (BM25 관련도 순)
         
+        Args:
+            query: 검색어 (공백으로 구분된 단어가 모두 포함된 대화, 단어는 접두사로 일치)
+            session_id: 세션 ID (없으면 전체)
+            since: 이 시각 이후(포함) 기록만 (ISO 8601, 시간대가 없으면 UTC)
+            until: 이 시각 이전(미포함) 기록만
+            limit: 최대 결과 수
+            offset: 건너뛸 결과 수
+            include_archive: hot DB 결과 뒤에 월별 보관 DB에서 찾은 대화를 최신순으로 이어 붙임
+                (보관 DB에는 색인이 없어 기간이 겹치는 달을 순차 검사하며, 단어는 부분 문자열로 일치)
+        
+        Returns:
+            [{"id", "session_id", "model_name", "created_at", "score", "snippet"}, ...]
+            score는 bm25 값으로 작을수록(더 음수일수록) 관련도가 높음 (보관 DB 결과는 None)
+        """
+        if not self.fts_enabled:
+            raise RuntimeError("이 SQLite 빌드는 FTS5를 지원하지 않아 대화 기록 검색을 사용할 수 없습니다.")
+        
+        match = self._fts_query(query)
+        since_at = self._normalize_timestamp(since) if since else None
+        until_at = self._normalize_timestamp(until) if until else None
+        where = ["conversations_fts MATCH ?"]
+        params: List[Any] = [match]
         if session_id:
-            cursor.execute("""
-                SELECT * FROM conversations
-                WHERE session_id = ?
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (session_id, limit))
-        else:
-            cursor.execute("""
-                SELECT * FROM conversations
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (limit,))
+            where.append("c.session_id = ?")
+            params.append(session_id)
+        if since_at:
+            where.append("c.created_at >= ?")
+            params.append(since_at)
+        if until_at:
+            where.append("c.created_at < ?")
+            params.append(until_at)
+        # 보관 DB 결과가 hot DB 결과 뒤에 이어지므로, 이때는 offset을 합친 결과에서 적용
+        params.extend([limit + offset, 0] if include_archive else [limit, offset])
         
-        rows = cursor.fetchall()
-        conn.close()
+        conn = self._get_connection()
+        # 정렬 대상 행마다 스니펫을 만들지 않도록 순위만 먼저 구한 뒤, 결과 행의 스니펫만 생성
+        ranked = conn.execute(f"""
+            SELECT c.id, c.session_id, c.model_name, c.created_at, conversations_fts.rank
+            FROM conversations_fts
+            JOIN conversations AS c ON c.id = conversations_fts.rowid
+            WHERE {" AND ".join(where)}
+            ORDER BY conversations_fts.rank
+            LIMIT ? OFFSET ?
+        """, params).fetchall()
         
-        return [
+        snippets = {}
+        if ranked:
+            placeholders = ", ".join("?" for _ in ranked)
+            snippets = dict(conn.execute(f"""
+                SELECT rowid, snippet(conversations_fts, -1, ?, ?, '…', ?)
+                FROM conversations_fts
+                WHERE conversations_fts MATCH ? AND rowid IN ({placeholders})
+            """, [
+                SEARCH_SNIPPET_START,
+                SEARCH_SNIPPET_END,
+                SEARCH_SNIPPET_TOKENS,
+                match,
+                *(row[0] for row in ranked)
+            ]).fetchall())
+        
+        results = [
             {
-                "id": row[0],
-                "session_id": row[1],
-                "user_message": row[2],
-                "model_response": row[3],
-                "model_name": row[4],
-                "metadata": json.loads(row[5]) if row[5] else None,
-                "created_at": row[6]
+                "id": row_id,
+                "session_id": row_session_id,
+                "model_name": model_name,
+                "created_at": created_at,
+                "score": round(score, 4),
+                "snippet": snippets.get(row_id)
             }
-            for row in rows
+            for row_id, row_session_id, model_name, created_at, score in ranked
         ]
+        
+        if include_archive and len(results) < limit + offset:
+            results.extend(self._search_archive(
+                query.split(),
+                session_id,
+                since_at,
+                until_at,
+                limit + offset - len(results),
+                {result["id"] for result in results}
+            ))
+            return results[offset:offset + limit]
+        return results
+    
+    def _search_archive(
+        self,
+        terms: List[str],
+        session_id: Optional[str],
+        since_at: Optional[str],
+        until_at: Optional[str],
+        needed: int,
+        seen_ids: set
+    ) -> List[Dict[str, Any]]:
+        """월별 보관 DB를 최신 달부터 순차 검사해 모든 단어가 포함된 대화를 최신순으로 최대 needed개 반환"""
+        terms = [term.lower() for term in terms]
+        where = []
+        params: List[Any] = []
+        if session_id:
+            where.append("session_id = ?")
+            params.append(session_id)
+        if since_at:
+            where.append("created_at >= ?")
+            params.append(since_at)
+        if until_at:
+            where.append("created_at < ?")
+            params.append(until_at)
+        sql = "SELECT id, session_id, model_name, created_at, user_message, model_response FROM conversations"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, id DESC"
+        
+        results: List[Dict[str, Any]] = []
+        for month in self.list_archive_months():
+            if len(results) >= needed:
+                break
+            month_start, month_end = self._month_range(month)
+            if (since_at and month_end <= since_at) or (until_at and month_start >= until_at):
+                continue
+            
+            try:
+                archive = self._open_archive(month, read_only=True)
+            except sqlite3.Error as e:
+                logger.warning(f"보관 DB 열기 실패 ({month}): {e}")
+                continue
+            try:
+                cursor = archive.execute(sql, params)
+                while len(results) < needed:
+                    rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                    if not rows:
+                        break
+                    for row_id, row_session_id, model_name, created_at, user_message, model_response in rows:
+                        if row_id in seen_ids:
+                            continue
+                        try:
+                            texts = [self.codec.decode(user_message), self.codec.decode(model_response)]
+                        except Exception as e:
+                            logger.warning(f"보관 대화 텍스트 해제 실패 ({month}, id={row_id}): {e}")
+                            continue
+                        combined = "\n".join(texts).lower()
+                        if not all(term in combined for term in terms):
+                            continue
+                        results.append({
+                            "id": row_id,
+                            "session_id": row_session_id,
+                            "model_name": model_name,
+                            "created_at": created_at,
+                            "score": None,
+                            "snippet": self._archive_snippet(texts, terms)
+                        })
+                        if len(results) >= needed:
+                            break
+            except sqlite3.Error as e:
+                logger.warning(f"보관 DB 검색 실패 ({month}): {e}")
+            finally:
+                archive.close()
+        return results
+    
+    @staticmethod
+    def _archive_snippet(texts: List[str], terms: List[str]) -> str:
+        """보관 대화의 발췌문 (첫 일치 단어 주변 SEARCH_SNIPPET_TOKENS개 단어, FTS5 snippet과 같은 표시 형식)"""
+        def matches(word: str) -> bool:
+            return any(term in word.lower() for term in terms)
+        
+        words = next((text.split() for text in texts if any(matches(word) for word in text.split())), [])
+        hit = next((i for i, word in enumerate(words) if matches(word)), 0)
+        start = max(0, hit - SEARCH_SNIPPET_TOKENS // 4)
+        end = start + SEARCH_SNIPPET_TOKENS
+        window = [
+            f"{SEARCH_SNIPPET_START}{word}{SEARCH_SNIPPET_END}" if matches(word) else word
+            for word in words[start:end]
+        ]
+        return ("…" if start > 0 else "") + " ".join(window) + ("…" if end < len(words) else "")
+    
+    def _fts_query(self, query: str) -> str:
+        """검색어를 FTS5 MATCH 식으로 변환 (각 단어를 따옴표로 감싸 FTS5 연산자로 해석되지 않게 함)"""
+        terms = query.split()
+        if not terms:
+            raise ValueError("검색어가 비어 있습니다.")
+        # trigram 토크나이저는 단어 중간도 일치하므로 접두사 검색이 필요 없음
+        prefix = "" if self.fts_tokenizer.split()[0] == "trigram" else "*"
+        return " ".join('"' + term.replace('"', '""') + '"' + prefix for term in terms)
+    
+    @staticmethod
+    def _normalize_timestamp(value: str) -> str:
+        """ISO 8601 시각을 created_at 저장 형식(UTC "YYYY-MM-DD HH:MM:SS")으로 변환"""
+        try:
+            parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+        except ValueError as e:
+            raise ValueError(f"잘못된 시각 형식: {value}") from e
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc)
+        return parsed.strftime("%Y-%m-%d %H:%M:%S")
+    
+    @staticmethod
+    def _resolve_conversation_columns(columns: Optional[List[str]]) -> List[str]:
+        """요청된 컬럼 목록 검증"""
+        if not columns:
+            return list(CONVERSATION_COLUMNS)
+        
+        invalid = [column for column in columns if column not in CONVERSATION_COLUMNS]
+        if invalid:
+            raise ValueError(f"지원하지 않는 컬럼: {', '.join(invalid)}")
+        return list(dict.fromkeys(columns))
+    
+    def _conversation_record(self, record: Dict[str, Any], columns: List[str]) -> Dict[str, Any]:
+        """조회 결과 행을 응답 딕셔너리로 변환 (압축된 텍스트는 해제)"""
+        result = {column: record[column] for column in columns}
+        for column in ("user_message", "model_response"):
+            if column in result:
+                result[column] = self.codec.decode(result[column])
+        if result.get("metadata"):
+            result["metadata"] = json.loads(result["metadata"])
+        return result
+    
+    @staticmethod
+    def _encode_cursor(created_at: str, row_id: int) -> str:
+        """(created_at, id)를 불투명한 커서 문자열로 인코딩"""
+        raw = f"{created_at}|{row_id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple:
+        """커서 문자열을 (created_at, id)로 디코딩"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            created_at, row_id = base64.urlsafe_b64decode(padded).decode().rsplit("|", 1)
+            return created_at, int(row_id)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError(f"잘못된 커서: {cursor}") from e
+    
+    def merge_usage_stats(self, counters: Dict[tuple, Dict[str, Any]]) -> int:
+        """
+        메모리 사용량 집계를 DB 누적값에 합산 (한 트랜잭션)
+        
+        Args:
+            counters: {(일자, provider, 모델): 카운터}
+        
+        Returns:
+            반영한 행 수
+        """
+        if not counters:
+            return 0
+        
+        with self._transaction() as conn:
+            for (day, provider, model), source in counters.items():
+                row = conn.execute(f"""
+                    SELECT {', '.join(COUNTER_FIELDS)}, latency_buckets
+                    FROM usage_stats WHERE day = ? AND provider = ? AND model = ?
+                """, (day, provider, model)).fetchone()
+                
+                merged = new_counters()
+                if row:
+                    merge_counters(merged, self._usage_counters(row))
+                merge_counters(merged, source)
+                
+                conn.execute(f"""
+                    INSERT OR REPLACE INTO usage_stats
+                    (day, provider, model, {', '.join(COUNTER_FIELDS)}, latency_buckets)
+                    VALUES ({', '.join('?' * (len(COUNTER_FIELDS) + 4))})
+                """, (
+                    day,
+                    provider,
+                    model,
+                    *(merged[field] for field in COUNTER_FIELDS),
+                    json.dumps(merged["latency_buckets"])
+                ))
+        return len(counters)
+    
+    def get_usage_stats(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> Dict[tuple, Dict[str, Any]]:
+        """
+        일자별 사용량 누적값 조회
+        
+        Args:
+            since: 시작 일자 (YYYY-MM-DD, 포함)
+            until: 종료 일자 (YYYY-MM-DD, 포함)
+            provider: provider 필터
+            model: 모델 필터
+        
+        Returns:
+            {(일자, provider, 모델): 카운터}
+        """
+        where = []
+        params: List[Any] = []
+        for column, operator, value in (
+            ("day", ">=", since),
+            ("day", "<=", until),
+            ("provider", "=", provider),
+            ("model", "=", model)
+        ):
+            if value:
+                where.append(f"{column} {operator} ?")
+                params.append(value)
+        
+        sql = f"SELECT day, provider, model, {', '.join(COUNTER_FIELDS)}, latency_buckets FROM usage_stats"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        
+        conn = self._get_connection()
+        return {
+            (row[0], row[1], row[2]): self._usage_counters(row[3:])
+            for row in conn.execute(sql, params)
+        }
+    
+    @staticmethod
+    def _usage_counters(row: tuple) -> Dict[str, Any]:
+        """usage_stats 행 (카운터 컬럼 + latency_buckets)을 카운터 딕셔너리로 변환"""
+        counters = dict(zip(COUNTER_FIELDS, row))
+        counters["latency_buckets"] = json.loads(row[len(COUNTER_FIELDS)]) if row[len(COUNTER_FIELDS)] else []
+        return counters
     
     def cache_response(
         self,
@@ -244,30 +1368,184 @@ class SLLMDB:
         model_name: Optional[str] = None
     ):
         """응답 캐시 저장"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        stored = self.codec.encode(response)
+        size_bytes = len(stored) if isinstance(stored, bytes) else len(stored.encode())
         
         try:
-            cursor.execute("""
-                INSERT OR REPLACE INTO model_cache (prompt_hash, response, model_name)
-                VALUES (?, ?, ?)
-            """, (prompt_hash, response, model_name))
-            conn.commit()
+            with self._transaction() as conn:
+                conn.execute("""
+                    INSERT OR REPLACE INTO model_cache
+                        (prompt_hash, response, model_name, last_accessed, size_bytes)
+                    VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?)
+                """, (prompt_hash, stored, model_name, size_bytes))
         except Exception as e:
-            conn.rollback()
             logger.error(f"캐시 저장 실패: {e}")
             raise
-        finally:
-            conn.close()
     
     def get_cached_response(self, prompt_hash: str) -> Optional[str]:
-        """캐시된 응답 조회"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """캐시된 응답 조회 (만료된 항목은 없는 것으로 취급)"""
+        conn = self._get_connection()
+        if self.cache_ttl_seconds > 0:
+            row = conn.execute("""
+                SELECT response FROM model_cache
+                WHERE prompt_hash = ? AND created_at >= datetime('now', ?)
+            """, (prompt_hash, f"-{int(self.cache_ttl_seconds)} seconds")).fetchone()
+        else:
+            row = conn.execute(
+                "SELECT response FROM model_cache WHERE prompt_hash = ?",
+                (prompt_hash,)
+            ).fetchone()
         
-        cursor.execute("SELECT response FROM model_cache WHERE prompt_hash = ?", (prompt_hash,))
-        row = cursor.fetchone()
-        conn.close()
+        if not row:
+            return None
         
-        return row[0] if row else None
-
+        self._record_cache_hit(prompt_hash)
+        return self.codec.decode(row[0])
+    
+    def get_cached_responses(self, prompt_hashes: List[str]) -> Dict[str, str]:
+        """
+        여러 캐시 응답을 한 번의 쿼리로 조회
+        
+        Args:
+            prompt_hashes: 프롬프트 해시 리스트
+        
+        Returns:
+            {prompt_hash: 응답} (캐시에 없거나 만료된 해시는 제외)
+        """
+        if not prompt_hashes:
+            return {}
+        
+        # json_each로 해시 목록을 한 번에 전달 (바인딩 변수 개수 제한 회피)
+        sql = """
+            SELECT prompt_hash, response FROM model_cache
+            WHERE prompt_hash IN (SELECT value FROM json_each(?))
+        """
+        params: List[Any] = [json.dumps(list(prompt_hashes))]
+        if self.cache_ttl_seconds > 0:
+            sql += " AND created_at >= datetime('now', ?)"
+            params.append(f"-{int(self.cache_ttl_seconds)} seconds")
+        
+        conn = self._get_connection()
+        rows = conn.execute(sql, params).fetchall()
+        
+        for prompt_hash, _ in rows:
+            self._record_cache_hit(prompt_hash)
+        return {prompt_hash: self.codec.decode(response) for prompt_hash, response in rows}
+    
+    def _record_cache_hit(self, prompt_hash: str):
+        """
+        캐시 적중을 메모리에 기록
+        
+        조회마다 UPDATE를 실행하지 않도록 모아두었다가 한 번에 반영
+        """
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        with self._cache_hits_lock:
+            count, _ = self._cache_hits.get(prompt_hash, (0, None))
+            self._cache_hits[prompt_hash] = (count + 1, now)
+            should_flush = len(self._cache_hits) >= CACHE_HIT_BUFFER_SIZE
+        
+        if should_flush:
+            self.flush_cache_hits()
+    
+    def flush_cache_hits(self) -> int:
+        """
+        메모리에 모아둔 캐시 적중 기록을 DB에 반영
+        
+        Returns:
+            갱신된 캐시 항목 수
+        """
+        with self._cache_hits_lock:
+            hits = self._cache_hits
+            self._cache_hits = {}
+        
+        if not hits:
+            return 0
+        
+        try:
+            with self._transaction() as conn:
+                conn.executemany("""
+                    UPDATE model_cache
+                    SET hit_count = hit_count + ?, last_accessed = ?
+                    WHERE prompt_hash = ?
+                """, [(count, accessed, prompt_hash) for prompt_hash, (count, accessed) in hits.items()])
+            return len(hits)
+        except Exception as e:
+            logger.error(f"캐시 적중 기록 반영 실패: {e}")
+            raise
+    
+    def compact_cache(self, vacuum_pages: int = 1000, vacuum_threshold: float = 0.25) -> Dict[str, Any]:
+        """
+        응답 캐시 정리: 만료 항목 삭제, 행 수/크기 한도 초과 시 LRU 순으로 삭제, 빈 페이지 회수
+        
+        Args:
+            vacuum_pages: 점진적 vacuum 한 번에 회수할 최대 페이지 수
+            vacuum_threshold: 점진적 vacuum 모드가 아닐 때 전체 VACUUM을 실행할 빈 페이지 비율
+        
+        Returns:
+            정리 결과 통계
+        """
+        self.flush_cache_hits()
+        stats = {"expired": 0, "evicted_rows": 0, "evicted_bytes": 0, "vacuum": None}
+        
+        with self._transaction() as conn:
+            if self.cache_ttl_seconds > 0:
+                cursor = conn.execute(
+                    "DELETE FROM model_cache WHERE created_at < datetime('now', ?)",
+                    (f"-{int(self.cache_ttl_seconds)} seconds",)
+                )
+                stats["expired"] = cursor.rowcount
+            
+            if self.cache_max_rows > 0:
+                total_rows = conn.execute("SELECT COUNT(*) FROM model_cache").fetchone()[0]
+                excess = total_rows - self.cache_max_rows
+                if excess > 0:
+                    cursor = conn.execute("""
+                        DELETE FROM model_cache WHERE id IN (
+                            SELECT id FROM model_cache ORDER BY last_accessed ASC, hit_count ASC LIMIT ?
+                        )
+                    """, (excess,))
+                    stats["evicted_rows"] += cursor.rowcount
+            
+            if self.cache_max_bytes > 0:
+                total_bytes = conn.execute(
+                    "SELECT COALESCE(SUM(size_bytes), 0) FROM model_cache"
+                ).fetchone()[0]
+                excess = total_bytes - self.cache_max_bytes
+                if excess > 0:
+                    victims = []
+                    freed = 0
+                    for row_id, size in conn.execute(
+                        "SELECT id, size_bytes FROM model_cache ORDER BY last_accessed ASC, hit_count ASC"
+                    ):
+                        victims.append((row_id,))
+                        freed += size
+                        if freed >= excess:
+                            break
+                    conn.executemany("DELETE FROM model_cache WHERE id = ?", victims)
+                    stats["evicted_rows"] += len(victims)
+                    stats["evicted_bytes"] = freed
+        
+        stats["vacuum"] = self._reclaim_free_pages(vacuum_pages, vacuum_threshold)
+        
+        if stats["expired"] or stats["evicted_rows"]:
+            logger.info(f"응답 캐시 정리 완료: {stats}")
+        return stats
+    
+    def _reclaim_free_pages(self, vacuum_pages: int, vacuum_threshold: float) -> Optional[str]:
+        """빈 페이지 회수 (점진적 vacuum 모드면 일부만, 아니면 임계치 초과 시 전체 VACUUM)"""
+        conn = self._get_connection()
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if free_pages == 0:
+            return None
+        
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if auto_vacuum == 2:
+            conn.execute(f"PRAGMA incremental_vacuum({int(vacuum_pages)})").fetchall()
+            return "incremental"
+        
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        if page_count and free_pages / page_count >= vacuum_threshold:
+            # 전체 VACUUM은 auto_vacuum=INCREMENTAL 설정도 함께 적용함
+            conn.execute("VACUUM")
+            return "full"
+        return None
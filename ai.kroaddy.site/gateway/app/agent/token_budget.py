@@ -0,0 +1,222 @@
+"""
+토큰 예산 모듈
+provider/모델별 토큰 수를 로컬에서 추정하고, 예산을 넘는 대화 이력을 오래된 순으로 정리
+"""
+import os
+import math
+import hashlib
+from functools import lru_cache
+from typing import Dict, List, Callable, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 기본 프롬프트 토큰 예산 (0이면 비활성화)
+DEFAULT_PROMPT_TOKEN_BUDGET = int(os.getenv("AGENT_PROMPT_TOKEN_BUDGET", "0"))
+
+TRIM_STRATEGIES = ("drop", "collapse")
+
+# provider별 메시지당 고정 오버헤드 (역할/구분자 토큰) 및 응답 시작 토큰
+MESSAGE_OVERHEAD = {"openai": 4, "anthropic": 3}
+REPLY_OVERHEAD = {"openai": 3, "anthropic": 1}
+
+# 휴리스틱 추정 계수: ASCII는 약 4글자당 1토큰, 한글/한자/가나 등은 글자당 토큰 수
+ASCII_CHARS_PER_TOKEN = 4.0
+NON_ASCII_TOKENS_PER_CHAR = {"openai": 1.0, "anthropic": 1.2}
+
+# "collapse" 전략: 예산 중 삭제된 대화 발췌에 쓸 비율과 메시지당 최대 발췌 길이 (글자)
+COLLAPSE_BUDGET_RATIO = 0.15
+COLLAPSE_SNIPPET_CHARS = 60
+
+# tiktoken이 BPE 파일을 내려받는 주소 (캐시 파일 이름은 이 주소의 SHA-1)
+TIKTOKEN_BLOB_URL = "https://openaipublic.blob.core.windows.net/encodings/{name}.tiktoken"
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+def _tiktoken_cached(encoding_name: str) -> bool:
+    """TIKTOKEN_CACHE_DIR에 인코딩 BPE 파일이 이미 있는지 확인"""
+    cache_dir = os.getenv("TIKTOKEN_CACHE_DIR")
+    if not cache_dir:
+        return False
+    cache_key = hashlib.sha1(TIKTOKEN_BLOB_URL.format(name=encoding_name).encode()).hexdigest()
+    return os.path.isfile(os.path.join(cache_dir, cache_key))
+
+@lru_cache(maxsize=16)
+def _tiktoken_encoder(model: str):
+    """
+    tiktoken 인코더 로드 (로컬 캐시에 BPE 파일이 있을 때만 사용)
+    
+    tiktoken은 캐시에 파일이 없으면 요청 처리 중에 BPE 파일을 내려받으므로,
+    TIKTOKEN_CACHE_DIR에 해당 인코딩 파일이 있을 때만 사용하고 아니면 추정치를 사용합니다.
+    """
+    if tiktoken is None:
+        return None
+    try:
+        from tiktoken.model import encoding_name_for_model
+        encoding_name = encoding_name_for_model(model)
+    except (ImportError, KeyError):
+        encoding_name = "cl100k_base"
+    
+    if not _tiktoken_cached(encoding_name):
+        logger.info(f"tiktoken 캐시에 {encoding_name} 파일이 없어 토큰 수 추정치 사용 ({model})")
+        return None
+    try:
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.warning(f"tiktoken 인코더 로드 실패, 추정치 사용: {e}")
+        return None
+
+def _estimate_tokens(text: str, provider: str) -> int:
+    """문자 종류별 휴리스틱 토큰 수 추정"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    non_ascii_chars = len(text) - ascii_chars
+    per_char = NON_ASCII_TOKENS_PER_CHAR.get(provider, 1.0)
+    return math.ceil(ascii_chars / ASCII_CHARS_PER_TOKEN + non_ascii_chars * per_char)
+
+def get_token_counter(provider: str, model: str) -> Callable[[str], int]:
+    """provider/모델에 맞는 텍스트 토큰 카운터 반환"""
+    if provider == "openai":
+        encoder = _tiktoken_encoder(model)
+        if encoder is not None:
+            return lambda text: len(encoder.encode(text))
+    return lambda text: _estimate_tokens(text, provider)
+
+def count_message_tokens(
+    messages: List[Dict[str, str]],
+    provider: str = "openai",
+    model: str = "gpt-3.5-turbo"
+) -> int:
+    """메시지 리스트 전체의 프롬프트 토큰 수"""
+    counter = get_token_counter(provider, model)
+    overhead = MESSAGE_OVERHEAD.get(provider, 4)
+    total = sum(counter(str(msg.get("content", ""))) + overhead for msg in messages)
+    return total + REPLY_OVERHEAD.get(provider, 3)
+
+def trim_messages(
+    messages: List[Dict[str, str]],
+    budget: int,
+    provider: str = "openai",
+    model: str = "gpt-3.5-turbo",
+    strategy: str = "drop"
+) -> Dict[str, Any]:
+    """
+    프롬프트가 예산을 넘으면 오래된 대화부터 정리
+    
+    system 메시지와 마지막 메시지는 항상 유지하고, 나머지는 최신 순으로 예산 안에서 채웁니다.
+    
+    Args:
+        messages: 원본 메시지 리스트
+        budget: 프롬프트 토큰 예산 (0 이하면 정리하지 않음)
+        provider: 토큰 계산 기준 provider
+        model: 토큰 계산 기준 모델
+        strategy: "drop" - 오래된 메시지 삭제
+                  "collapse" - 예산의 COLLAPSE_BUDGET_RATIO 이상을 삭제한 메시지의 발췌(메시지별 앞부분)로 채워
+                               삭제한 자리에 system 메시지 하나로 남김 (최근 것부터)
+    
+    Returns:
+        {"messages", "prompt_tokens", "original_tokens", "trimmed_tokens", "dropped_messages"}
+    """
+    if strategy not in TRIM_STRATEGIES:
+        raise ValueError(f"지원하지 않는 trim_strategy: {strategy}")
+    
+    counter = get_token_counter(provider, model)
+    overhead = MESSAGE_OVERHEAD.get(provider, 4)
+    costs = [counter(str(msg.get("content", ""))) + overhead for msg in messages]
+    original = sum(costs) + REPLY_OVERHEAD.get(provider, 3)
+    
+    if budget <= 0 or original <= budget or len(messages) <= 1:
+        return _trim_result(list(messages), original, original, 0)
+    
+    last_index = len(messages) - 1
+    keep = {i for i, msg in enumerate(messages) if msg.get("role") == "system"}
+    keep.add(last_index)
+    used = sum(costs[i] for i in keep) + REPLY_OVERHEAD.get(provider, 3)
+    
+    # "collapse"면 삭제된 대화 발췌 자리를 미리 확보
+    collapse_budget = int(budget * COLLAPSE_BUDGET_RATIO) if strategy == "collapse" else 0
+    used += collapse_budget
+    
+    # 최신 메시지부터 예산 안에서 유지
+    for i in range(last_index - 1, -1, -1):
+        if i in keep:
+            continue
+        if used + costs[i] > budget:
+            break
+        keep.add(i)
+        used += costs[i]
+    
+    kept_indices = sorted(keep)
+    
+    # 대화는 user 메시지로 시작해야 하므로 (Anthropic) 앞쪽의 assistant 메시지는 함께 제거
+    conversation = [i for i in kept_indices if messages[i].get("role") != "system"]
+    while len(conversation) > 1 and messages[conversation[0]].get("role") != "user":
+        removed = conversation.pop(0)
+        kept_indices.remove(removed)
+    
+    dropped = len(messages) - len(kept_indices)
+    trimmed = [messages[i] for i in kept_indices]
+    
+    if collapse_budget and dropped:
+        kept = set(kept_indices)
+        dropped_messages = [messages[i] for i in range(len(messages)) if i not in kept]
+        # 확보한 자리 + 최근 메시지를 채우고 남은 예산
+        collapse_note = _collapse_note(dropped_messages, budget - used + collapse_budget - overhead, counter)
+        if collapse_note:
+            # 마지막 system 메시지 뒤, 첫 대화 메시지 앞에 삽입
+            insert_at = next(
+                (pos for pos, msg in enumerate(trimmed) if msg.get("role") != "system"),
+                len(trimmed)
+            )
+            trimmed.insert(insert_at, {"role": "system", "content": collapse_note})
+    
+    prompt_tokens = count_message_tokens(trimmed, provider, model)
+    if prompt_tokens > budget:
+        logger.warning(f"system 메시지와 마지막 메시지만으로도 토큰 예산 초과: {prompt_tokens} > {budget}")
+    
+    logger.info(f"대화 이력 정리: {original} → {prompt_tokens} 토큰 (메시지 {dropped}개 제거)")
+    return _trim_result(trimmed, prompt_tokens, original, dropped)
+
+def _collapse_note(
+    dropped_messages: List[Dict[str, str]],
+    budget: int,
+    counter: Callable[[str], int]
+) -> str:
+    """
+    삭제된 대화의 발췌 (메시지별 앞 COLLAPSE_SNIPPET_CHARS 글자, 예산 안에서 최근 메시지부터 채우고 시간 순으로 배치)
+    """
+    header = f"[이전 대화 {len(dropped_messages)}개 메시지 발췌]"
+    used = counter(header)
+    lines: List[str] = []
+    for msg in reversed(dropped_messages):
+        content = " ".join(str(msg.get("content", "")).split())
+        if not content:
+            continue
+        if len(content) > COLLAPSE_SNIPPET_CHARS:
+            content = content[:COLLAPSE_SNIPPET_CHARS] + "…"
+        line = f"- {'사용자' if msg.get('role') == 'user' else '어시스턴트'}: {content}"
+        cost = counter(line) + 1
+        if used + cost > budget:
+            break
+        lines.append(line)
+        used += cost
+    
+    if not lines:
+        return ""
+    return "\n".join([header] + lines[::-1])
+
+def _trim_result(
+    messages: List[Dict[str, str]],
+    prompt_tokens: int,
+    original_tokens: int,
+    dropped_messages: int
+) -> Dict[str, Any]:
+    return {
+        "messages": messages,
+        "prompt_tokens": prompt_tokens,
+        "original_tokens": original_tokens,
+        "trimmed_tokens": max(0, original_tokens - prompt_tokens),
+        "dropped_messages": dropped_messages
+    }
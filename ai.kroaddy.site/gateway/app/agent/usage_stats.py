@@ -0,0 +1,211 @@
+"""
+사용량 통계 모듈
+provider/모델/일자별 요청 수, 토큰 사용량, 지연 시간 분포, 캐시 적중률, 예상 비용을 메모리에 집계하고
+주기적으로 SLLM DB에 합산 저장
+"""
+import os
+import json
+import bisect
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 메모리 집계를 DB에 반영하는 주기 (초, 0이면 종료 시에만 반영)
+DEFAULT_USAGE_FLUSH_INTERVAL = float(os.getenv("AGENT_USAGE_FLUSH_INTERVAL", "60"))
+
+# 지연 시간 히스토그램 구간 상한 (ms, 10ms부터 1.5배씩 약 110초까지, 마지막 구간은 그 이상)
+# 고정 구간이라 여러 번 나누어 저장한 분포도 구간별 합산만으로 합칠 수 있음
+LATENCY_BUCKETS_MS = [round(10 * 1.5 ** i) for i in range(24)]
+
+# 모델별 가격 (USD / 100만 토큰): [입력, 출력, 캐시 적중 입력, 캐시 기록 입력]
+# 모델 이름 접두사로 찾으며 가장 긴 접두사가 우선, LLM_PRICING 환경 변수(JSON)로 덮어쓰기 가능
+DEFAULT_PRICING = {
+    "gpt-4o-mini": [0.15, 0.60, 0.075, 0.15],
+    "gpt-4o": [2.50, 10.00, 1.25, 2.50],
+    "gpt-4.1-mini": [0.40, 1.60, 0.10, 0.40],
+    "gpt-4.1": [2.00, 8.00, 0.50, 2.00],
+    "gpt-3.5-turbo": [0.50, 1.50, 0.50, 0.50],
+    "claude-3-haiku": [0.25, 1.25, 0.03, 0.30],
+    "claude-3-5-haiku": [0.80, 4.00, 0.08, 1.00],
+    "claude-3-5-sonnet": [3.00, 15.00, 0.30, 3.75],
+    "claude-3-7-sonnet": [3.00, 15.00, 0.30, 3.75]
+}
+
+# 집계 카운터 항목 (DB 컬럼과 동일)
+COUNTER_FIELDS = (
+    "requests",
+    "errors",
+    "cache_hits",
+    "prompt_tokens",
+    "completion_tokens",
+    "cached_tokens",
+    "cache_write_tokens",
+    "unpriced_requests",
+    "cost_usd",
+    "latency_sum_ms"
+)
+
+# (일자, provider, 모델)
+UsageKey = Tuple[str, str, str]
+
+def load_pricing() -> Dict[str, List[float]]:
+    """기본 가격표에 LLM_PRICING 환경 변수(JSON) 덮어쓰기"""
+    pricing = dict(DEFAULT_PRICING)
+    raw = os.getenv("LLM_PRICING")
+    if raw:
+        try:
+            pricing.update(json.loads(raw))
+        except json.JSONDecodeError as e:
+            logger.warning(f"LLM_PRICING 파싱 실패, 기본값 사용: {e}")
+    return pricing
+
+def new_counters() -> Dict[str, Any]:
+    counters: Dict[str, Any] = {field: 0 for field in COUNTER_FIELDS}
+    counters["cost_usd"] = 0.0
+    counters["latency_sum_ms"] = 0.0
+    counters["latency_buckets"] = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    return counters
+
+def merge_counters(target: Dict[str, Any], source: Dict[str, Any]):
+    """source 카운터를 target에 합산"""
+    for field in COUNTER_FIELDS:
+        target[field] += source.get(field) or 0
+    for index, count in enumerate(source.get("latency_buckets") or []):
+        if index < len(target["latency_buckets"]):
+            target["latency_buckets"][index] += count
+
+def latency_percentile(buckets: List[int], percentile: float) -> Optional[float]:
+    """히스토그램에서 백분위 지연 시간 추정 (해당 구간의 상한, ms)"""
+    total = sum(buckets)
+    if not total:
+        return None
+    threshold = total * percentile
+    cumulative = 0
+    for index, count in enumerate(buckets):
+        cumulative += count
+        if cumulative >= threshold:
+            break
+    # 마지막 (상한 초과) 구간은 가장 큰 상한으로 표시
+    return float(LATENCY_BUCKETS_MS[min(index, len(LATENCY_BUCKETS_MS) - 1)])
+
+def summarize_counters(counters: Dict[str, Any]) -> Dict[str, Any]:
+    """카운터를 응답용 요약으로 변환 (평균/백분위 지연 시간, 캐시 적중률 계산)"""
+    requests = counters["requests"]
+    served = requests + counters["cache_hits"]
+    buckets = counters["latency_buckets"]
+    return {
+        "requests": requests,
+        "errors": counters["errors"],
+        "cache_hits": counters["cache_hits"],
+        "cache_hit_ratio": round(counters["cache_hits"] / served, 4) if served else None,
+        "prompt_tokens": counters["prompt_tokens"],
+        "completion_tokens": counters["completion_tokens"],
+        "cached_tokens": counters["cached_tokens"],
+        "cache_write_tokens": counters["cache_write_tokens"],
+        "cost_usd": round(counters["cost_usd"], 6),
+        "unpriced_requests": counters["unpriced_requests"],
+        "latency_avg_ms": round(counters["latency_sum_ms"] / sum(buckets), 1) if sum(buckets) else None,
+        "latency_p50_ms": latency_percentile(buckets, 0.5),
+        "latency_p95_ms": latency_percentile(buckets, 0.95),
+        "latency_p99_ms": latency_percentile(buckets, 0.99)
+    }
+
+
+class UsageRecorder:
+    """provider/모델/일자별 사용량 메모리 집계기 (이벤트 루프 스레드에서만 호출)"""
+    
+    def __init__(self, pricing: Optional[Dict[str, List[float]]] = None):
+        """
+        집계기 초기화
+        
+        Args:
+            pricing: 모델 접두사별 가격표 (없으면 기본값 + LLM_PRICING)
+        """
+        self.pricing = pricing if pricing is not None else load_pricing()
+        # 긴 접두사가 먼저 일치하도록 정렬 (예: gpt-4o-mini가 gpt-4o보다 우선)
+        self._price_prefixes = sorted(self.pricing, key=len, reverse=True)
+        self._counters: Dict[UsageKey, Dict[str, Any]] = {}
+    
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    
+    def _counters_for(self, provider: str, model: str) -> Dict[str, Any]:
+        key = (self._today(), provider, model)
+        counters = self._counters.get(key)
+        if counters is None:
+            counters = self._counters[key] = new_counters()
+        return counters
+    
+    def price_for(self, model: str) -> Optional[List[float]]:
+        for prefix in self._price_prefixes:
+            if model.startswith(prefix):
+                return self.pricing[prefix]
+        return None
+    
+    def estimate_cost(self, provider: str, model: str, usage: Optional[Dict[str, int]]) -> Optional[float]:
+        """usage 기준 예상 비용 (USD, 로컬 모델은 0, usage나 가격을 모르면 None)"""
+        if provider == "local":
+            return 0.0
+        price = self.price_for(model)
+        if price is None or not usage:
+            return None
+        input_price, output_price = price[0], price[1]
+        cached_price = price[2] if len(price) > 2 else input_price
+        write_price = price[3] if len(price) > 3 else input_price
+        cached = usage.get("cached_tokens", 0)
+        written = usage.get("cache_write_tokens", 0)
+        uncached = max(0, usage.get("prompt_tokens", 0) - cached - written)
+        return (
+            uncached * input_price
+            + cached * cached_price
+            + written * write_price
+            + usage.get("completion_tokens", 0) * output_price
+        ) / 1_000_000
+    
+    def record(
+        self,
+        provider: str,
+        model: str,
+        latency_ms: float,
+        usage: Optional[Dict[str, int]] = None
+    ):
+        """LLM 호출 1회 기록"""
+        counters = self._counters_for(provider, model)
+        counters["requests"] += 1
+        counters["latency_sum_ms"] += latency_ms
+        counters["latency_buckets"][bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        
+        if usage:
+            for field in ("prompt_tokens", "completion_tokens", "cached_tokens", "cache_write_tokens"):
+                counters[field] += usage.get(field, 0)
+        
+        cost = self.estimate_cost(provider, model, usage)
+        if cost is None:
+            counters["unpriced_requests"] += 1
+        else:
+            counters["cost_usd"] += cost
+    
+    def record_error(self, provider: str, model: str):
+        """실패한 LLM 호출 기록"""
+        self._counters_for(provider, model)["errors"] += 1
+    
+    def record_cache_hit(self, provider: str, model: str):
+        """응답 캐시로 처리한 요청 기록"""
+        self._counters_for(provider, model)["cache_hits"] += 1
+    
+    def drain(self) -> Dict[UsageKey, Dict[str, Any]]:
+        """지금까지의 집계를 꺼내고 초기화 (DB 반영용)"""
+        counters, self._counters = self._counters, {}
+        return counters
+    
+    def restore(self, counters: Dict[UsageKey, Dict[str, Any]]):
+        """DB 반영에 실패한 집계를 되돌려 놓음"""
+        for key, value in counters.items():
+            merge_counters(self._counters.setdefault(key, new_counters()), value)
+    
+    def pending(self) -> Dict[UsageKey, Dict[str, Any]]:
+        """아직 DB에 반영되지 않은 집계"""
+        return self._counters
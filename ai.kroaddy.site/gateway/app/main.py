@@ -1,6 +1,7 @@
 from fastapi import FastAPI, APIRouter, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
 import uvicorn
 import httpx
 import os
@@ -122,12 +123,54 @@ async def proxy_rag(request: Request, path: str):
 # 서브라우터 생성 (chatbotservice 프록시)
 chatbot_router = APIRouter()
 
+async def proxy_stream(request: Request, url: str) -> Response:
+    """스트리밍 응답(SSE)을 모으지 않고 받는 즉시 클라이언트로 전달"""
+    params = dict(request.query_params)
+    headers = dict(request.headers)
+    headers.pop("host", None)
+    headers.pop("content-length", None)
+    body = await request.body()
+    
+    client = httpx.AsyncClient(timeout=60.0)
+    try:
+        upstream = client.build_request("POST", url, content=body, params=params, headers=headers)
+        response = await client.send(upstream, stream=True)
+    except Exception:
+        await client.aclose()
+        raise
+    
+    async def close_upstream():
+        await response.aclose()
+        await client.aclose()
+    
+    # 길이/전송 방식 헤더는 다시 계산되도록 제외하고 CORS 헤더 추가
+    response_headers = {
+        key: value for key, value in response.headers.items()
+        if key.lower() not in ("content-length", "transfer-encoding", "connection")
+    }
+    response_headers["Access-Control-Allow-Origin"] = "*"
+    response_headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, PATCH, OPTIONS"
+    response_headers["Access-Control-Allow-Headers"] = "*"
+    response_headers["Access-Control-Allow-Credentials"] = "true"
+    
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        headers=response_headers,
+        background=BackgroundTask(close_upstream)
+    )
+
 @chatbot_router.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"])
 async def proxy_chatbot(request: Request, path: str):
     import logging
     logger = logging.getLogger(__name__)
     
     try:
+        # 스트리밍 엔드포인트 (/chat/stream, /analyze-price/stream)
+        if request.method == "POST" and path.endswith("/stream"):
+            logger.info(f"스트리밍 프록시 요청: {CHATBOT_SERVICE_URL}/{path}")
+            return await proxy_stream(request, f"{CHATBOT_SERVICE_URL}/{path}")
+        
         async with httpx.AsyncClient(timeout=60.0) as client:
             url = f"{CHATBOT_SERVICE_URL}/{path}"
             params = dict(request.query_params)
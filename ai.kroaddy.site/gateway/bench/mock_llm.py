@@ -0,0 +1,228 @@
+"""
+Mock LLM provider 서버
+OpenAI /v1/chat/completions 및 Anthropic /v1/messages 응답을 흉내 내어 실제 API 비용 없이 Agent 부하 테스트
+
+지연 시간 = 첫 토큰까지 시간 (로그 정규 분포) + 출력 토큰 수 / 초당 토큰 수
+
+실행:
+    python -m bench.mock_llm --port 9100 --latency-ms 400 --tokens-per-sec 80 --error-rate 0.01
+
+게이트웨이 설정:
+    OPENAI_BASE_URL=http://localhost:9100/v1
+    ANTHROPIC_BASE_URL=http://localhost:9100/v1
+    OPENAI_API_KEY=mock ANTHROPIC_API_KEY=mock
+"""
+import os
+import time
+import math
+import random
+import asyncio
+import argparse
+from collections import deque
+from typing import Optional, Dict, Any, List
+import logging
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+WORDS = (
+    "서울 부산 여행 맛집 추천 가격 시장 지하철 버스 날씨 관광 문화 숙소 예약 안내 "
+    "the quick guide to local food prices and transit options for visitors"
+).split()
+
+class MockConfig:
+    """Mock 서버 설정 (환경 변수 MOCK_LLM_* 또는 명령행 인자)"""
+    
+    def __init__(
+        self,
+        latency_ms: float = float(os.getenv("MOCK_LLM_LATENCY_MS", "300")),
+        latency_sigma: float = float(os.getenv("MOCK_LLM_LATENCY_SIGMA", "0.5")),
+        tokens_per_sec: float = float(os.getenv("MOCK_LLM_TOKENS_PER_SEC", "0")),
+        output_tokens: int = int(os.getenv("MOCK_LLM_OUTPUT_TOKENS", "120")),
+        error_rate: float = float(os.getenv("MOCK_LLM_ERROR_RATE", "0")),
+        rate_limit_rate: float = float(os.getenv("MOCK_LLM_RATE_LIMIT_RATE", "0")),
+        rpm: int = int(os.getenv("MOCK_LLM_RPM", "0")),
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            latency_ms: 첫 토큰까지 지연 시간 중앙값 (ms)
+            latency_sigma: 로그 정규 분포 sigma (0이면 고정 지연, 클수록 긴 꼬리)
+            tokens_per_sec: 출력 토큰 생성 속도 (0이면 출력 길이와 무관)
+            output_tokens: 응답 출력 토큰 수 평균 (요청의 max_tokens가 더 작으면 max_tokens)
+            error_rate: 500 오류 비율 (0~1)
+            rate_limit_rate: Retry-After가 포함된 429 응답 비율 (0~1)
+            rpm: 분당 요청 한도 (0이면 무제한, 초과 시 429 및 rate limit 헤더)
+            seed: 난수 시드 (재현 가능한 실행용)
+        """
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_sec = tokens_per_sec
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rpm = rpm
+        self.random = random.Random(seed)
+
+
+def create_app(config: Optional[MockConfig] = None) -> FastAPI:
+    """Mock provider FastAPI 앱 생성"""
+    config = config or MockConfig()
+    app = FastAPI(title="Mock LLM Provider")
+    # 최근 60초 동안 받은 요청 시각 (rpm 한도 계산용)
+    recent: deque = deque()
+    stats = {"requests": 0, "errors": 0, "rate_limited": 0}
+    
+    def rate_limit_state() -> Dict[str, Any]:
+        now = time.monotonic()
+        while recent and recent[0] <= now - 60:
+            recent.popleft()
+        remaining = max(0, config.rpm - len(recent))
+        reset = (recent[0] + 60 - now) if recent else 0.0
+        return {"remaining": remaining, "reset": max(0.0, reset)}
+    
+    def rate_limit_headers(provider: str, state: Dict[str, Any]) -> Dict[str, str]:
+        if not config.rpm:
+            return {}
+        if provider == "anthropic":
+            reset_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + state["reset"]))
+            return {
+                "anthropic-ratelimit-requests-limit": str(config.rpm),
+                "anthropic-ratelimit-requests-remaining": str(state["remaining"]),
+                "anthropic-ratelimit-requests-reset": reset_at
+            }
+        return {
+            "x-ratelimit-limit-requests": str(config.rpm),
+            "x-ratelimit-remaining-requests": str(state["remaining"]),
+            "x-ratelimit-reset-requests": f"{int(state['reset'] * 1000)}ms"
+        }
+    
+    async def simulate(provider: str, body: Dict[str, Any]) -> Any:
+        stats["requests"] += 1
+        rng = config.random
+        
+        state = rate_limit_state()
+        if config.rpm and state["remaining"] <= 0:
+            stats["rate_limited"] += 1
+            headers = rate_limit_headers(provider, state)
+            headers["retry-after"] = str(max(1, math.ceil(state["reset"])))
+            return JSONResponse({"error": {"type": "rate_limit_error"}}, status_code=429, headers=headers)
+        if config.rpm:
+            recent.append(time.monotonic())
+            state["remaining"] -= 1
+        headers = rate_limit_headers(provider, state)
+        
+        if config.rate_limit_rate and rng.random() < config.rate_limit_rate:
+            stats["rate_limited"] += 1
+            headers["retry-after"] = "1"
+            return JSONResponse({"error": {"type": "rate_limit_error"}}, status_code=429, headers=headers)
+        
+        max_tokens = body.get("max_tokens") or config.output_tokens
+        output_tokens = max(1, min(max_tokens, int(rng.expovariate(1 / config.output_tokens)) + 1))
+        prompt_tokens = _estimate_prompt_tokens(body)
+        
+        latency = config.latency_ms / 1000.0
+        if config.latency_sigma > 0:
+            latency *= rng.lognormvariate(0, config.latency_sigma)
+        if config.tokens_per_sec > 0:
+            latency += output_tokens / config.tokens_per_sec
+        await asyncio.sleep(latency)
+        
+        if config.error_rate and rng.random() < config.error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": {"type": "server_error"}}, status_code=500, headers=headers)
+        
+        text = " ".join(rng.choice(WORDS) for _ in range(output_tokens))
+        model = body.get("model", "mock")
+        if provider == "anthropic":
+            payload = {
+                "id": f"msg_mock_{stats['requests']}",
+                "type": "message",
+                "role": "assistant",
+                "model": model,
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "usage": {"input_tokens": prompt_tokens, "output_tokens": output_tokens}
+            }
+        else:
+            payload = {
+                "id": f"chatcmpl-mock-{stats['requests']}",
+                "object": "chat.completion",
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": output_tokens,
+                    "total_tokens": prompt_tokens + output_tokens
+                }
+            }
+        return JSONResponse(payload, headers=headers)
+    
+    @app.post("/v1/chat/completions")
+    async def openai_chat(request: Request):
+        return await simulate("openai", await request.json())
+    
+    @app.post("/v1/messages")
+    async def anthropic_messages(request: Request):
+        return await simulate("anthropic", await request.json())
+    
+    @app.get("/stats")
+    async def mock_stats():
+        return stats
+    
+    return app
+
+
+def _estimate_prompt_tokens(body: Dict[str, Any]) -> int:
+    """요청 본문의 대략적인 프롬프트 토큰 수 (4글자당 1토큰)"""
+    parts: List[str] = []
+    system = body.get("system")
+    if isinstance(system, str):
+        parts.append(system)
+    elif isinstance(system, list):
+        parts.extend(block.get("text", "") for block in system)
+    for message in body.get("messages", []):
+        content = message.get("content", "")
+        if isinstance(content, list):
+            parts.extend(block.get("text", "") for block in content)
+        else:
+            parts.append(str(content))
+    return max(1, sum(len(part) for part in parts) // 4)
+
+
+def main():
+    import uvicorn
+    
+    parser = argparse.ArgumentParser(description="Mock OpenAI/Anthropic provider 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=MockConfig().latency_ms)
+    parser.add_argument("--latency-sigma", type=float, default=MockConfig().latency_sigma)
+    parser.add_argument("--tokens-per-sec", type=float, default=MockConfig().tokens_per_sec)
+    parser.add_argument("--output-tokens", type=int, default=MockConfig().output_tokens)
+    parser.add_argument("--error-rate", type=float, default=MockConfig().error_rate)
+    parser.add_argument("--rate-limit-rate", type=float, default=MockConfig().rate_limit_rate)
+    parser.add_argument("--rpm", type=int, default=MockConfig().rpm)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        tokens_per_sec=args.tokens_per_sec,
+        output_tokens=args.output_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        rpm=args.rpm,
+        seed=args.seed
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
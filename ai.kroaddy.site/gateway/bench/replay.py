@@ -0,0 +1,345 @@
+"""
+Agent 리플레이 벤치마크
+기록된 대화(JSONL) 또는 합성 대화를 /agent/chat으로 재생하여 처리량, 지연 시간 백분위,
+응답 캐시 적중률, SQLite 경합 지표(/agent/db/stats 변화량)를 보고
+
+trace 형식 (JSONL, 한 줄에 하나):
+    - ChatRequest 형태: {"messages": [...], "model": "...", "provider": "..."}
+    - /agent/conversations/export 결과: {"session_id", "user_message", "model_response", ...}
+      같은 session_id의 행은 이전 턴을 누적한 멀티턴 요청으로 변환
+
+실행 예:
+    # 실행 중인 게이트웨이 대상 (게이트웨이는 mock provider를 가리키도록 설정)
+    python -m bench.replay --target http://localhost:9000 --synthetic 500 --concurrency 32
+    
+    # 게이트웨이와 mock provider를 한 프로세스에서 실행
+    python -m bench.replay --in-process --start-mock --trace conversations.ndjson --rate 50
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from collections import Counter, defaultdict
+from typing import Optional, Dict, Any, List
+import logging
+import httpx
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_TOPICS = [
+    "서울 야경 명소 추천해줘",
+    "부산 해운대 근처 맛집 알려줘",
+    "제주도 3박 4일 일정 짜줘",
+    "경주 역사 유적지 추천",
+    "전주 한옥마을 가는 방법",
+    "강릉 카페 거리 정보",
+    "인천 공항에서 명동 가는 법",
+    "광장시장 빈대떡 가격 적정한가요?"
+]
+SYNTHETIC_FOLLOW_UPS = [
+    "좀 더 자세히 알려줘",
+    "비용은 얼마나 들어?",
+    "대중교통으로 갈 수 있어?",
+    "아이와 함께 가도 괜찮아?"
+]
+SYSTEM_PROMPT = "당신은 한국 여행 도우미입니다. 간결하고 정확하게 답변하세요."
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """정렬된 값 목록의 백분위 (최근접 순위)"""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, int(round(p * len(values) + 0.5)) - 1))
+    return round(values[index], 1)
+
+def load_trace(path: str, model: str, provider: str) -> List[Dict[str, Any]]:
+    """trace 파일을 /agent/chat 요청 본문 목록으로 변환"""
+    requests: List[Dict[str, Any]] = []
+    history: Dict[str, List[Dict[str, str]]] = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            if "messages" in row:
+                row.setdefault("model", model)
+                row.setdefault("provider", provider)
+                requests.append(row)
+                continue
+            
+            # 내보낸 대화 기록: 세션별 이전 턴을 누적하여 실제 멀티턴 요청 재현
+            messages = history[row.get("session_id", "")]
+            messages.append({"role": "user", "content": row["user_message"]})
+            requests.append({
+                "messages": [{"role": "system", "content": SYSTEM_PROMPT}] + list(messages),
+                "model": row.get("model_name") or model,
+                "provider": provider
+            })
+            messages.append({"role": "assistant", "content": row.get("model_response", "")})
+    return requests
+
+def synthetic_trace(
+    count: int,
+    model: str,
+    provider: str,
+    repeat_ratio: float,
+    turns: int,
+    seed: Optional[int]
+) -> List[Dict[str, Any]]:
+    """
+    합성 대화 생성
+    
+    Args:
+        count: 생성할 요청 수
+        repeat_ratio: 이전 요청을 그대로 반복하는 비율 (응답 캐시 적중 유도)
+        turns: 대화당 최대 턴 수 (턴마다 이전 대화가 누적됨)
+    """
+    rng = random.Random(seed)
+    requests: List[Dict[str, Any]] = []
+    conversation: List[Dict[str, str]] = []
+    while len(requests) < count:
+        if requests and rng.random() < repeat_ratio:
+            requests.append(rng.choice(requests))
+            continue
+        if not conversation or len(conversation) >= turns * 2 - 1:
+            conversation = [{"role": "user", "content": f"{rng.choice(SYNTHETIC_TOPICS)} (#{len(requests)})"}]
+        else:
+            conversation = conversation + [
+                {"role": "assistant", "content": "이전 답변입니다."},
+                {"role": "user", "content": rng.choice(SYNTHETIC_FOLLOW_UPS)}
+            ]
+        requests.append({
+            "messages": [{"role": "system", "content": SYSTEM_PROMPT}] + conversation,
+            "model": model,
+            "provider": provider
+        })
+    return requests
+
+
+async def replay(
+    client: httpx.AsyncClient,
+    requests: List[Dict[str, Any]],
+    concurrency: int,
+    rate: float
+) -> Dict[str, Any]:
+    """
+    요청 재생
+    
+    Args:
+        concurrency: 동시에 처리 중인 최대 요청 수
+        rate: 초당 요청 시작 수 (0이면 concurrency 한도 내에서 최대한 빠르게)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    cached = 0
+    
+    async def send(body: Dict[str, Any]):
+        nonlocal cached
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post("/agent/chat", json=body)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                response = None
+                status = type(e).__name__
+            statuses[status] += 1
+            if response is not None and response.status_code == 200:
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.json().get("cached"):
+                    cached += 1
+    
+    started = time.perf_counter()
+    tasks = []
+    for index, body in enumerate(requests):
+        if rate > 0:
+            delay = started + index / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(body)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    succeeded = len(latencies)
+    return {
+        "requests": len(requests),
+        "succeeded": succeeded,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(succeeded / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "avg": round(sum(latencies) / succeeded, 1) if succeeded else None,
+            "p50": percentile(latencies, 0.5),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": round(latencies[-1], 1) if latencies else None
+        },
+        "status": dict(statuses),
+        "cache_hit_ratio": round(cached / succeeded, 4) if succeeded else None
+    }
+
+async def fetch_db_stats(client: httpx.AsyncClient) -> Optional[Dict[str, Any]]:
+    try:
+        response = await client.get("/agent/db/stats")
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        logger.warning(f"/agent/db/stats 조회 실패: {e}")
+        return None
+
+def db_stats_delta(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """재생 전후 /agent/db/stats 차이 (누적 카운터는 차이, 최댓값은 재생 후 값)"""
+    if not before or not after:
+        return None
+    delta: Dict[str, Any] = {}
+    for section in ("executor", "transactions", "conversation_writer"):
+        old, new = before.get(section, {}), after.get(section, {})
+        delta[section] = {
+            key: round(value if key.endswith("_max") else value - old.get(key, 0), 3)
+            for key, value in new.items()
+            if isinstance(value, (int, float))
+        }
+    
+    executor = delta["executor"]
+    if executor.get("calls"):
+        executor["queue_wait_ms_avg"] = round(executor.get("queue_wait_ms_total", 0) / executor["calls"], 3)
+        executor["run_ms_avg"] = round(executor.get("run_ms_total", 0) / executor["calls"], 3)
+    transactions = delta["transactions"]
+    if transactions.get("transactions"):
+        transactions["transaction_ms_avg"] = round(
+            transactions.get("transaction_ms_total", 0) / transactions["transactions"], 3
+        )
+    return delta
+
+
+async def start_mock_server(port: int, args: argparse.Namespace):
+    """mock provider를 같은 이벤트 루프에서 실행"""
+    import uvicorn
+    from bench.mock_llm import MockConfig, create_app
+    
+    config = MockConfig(
+        latency_ms=args.mock_latency_ms,
+        tokens_per_sec=args.mock_tokens_per_sec,
+        error_rate=args.mock_error_rate,
+        seed=args.seed
+    )
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+    return server, task
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.trace:
+        requests = load_trace(args.trace, args.model, args.provider)
+    else:
+        requests = synthetic_trace(args.synthetic, args.model, args.provider, args.repeat_ratio, args.turns, args.seed)
+    if args.limit:
+        requests = requests[:args.limit]
+    
+    mock = None
+    if args.start_mock:
+        mock = await start_mock_server(args.mock_port, args)
+    
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    gateway_app = None
+    try:
+        if args.in_process:
+            # 게이트웨이 모듈이 import 시점에 provider 설정과 DB 경로를 읽으므로 먼저 환경 구성
+            mock_url = f"http://127.0.0.1:{args.mock_port}/v1"
+            os.environ.setdefault("OPENAI_BASE_URL", mock_url)
+            os.environ.setdefault("ANTHROPIC_BASE_URL", mock_url)
+            os.environ.setdefault("OPENAI_API_KEY", "mock")
+            os.environ.setdefault("ANTHROPIC_API_KEY", "mock")
+            os.chdir(args.workdir or tempfile.mkdtemp(prefix="agent-bench-"))
+            from app.main import app as gateway_app
+            await gateway_app.router.startup()
+            transport = httpx.ASGITransport(app=gateway_app)
+            client = httpx.AsyncClient(transport=transport, base_url="http://gateway", timeout=args.timeout)
+        else:
+            client = httpx.AsyncClient(base_url=args.target, timeout=args.timeout, limits=limits)
+        
+        async with client:
+            before = await fetch_db_stats(client)
+            report = await replay(client, requests, args.concurrency, args.rate)
+            after = await fetch_db_stats(client)
+        report["sqlite"] = db_stats_delta(before, after)
+        return report
+    finally:
+        if gateway_app is not None:
+            await gateway_app.router.shutdown()
+        if mock is not None:
+            server, task = mock
+            server.should_exit = True
+            await task
+
+def print_report(report: Dict[str, Any]):
+    latency = report["latency_ms"]
+    print(f"requests      {report['succeeded']}/{report['requests']} ok in {report['elapsed_s']}s")
+    print(f"throughput    {report['throughput_rps']} req/s")
+    print(
+        f"latency (ms)  avg={latency['avg']} p50={latency['p50']} p95={latency['p95']} "
+        f"p99={latency['p99']} max={latency['max']}"
+    )
+    print(f"status        {report['status']}")
+    print(f"cache hits    {report['cache_hit_ratio']}")
+    sqlite = report.get("sqlite")
+    if sqlite:
+        executor, transactions = sqlite["executor"], sqlite["transactions"]
+        print(
+            f"db executor   calls={executor.get('calls')} queue_wait_avg={executor.get('queue_wait_ms_avg')}ms "
+            f"queue_wait_max={executor.get('queue_wait_ms_max')}ms run_avg={executor.get('run_ms_avg')}ms"
+        )
+        print(
+            f"db writes     transactions={transactions.get('transactions')} "
+            f"avg={transactions.get('transaction_ms_avg')}ms max={transactions.get('transaction_ms_max')}ms "
+            f"locked={transactions.get('locked_errors')} rollbacks={transactions.get('rollbacks')}"
+        )
+        print(f"writer queue  {sqlite['conversation_writer']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent 리플레이 벤치마크")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--target", help="실행 중인 게이트웨이 URL (예: http://localhost:9000)")
+    target.add_argument("--in-process", action="store_true", help="게이트웨이를 이 프로세스에서 ASGI로 실행")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--trace", help="재생할 JSONL trace 파일")
+    source.add_argument("--synthetic", type=int, help="합성 요청 수")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--provider", default="openai")
+    parser.add_argument("--repeat-ratio", type=float, default=0.2, help="합성 trace에서 반복 요청 비율")
+    parser.add_argument("--turns", type=int, default=4, help="합성 대화당 최대 턴 수")
+    parser.add_argument("--limit", type=int, default=0, help="재생할 최대 요청 수 (0이면 전체)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=0, help="초당 요청 수 (0이면 제한 없음)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workdir", help="--in-process의 DB 작업 디렉터리 (기본: 임시 디렉터리)")
+    parser.add_argument("--start-mock", action="store_true", help="mock provider를 이 프로세스에서 함께 실행")
+    parser.add_argument("--mock-port", type=int, default=9100)
+    parser.add_argument("--mock-latency-ms", type=float, default=300)
+    parser.add_argument("--mock-tokens-per-sec", type=float, default=0)
+    parser.add_argument("--mock-error-rate", type=float, default=0)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.WARNING)
+    # --in-process에서 작업 디렉터리를 바꾸기 전에 게이트웨이 패키지 경로 고정
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
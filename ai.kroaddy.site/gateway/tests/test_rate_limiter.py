@@ -0,0 +1,196 @@
+"""RateScheduler / rate limit 헤더 파싱 테스트"""
+import time
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import httpx
+import pytest
+from app.agent.rate_limiter import (
+    RateBudget,
+    RateLimitExceeded,
+    RateScheduler,
+    ProviderRateLimiter,
+    _parse_reset,
+    parse_retry_after
+)
+
+
+def _response(status_code: int, headers=None) -> httpx.Response:
+    return httpx.Response(status_code, headers=headers or {})
+
+
+def _sender(responses, calls):
+    """응답을 순서대로 반환하는 send 함수 (호출 시각을 calls에 기록)"""
+    responses = list(responses)
+    
+    async def send():
+        calls.append(time.monotonic())
+        return responses.pop(0)
+    
+    return send
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("20ms", 0.02),
+    ("1s", 1.0),
+    ("6m0s", 360.0),
+    ("1h2m3.5s", 3723.5),
+    ("", None),
+    (None, None),
+    ("soon", None)
+])
+def test_parse_reset_durations(value, expected):
+    if expected is None:
+        assert _parse_reset(value) is None
+    else:
+        assert _parse_reset(value) == pytest.approx(expected)
+
+
+def test_parse_reset_rfc3339():
+    reset_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert _parse_reset(reset_at.isoformat().replace("+00:00", "Z")) == pytest.approx(30, abs=1)
+    # 지난 시각은 0
+    assert _parse_reset("2000-01-01T00:00:00Z") == 0.0
+
+
+def test_parse_retry_after_variants():
+    assert parse_retry_after(httpx.Headers({"retry-after-ms": "1500"})) == 1.5
+    # retry-after-ms가 우선
+    assert parse_retry_after(httpx.Headers({"retry-after-ms": "200", "retry-after": "9"})) == 0.2
+    assert parse_retry_after(httpx.Headers({"retry-after": "3"})) == 3.0
+    retry_at = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=20), usegmt=True)
+    assert parse_retry_after(httpx.Headers({"retry-after": retry_at})) == pytest.approx(20, abs=1.5)
+    assert parse_retry_after(httpx.Headers({"retry-after": "later"})) is None
+    assert parse_retry_after(httpx.Headers({})) is None
+
+
+def test_rate_budget_refills_after_reset():
+    budget = RateBudget()
+    budget.update("10", "0", "1s")
+    now = time.monotonic()
+    assert budget.wait_time(1, now) == pytest.approx(1.0, abs=0.1)
+    # 초기화 시점이 지나면 한도가 다시 찬 것으로 간주
+    assert budget.wait_time(1, now + 2) == 0.0
+    assert budget.remaining == 10
+    # 한도보다 큰 요청은 다 찬 상태면 허용
+    assert budget.wait_time(50, now + 2) == 0.0
+
+
+def test_limiter_reads_provider_headers():
+    limiter = ProviderRateLimiter("openai")
+    limiter.update(httpx.Headers({
+        "x-ratelimit-limit-requests": "500",
+        "x-ratelimit-remaining-requests": "499",
+        "x-ratelimit-reset-requests": "120ms",
+        "x-ratelimit-limit-tokens": "30000",
+        "x-ratelimit-remaining-tokens": "100",
+        "x-ratelimit-reset-tokens": "2s"
+    }))
+    snapshot = limiter.snapshot()
+    assert snapshot["requests"]["limit"] == 500
+    assert snapshot["requests"]["remaining"] == 499
+    assert snapshot["tokens"]["remaining"] == 100
+    assert snapshot["acquired"] == 0
+    
+    limiter = ProviderRateLimiter("anthropic")
+    reset_at = (datetime.now(timezone.utc) + timedelta(seconds=10)).isoformat()
+    limiter.update(httpx.Headers({
+        "anthropic-ratelimit-tokens-limit": "40000",
+        "anthropic-ratelimit-tokens-remaining": "0",
+        "anthropic-ratelimit-tokens-reset": reset_at
+    }))
+    assert limiter.wait_hint() == pytest.approx(10, abs=1)
+
+
+def test_acquire_waits_for_token_reset():
+    async def run():
+        limiter = ProviderRateLimiter("openai")
+        limiter.update(httpx.Headers({
+            "x-ratelimit-limit-tokens": "1000",
+            "x-ratelimit-remaining-tokens": "10",
+            "x-ratelimit-reset-tokens": "100ms"
+        }))
+        started = time.monotonic()
+        assert await limiter.acquire(500, max_wait=1.0)
+        return time.monotonic() - started, limiter.stats["queued"]
+    
+    elapsed, queued = asyncio.run(run())
+    assert elapsed >= 0.09
+    assert queued == 1
+
+
+def test_acquire_gives_up_after_max_wait():
+    async def run():
+        limiter = ProviderRateLimiter("openai")
+        limiter.block_for(5)
+        return await limiter.acquire(1, max_wait=0.05)
+    
+    assert asyncio.run(run()) is False
+
+
+def test_call_retries_after_retry_after():
+    calls = []
+    scheduler = RateScheduler(max_retries=2, backoff_base=0.01, max_wait=2)
+    send = _sender([_response(429, {"retry-after-ms": "100"}), _response(200)], calls)
+    
+    response = asyncio.run(scheduler.call("openai", "m", 10, send))
+    
+    assert response.status_code == 200
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.09
+    assert scheduler.limiter_for("openai", "m").stats["retries"] == 1
+
+
+def test_call_raises_when_retries_exhausted():
+    calls = []
+    scheduler = RateScheduler(max_retries=1, backoff_base=0.001, backoff_max=0.001, max_wait=2)
+    send = _sender([_response(529), _response(529)], calls)
+    
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        asyncio.run(scheduler.call("anthropic", "m", 10, send))
+    
+    assert len(calls) == 2
+    assert exc_info.value.provider == "anthropic"
+    assert scheduler.limiter_for("anthropic", "m").stats["rate_limited"] == 1
+
+
+def test_call_gives_up_when_retry_after_exceeds_max_wait():
+    calls = []
+    scheduler = RateScheduler(max_retries=3, max_wait=0.2)
+    send = _sender([_response(429, {"retry-after": "30"}), _response(200)], calls)
+    
+    started = time.monotonic()
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        asyncio.run(scheduler.call("openai", "m", 10, send))
+    
+    # Retry-After를 기다리지 않고 바로 포기하며, 클라이언트에 전달할 대기 시간을 알려줌
+    assert time.monotonic() - started < 0.2
+    assert len(calls) == 1
+    assert exc_info.value.retry_after == pytest.approx(30, abs=1)
+
+
+def test_call_shares_block_with_other_calls():
+    calls = []
+    scheduler = RateScheduler(max_retries=0, max_wait=0.05)
+    
+    async def run():
+        with pytest.raises(RateLimitExceeded):
+            await scheduler.call("openai", "m", 10, _sender([_response(429, {"retry-after": "10"})], calls))
+        # 같은 provider/모델의 다음 호출은 보내지 않고 대기 시간 안에 포기
+        with pytest.raises(RateLimitExceeded):
+            await scheduler.call("openai", "m", 10, _sender([_response(200)], calls))
+        # 다른 모델은 영향 없음
+        return await scheduler.call("openai", "other", 10, _sender([_response(200)], calls))
+    
+    assert asyncio.run(run()).status_code == 200
+    assert len(calls) == 2
+
+
+def test_call_applies_timeout_per_attempt():
+    async def slow():
+        await asyncio.sleep(1)
+        return _response(200)
+    
+    scheduler = RateScheduler()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(scheduler.call("openai", "m", 10, slow, attempt_timeout=0.05))
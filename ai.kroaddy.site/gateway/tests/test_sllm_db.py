@@ -0,0 +1,328 @@
+"""SLLMDB 저장소 테스트 (keyset 페이지네이션, 압축, 응답 캐시 정리, 전문 검색, 월별 보관)"""
+import sqlite3
+import pytest
+from app.agent.compression import TextCodec, train_dictionary
+from app.agent.sllm_db import SLLMDB
+
+LONG_TEXT = "서울 여행 맛집 추천과 교통 안내를 정리한 긴 응답입니다. " * 20
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = SLLMDB(
+        str(tmp_path / "sllm.db"),
+        codec=TextCodec("zlib", min_size=64),
+        archive_dir=str(tmp_path / "archive")
+    )
+    yield database
+    database.close()
+
+
+def _save(db, session_id, count, created_at=None, prefix="질문"):
+    """대화 count건 저장 (created_at이 있으면 그 시각으로)"""
+    db.save_conversations([
+        {
+            "session_id": session_id,
+            "user_message": f"{prefix} {i}",
+            "model_response": f"응답 {i}",
+            "created_at": created_at
+        }
+        for i in range(count)
+    ])
+
+
+def _all_pages(db, **kwargs):
+    """next_cursor를 따라 모든 페이지를 읽어 (id 목록, 페이지 수) 반환"""
+    ids, pages, cursor = [], 0, None
+    while True:
+        page = db.get_conversations_page(cursor=cursor, **kwargs)
+        pages += 1
+        ids.extend(record["id"] for record in page["conversations"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+
+def _raw(db, sql, params=()):
+    return db._get_connection().execute(sql, params).fetchall()
+
+
+# keyset 페이지네이션 (user-029)
+
+def test_conversation_indexes_are_used(db):
+    indexes = {row[0] for row in _raw(db, "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_conversations_session_created", "idx_conversations_created"} <= indexes
+    
+    plan = " ".join(str(row[-1]) for row in _raw(
+        db,
+        "EXPLAIN QUERY PLAN SELECT id FROM conversations WHERE session_id = ? ORDER BY created_at DESC, id DESC LIMIT 10",
+        ("s",)
+    ))
+    assert "idx_conversations_session_created" in plan
+
+
+def test_keyset_pagination_with_same_timestamp(db):
+    # 같은 초에 저장된 행도 id로 순서가 정해져 페이지 경계에서 빠지거나 중복되지 않음
+    _save(db, "a", 24, created_at="2026-01-01 00:00:00")
+    _save(db, "b", 5, created_at="2026-01-02 00:00:00")
+    
+    ids, pages = _all_pages(db, limit=10)
+    assert len(ids) == len(set(ids)) == 29
+    assert pages == 3
+    # 최신순: b 세션(나중 시각)이 먼저, 같은 시각 안에서는 id 역순
+    assert ids[:5] == sorted(ids[:5], reverse=True)
+    assert ids[5:] == sorted(ids[5:], reverse=True)
+    
+    session_ids, _ = _all_pages(db, limit=7, session_id="a")
+    assert len(session_ids) == 24
+
+
+def test_column_projection_and_validation(db):
+    _save(db, "a", 2)
+    records = db.get_conversations(columns=["user_message", "created_at"])
+    assert set(records[0]) == {"user_message", "created_at"}
+    
+    with pytest.raises(ValueError):
+        db.get_conversations(columns=["user_message; DROP TABLE conversations"])
+    with pytest.raises(ValueError):
+        db.get_conversations_page(cursor="not-a-cursor")
+
+
+# 압축 (user-031)
+
+def test_long_text_is_stored_compressed(db):
+    db.save_conversation("a", LONG_TEXT, "짧은 응답")
+    user_message, model_response = _raw(db, "SELECT user_message, model_response FROM conversations")[0]
+    
+    assert isinstance(user_message, bytes) and len(user_message) < len(LONG_TEXT.encode())
+    # min_size 미만은 압축하지 않음
+    assert model_response == "짧은 응답"
+    
+    record = db.get_conversations()[0]
+    assert record["user_message"] == LONG_TEXT
+    assert record["model_response"] == "짧은 응답"
+
+
+def test_legacy_uncompressed_rows_still_read(db):
+    _raw(db, "INSERT INTO conversations (session_id, user_message, model_response) VALUES ('a', ?, ?)",
+         (LONG_TEXT, "이전 버전 응답"))
+    db._get_connection().commit()
+    
+    assert db.get_conversations()[0]["user_message"] == LONG_TEXT
+
+
+def test_cached_response_is_compressed(db):
+    db.cache_response("h1", LONG_TEXT, "m")
+    stored, size_bytes = _raw(db, "SELECT response, size_bytes FROM model_cache")[0]
+    
+    assert isinstance(stored, bytes)
+    assert size_bytes == len(stored)
+    assert db.get_cached_response("h1") == LONG_TEXT
+
+
+def test_codec_dictionary_roundtrip_and_mismatch():
+    samples = [f"가격 분석 결과: 상품 {i}번은 적정 가격대입니다." for i in range(50)]
+    codec = TextCodec("zlib", min_size=1, dictionary=train_dictionary(samples, size=1024))
+    plain = TextCodec("zlib", min_size=1)
+    
+    text = "가격 분석 결과: 상품 99번은 적정 가격대입니다."
+    encoded = codec.encode(text)
+    assert codec.decode(encoded) == text
+    assert len(encoded) < len(plain.encode(text))
+    
+    with pytest.raises(ValueError):
+        TextCodec("zlib", min_size=1, dictionary=b"other dictionary").decode(encoded)
+    with pytest.raises(ValueError):
+        codec.decode(b"\x7fgarbage")
+
+
+# 응답 캐시 TTL/LRU 정리 (user-030)
+
+def test_cache_ttl_hides_and_compaction_deletes_expired(db):
+    db.cache_ttl_seconds = 60
+    db.cache_response("old", "오래된 응답")
+    db.cache_response("new", "새 응답")
+    _raw(db, "UPDATE model_cache SET created_at = '2000-01-01 00:00:00' WHERE prompt_hash = 'old'")
+    db._get_connection().commit()
+    
+    assert db.get_cached_response("old") is None
+    assert db.get_cached_responses(["old", "new"]) == {"new": "새 응답"}
+    
+    stats = db.compact_cache()
+    assert stats["expired"] == 1
+    assert [row[0] for row in _raw(db, "SELECT prompt_hash FROM model_cache")] == ["new"]
+
+
+def test_compaction_evicts_least_recently_used_rows(db):
+    db.cache_max_rows = 2
+    for name in ("a", "b", "c"):
+        db.cache_response(name, f"응답 {name}")
+    _raw(db, "UPDATE model_cache SET last_accessed = '2000-01-01 00:00:00'")
+    db._get_connection().commit()
+    
+    # 적중 기록은 모아두었다가 compact_cache 전에 반영되어 a를 최근 사용으로 만듦
+    db.get_cached_response("a")
+    db.get_cached_response("a")
+    db.get_cached_response("c")
+    
+    stats = db.compact_cache()
+    assert stats["evicted_rows"] == 1
+    remaining = dict(_raw(db, "SELECT prompt_hash, hit_count FROM model_cache"))
+    assert remaining == {"a": 2, "c": 1}
+
+
+def test_compaction_enforces_max_bytes(db):
+    db.cache_max_rows = 0
+    for i in range(5):
+        db.cache_response(f"h{i}", "x" * 40)
+    db.cache_max_bytes = 100
+    
+    stats = db.compact_cache()
+    total = _raw(db, "SELECT SUM(size_bytes) FROM model_cache")[0][0]
+    assert total <= 100
+    assert stats["evicted_bytes"] >= 100
+
+
+# 전문 검색 색인 동기화 (user-043)
+
+def test_search_index_follows_insert_update_delete(db):
+    if not db.fts_enabled:
+        pytest.skip("FTS5를 지원하지 않는 SQLite 빌드")
+    
+    db.save_conversation("a", "부산 " + LONG_TEXT, "해운대 근처 숙소를 추천합니다")
+    db.save_conversation("b", "제주 날씨", "맑음")
+    
+    results = db.search_conversations("해운대")
+    assert [result["session_id"] for result in results] == ["a"]
+    assert "<mark>해운대</mark>" in results[0]["snippet"]
+    # 압축된 텍스트도 색인되고, 접두사로 일치
+    assert len(db.search_conversations("부")) == 1
+    assert db.search_conversations("해운대", session_id="b") == []
+    
+    row_id = results[0]["id"]
+    with db._transaction() as conn:
+        conn.execute(
+            "UPDATE conversations SET model_response = ? WHERE id = ?",
+            (db.codec.encode("광안리 근처 숙소"), row_id)
+        )
+    assert db.search_conversations("해운대") == []
+    assert [result["id"] for result in db.search_conversations("광안리")] == [row_id]
+    
+    with db._transaction() as conn:
+        conn.execute("DELETE FROM conversations WHERE id = ?", (row_id,))
+    assert db.search_conversations("광안리") == []
+
+
+def test_search_filters_and_query_validation(db):
+    if not db.fts_enabled:
+        pytest.skip("FTS5를 지원하지 않는 SQLite 빌드")
+    
+    _save(db, "a", 3, created_at="2026-01-01 00:00:00", prefix="맛집")
+    _save(db, "a", 2, created_at="2026-03-01 00:00:00", prefix="맛집")
+    
+    assert len(db.search_conversations("맛집", since="2026-02-01T00:00:00Z")) == 2
+    assert len(db.search_conversations("맛집", until="2026-02-01")) == 3
+    assert len(db.search_conversations("맛집", limit=2, offset=4)) == 1
+    # FTS5 연산자는 일반 단어로 취급
+    assert db.search_conversations('맛집 OR "') == []
+    with pytest.raises(ValueError):
+        db.search_conversations("   ")
+
+
+# 월별 보관 (user-044)
+
+def _archived_db(db):
+    """2020-01에 3건, 2020-02에 2건을 보관하고 최근 대화 2건을 hot DB에 남김"""
+    _save(db, "s", 3, created_at="2020-01-15 00:00:00", prefix="일월")
+    _save(db, "s", 2, created_at="2020-02-15 00:00:00", prefix="이월")
+    _save(db, "s", 2, prefix="최근")
+    return db.archive_conversations(older_than_days=30)
+
+
+def test_archive_moves_old_rows_by_month(db):
+    stats = _archived_db(db)
+    
+    assert stats["archived"] == 5
+    assert stats["months"] == {"2020-01": 3, "2020-02": 2}
+    assert db.list_archive_months() == ["2020-02", "2020-01"]
+    assert _raw(db, "SELECT COUNT(*) FROM conversations")[0][0] == 2
+    
+    # 보관 DB는 압축된 텍스트를 그대로 보관하고 읽기 전용으로 열림
+    archive = db._open_archive("2020-01", read_only=True)
+    try:
+        assert archive.execute("SELECT COUNT(*) FROM conversations").fetchone()[0] == 3
+        with pytest.raises(sqlite3.OperationalError):
+            archive.execute("DELETE FROM conversations")
+    finally:
+        archive.close()
+    
+    # 다시 실행해도 옮길 행이 없음
+    assert db.archive_conversations(older_than_days=30)["archived"] == 0
+
+
+def test_pages_continue_across_archive_tiers(db):
+    _archived_db(db)
+    
+    assert len(db.get_conversations(limit=100)) == 2
+    ids, pages = _all_pages(db, limit=2, include_archive=True)
+    assert len(ids) == len(set(ids)) == 7
+    assert pages == 4
+    
+    records = db.get_conversations(limit=100, include_archive=True, columns=["user_message", "created_at"])
+    assert [record["user_message"][:2] for record in records] == ["최근"] * 2 + ["이월"] * 2 + ["일월"] * 3
+    created = [record["created_at"] for record in records]
+    assert created == sorted(created, reverse=True)
+
+
+def test_interrupted_archive_rows_are_returned_once(db):
+    _archived_db(db)
+    # 보관 DB에 커밋한 뒤 hot DB에서 삭제하기 전에 중단된 상황
+    archive = db._open_archive("2020-01", read_only=True)
+    row = archive.execute("SELECT * FROM conversations ORDER BY id LIMIT 1").fetchone()
+    archive.close()
+    with db._transaction() as conn:
+        conn.execute("INSERT INTO conversations VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+    
+    ids = [record["id"] for record in db.get_conversations(limit=100, include_archive=True)]
+    assert len(ids) == len(set(ids)) == 7
+    
+    exported = [record["id"] for batch in db.iter_conversation_batches(batch_size=3, include_archive=True) for record in batch]
+    assert len(exported) == len(set(exported)) == 7
+    
+    # 다시 보관하면 중복 행은 무시되고 hot DB에서 삭제됨
+    db.archive_conversations(older_than_days=30)
+    assert _raw(db, "SELECT COUNT(*) FROM conversations")[0][0] == 2
+
+
+def test_session_history_and_export_include_archive(db):
+    _archived_db(db)
+    
+    history = db.get_session_history("s", max_turns=3)
+    assert [message["content"] for message in history if message["role"] == "user"] == ["이월 1", "최근 0", "최근 1"]
+    assert len(db.get_session_history("s", max_turns=10, include_archive=False)) == 4
+    
+    exported = [
+        record["user_message"]
+        for batch in db.iter_conversation_batches(include_archive=True, since="2020-02-01", columns=["user_message"])
+        for record in batch
+    ]
+    assert exported == ["이월 0", "이월 1", "최근 0", "최근 1"]
+
+
+def test_search_include_archive(db):
+    if not db.fts_enabled:
+        pytest.skip("FTS5를 지원하지 않는 SQLite 빌드")
+    _archived_db(db)
+    
+    assert db.search_conversations("일월") == []
+    results = db.search_conversations("일월", include_archive=True)
+    assert len(results) == 3
+    assert all(result["score"] is None for result in results)
+    assert "<mark>일월</mark>" in results[0]["snippet"]
+    
+    # hot DB 결과가 먼저, offset/limit은 합친 결과에 적용
+    _save(db, "s", 1, prefix="일월")
+    combined = db.search_conversations("일월", include_archive=True, limit=2, offset=0)
+    assert combined[0]["score"] is not None and combined[1]["score"] is None
+    assert len(db.search_conversations("일월", include_archive=True, limit=10, offset=2)) == 2
+    assert db.search_conversations("일월", include_archive=True, until="2020-01-01") == []
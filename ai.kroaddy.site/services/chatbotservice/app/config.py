@@ -11,3 +11,31 @@ if not OPENAI_API_KEY:
     import warnings
     warnings.warn("OPENAI_API_KEY 환경 변수가 설정되지 않았습니다. OpenAI API 기능이 작동하지 않을 수 있습니다.")
 
+
+# OpenAI HTTP 클라이언트 설정 (모든 요청이 하나의 연결 풀을 공유)
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))  # 요청 전체 제한 시간 (초)
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))  # 연결 제한 시간 (초)
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))  # 연결 오류/429/5xx 재시도 횟수
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))  # 동시 연결 수 상한
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))  # 유지할 유휴 연결 수
+
+
+# 대화 이력 윈도우 설정 (예산을 넘는 오래된 대화는 백그라운드에서 요약해 대체)
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "3000"))  # 대화 이력(요약 포함) 최대 토큰 수, 0이면 제한 없음
+CHAT_RECENT_MIN_MESSAGES = int(os.getenv("CHAT_RECENT_MIN_MESSAGES", "4"))  # 예산과 무관하게 유지할 최근 메시지 수
+CHAT_SUMMARY_CACHE_SIZE = int(os.getenv("CHAT_SUMMARY_CACHE_SIZE", "1000"))  # 요약을 보관할 최대 대화 수
+CHAT_SUMMARY_MODEL = os.getenv("CHAT_SUMMARY_MODEL", "gpt-4o-mini")  # 요약 생성 모델
+CHAT_SUMMARY_MAX_TOKENS = int(os.getenv("CHAT_SUMMARY_MAX_TOKENS", "300"))  # 요약 최대 길이 (토큰)
+CHAT_SUMMARY_CONCURRENCY = int(os.getenv("CHAT_SUMMARY_CONCURRENCY", "8"))  # 동시에 실행할 최대 요약 작업 수
+
+
+# 프롬프트 구성 설정
+PROMPT_PROFILE_CACHE_SIZE = int(os.getenv("PROMPT_PROFILE_CACHE_SIZE", "1024"))  # 렌더링한 사용자 프로필 블록을 보관할 최대 개수
+
+
+# 가격 분석 결과 캐시 설정
+PRICE_CACHE_ENABLED = os.getenv("PRICE_CACHE_ENABLED", "true").lower() == "true"
+PRICE_CACHE_TTL = float(os.getenv("PRICE_CACHE_TTL", "21600"))  # 결과 유효 시간 (초)
+PRICE_CACHE_MAX_ENTRIES = int(os.getenv("PRICE_CACHE_MAX_ENTRIES", "1000"))  # 메모리에 보관할 최대 결과 수
+PRICE_CACHE_BUCKET_PCT = float(os.getenv("PRICE_CACHE_BUCKET_PCT", "5"))  # 같은 결과를 재사용할 가격 구간 폭 (%, 0이면 같은 가격만)
+PRICE_CACHE_DB_PATH = os.getenv("PRICE_CACHE_DB_PATH", "")  # SQLite 파일 경로 (비어 있으면 메모리에만 보관)
@@ -0,0 +1,214 @@
+"""
+대화 이력 윈도우 모듈
+토큰 예산 안의 최근 대화만 프롬프트에 넣고, 예산 밖의 오래된 대화는 대화별 누적 요약으로 대체
+
+요약은 응답을 기다리지 않도록 백그라운드에서 생성되며, 준비되기 전까지는 오래된 대화를 생략합니다.
+"""
+import json
+import math
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import List, Dict, Optional, Callable, Awaitable, Tuple, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 휴리스틱 토큰 수 추정: ASCII는 약 4글자당 1토큰, 한글 등은 글자당 1토큰, 메시지당 고정 오버헤드
+ASCII_CHARS_PER_TOKEN = 4.0
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# 요약을 갱신할 때 최근 대화가 예산의 이 비율만 남도록 미리 요약 (턴마다 요약을 다시 만들지 않도록 여유 확보)
+SUMMARY_TARGET_RATIO = 0.5
+
+# 대화 ID가 없을 때 대화를 식별하는 데 쓰는 앞쪽 메시지 수 (대화가 길어져도 바뀌지 않는 부분)
+FINGERPRINT_MESSAGES = 2
+
+# (이전 요약, 새로 요약할 메시지) -> 갱신된 요약
+Summarizer = Callable[[Optional[str], List[Dict[str, str]]], Awaitable[str]]
+
+def estimate_tokens(text: str) -> int:
+    """문자 종류별 휴리스틱 토큰 수 추정"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / ASCII_CHARS_PER_TOKEN + (len(text) - ascii_chars))
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return estimate_tokens(str(message.get("content", ""))) + MESSAGE_OVERHEAD_TOKENS
+
+def _messages_hash(messages: List[Dict[str, str]]) -> str:
+    raw = json.dumps(messages, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ConversationWindow:
+    """토큰 예산 기반 대화 이력 윈도우 + 대화별 누적 요약 캐시 (최근 사용 순 LRU)"""
+    
+    def __init__(
+        self,
+        summarize: Summarizer,
+        token_budget: int = 3000,
+        min_recent_messages: int = 4,
+        cache_size: int = 1000,
+        max_concurrent_summaries: int = 8
+    ):
+        """
+        Args:
+            summarize: 이전 요약과 새 메시지를 받아 갱신된 요약을 반환하는 비동기 함수
+            token_budget: 대화 이력(요약 포함)에 쓸 최대 토큰 수 (0이면 제한 없음)
+            min_recent_messages: 예산을 넘더라도 항상 유지할 최근 메시지 수
+            cache_size: 요약을 유지할 최대 대화 수
+            max_concurrent_summaries: 동시에 실행할 최대 요약 작업 수 (넘으면 다음 요청에서 다시 시도)
+        """
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.min_recent_messages = min_recent_messages
+        self.cache_size = max(1, cache_size)
+        self.max_concurrent_summaries = max(1, max_concurrent_summaries)
+        # 실행 중인 요약 작업 수
+        self._running_summaries = 0
+        
+        # {대화 키: {"summary": 요약, "covered": 요약에 포함된 앞쪽 메시지 수,
+        #            "covered_hash": 그 메시지들의 해시, "task": 진행 중인 요약 작업}}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        
+        self.stats = {
+            "windowed": 0,
+            "summary_used": 0,
+            "summaries_generated": 0,
+            "summary_failures": 0,
+            "summaries_skipped": 0
+        }
+    
+    @staticmethod
+    def conversation_key(conversation_id: Optional[str], history: List[Dict[str, str]]) -> str:
+        """대화 키 (ID가 없으면 대화가 길어져도 바뀌지 않는 앞쪽 메시지로 식별)"""
+        if conversation_id:
+            return f"id:{conversation_id}"
+        return "fp:" + _messages_hash(history[:FINGERPRINT_MESSAGES])
+    
+    def apply(
+        self,
+        history: List[Dict[str, str]],
+        conversation_id: Optional[str] = None,
+        reserved_tokens: int = 0
+    ) -> Tuple[Optional[str], List[Dict[str, str]]]:
+        """
+        대화 이력을 토큰 예산에 맞게 자름
+        
+        Args:
+            history: 전체 대화 이력 (오래된 순)
+            conversation_id: 대화 ID (요약 캐시 키, 없으면 앞쪽 메시지로 식별)
+            reserved_tokens: 이력 외에 프롬프트가 이미 사용하는 토큰 수 (새 사용자 메시지 등)
+        
+        Returns:
+            (오래된 대화 요약 또는 None, 프롬프트에 넣을 최근 대화)
+        """
+        if self.token_budget <= 0 or not history:
+            return None, history
+        
+        budget = max(0, self.token_budget - reserved_tokens)
+        total = sum(message_tokens(message) for message in history)
+        if total <= budget:
+            return None, history
+        
+        self.stats["windowed"] += 1
+        key = self.conversation_key(conversation_id, history)
+        entry = self._entry(key)
+        
+        # 요약이 현재 이력의 앞부분과 일치할 때만 사용 (다른 이력이 같은 ID로 오면 무시)
+        summary = entry.get("summary")
+        covered = entry.get("covered", 0)
+        if summary and (covered > len(history) or _messages_hash(history[:covered]) != entry.get("covered_hash")):
+            summary, covered = None, 0
+        
+        # 최신 메시지부터 예산이 허락하는 만큼 유지 (요약이 있으면 요약 토큰도 예산에 포함)
+        remaining = budget - (estimate_tokens(summary) + MESSAGE_OVERHEAD_TOKENS if summary else 0)
+        start = len(history)
+        while start > covered:
+            cost = message_tokens(history[start - 1])
+            if cost > remaining and len(history) - start >= self.min_recent_messages:
+                break
+            remaining -= cost
+            start -= 1
+        
+        # 윈도우 밖으로 밀려났지만 아직 요약에 포함되지 않은 메시지가 있으면 백그라운드에서 요약 갱신
+        if start > covered:
+            self._schedule_summary(key, entry, history, max(start, self._summary_target(history, budget)))
+        
+        if summary:
+            self.stats["summary_used"] += 1
+        return summary, history[start:]
+    
+    def _summary_target(self, history: List[Dict[str, str]], budget: int) -> int:
+        """최근 대화가 예산의 SUMMARY_TARGET_RATIO 이하로 남는 요약 경계 (최근 메시지 최소 개수는 유지)"""
+        remaining = budget * SUMMARY_TARGET_RATIO
+        target = len(history)
+        while target > 0:
+            cost = message_tokens(history[target - 1])
+            if cost > remaining and len(history) - target >= self.min_recent_messages:
+                break
+            remaining -= cost
+            target -= 1
+        return target
+    
+    def _entry(self, key: str) -> Dict[str, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = {}
+            while len(self._entries) > self.cache_size:
+                _, evicted = self._entries.popitem(last=False)
+                task = evicted.get("task")
+                if task is not None:
+                    task.cancel()
+        self._entries.move_to_end(key)
+        return entry
+    
+    def _schedule_summary(self, key: str, entry: Dict[str, Any], history: List[Dict[str, str]], upto: int):
+        """
+        history[:upto]까지 포함하도록 요약 갱신 (대화당 한 번에 하나의 작업만 실행)
+        
+        전체 요약 작업이 max_concurrent_summaries개 실행 중이면 예약하지 않습니다.
+        요약은 다음 요청에서 다시 예약되며, 그동안은 오래된 대화를 생략합니다.
+        """
+        task = entry.get("task")
+        if task is not None and not task.done():
+            return
+        if self._running_summaries >= self.max_concurrent_summaries:
+            self.stats["summaries_skipped"] += 1
+            return
+        
+        covered = entry.get("covered", 0) if entry.get("summary") else 0
+        if covered and _messages_hash(history[:covered]) != entry.get("covered_hash"):
+            covered = 0
+        previous = entry.get("summary") if covered else None
+        new_messages = list(history[covered:upto])
+        covered_hash = _messages_hash(history[:upto])
+        
+        async def run():
+            try:
+                summary = await self.summarize(previous, new_messages)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["summary_failures"] += 1
+                logger.warning(f"대화 요약 생성 실패: {e}")
+                return
+            if summary:
+                entry.update({"summary": summary, "covered": upto, "covered_hash": covered_hash})
+                self.stats["summaries_generated"] += 1
+                logger.info(f"대화 요약 갱신: {upto}개 메시지, {len(summary)} 문자")
+        
+        task = entry["task"] = asyncio.get_running_loop().create_task(run())
+        # 시작 전에 취소된 작업도 집계에서 빠지도록 완료 콜백에서 감소
+        self._running_summaries += 1
+        task.add_done_callback(self._summary_done)
+    
+    def _summary_done(self, task: asyncio.Task):
+        self._running_summaries -= 1
+    
+    async def close(self):
+        """진행 중인 요약 작업 취소"""
+        tasks = [entry["task"] for entry in self._entries.values() if entry.get("task") is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
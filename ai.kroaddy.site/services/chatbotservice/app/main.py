@@ -4,9 +4,12 @@ Chatbot Service - FastAPI 애플리케이션
 """
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Optional
-from app.price_analyzer import chatbot, simple_chat, analyze_price
+from typing import List, Dict, Optional, AsyncIterator
+import json
+from app.price_analyzer import chatbot, simple_chat, analyze_price, close_client, price_cache
+from app.prompt_builder import cache_info as prompt_cache_info
 import logging
 
 # 로깅 설정
@@ -24,6 +27,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """OpenAI HTTP 연결 풀 종료"""
+    await close_client()
+
 # ============================================================================
 # 요청/응답 모델
 # ============================================================================
@@ -34,6 +42,7 @@ class ChatRequest(BaseModel):
     conversation_history: Optional[List[Dict[str, str]]] = None
     user_profile: Optional[Dict[str, str]] = None  # Onboarding 데이터
     context_info: Optional[Dict] = None  # 현재 위치 및 날씨 정보
+    conversation_id: Optional[str] = None  # 대화 ID (오래된 대화 요약 캐시 키)
 
 class ChatResponse(BaseModel):
     """챗봇 대화 응답"""
@@ -44,11 +53,59 @@ class PriceAnalysisRequest(BaseModel):
     product_name: str
     price: Optional[float] = None
     context: Optional[str] = None
+    no_cache: bool = False  # True면 저장된 분석 결과를 사용하지 않고 새로 분석
 
 class PriceAnalysisResponse(BaseModel):
     """가격 분석 응답"""
     analysis: str
 
+# ============================================================================
+# 헬퍼
+# ============================================================================
+
+def clean_conversation_history(conversation_history: Optional[List[Dict[str, str]]]) -> Optional[List[Dict[str, str]]]:
+    """대화 이력 검증 및 정리 (유효한 role과 content를 가진 메시지만 유지)"""
+    if not conversation_history:
+        return None
+    
+    cleaned_history = []
+    for msg in conversation_history:
+        if isinstance(msg, dict) and "role" in msg and "content" in msg:
+            # role이 유효한지 확인
+            if msg["role"] in ["user", "assistant", "system"]:
+                cleaned_history.append({
+                    "role": msg["role"],
+                    "content": str(msg["content"])
+                })
+            else:
+                logger.warning(f"유효하지 않은 role: {msg['role']}")
+        else:
+            logger.warning(f"잘못된 메시지 형식: {msg}")
+    
+    logger.info(f"정리된 대화 이력 길이: {len(cleaned_history)}")
+    return cleaned_history
+
+def sse_response(events: AsyncIterator[Dict[str, str]]) -> StreamingResponse:
+    """
+    챗봇 스트리밍 이벤트를 Server-Sent Events로 전송
+    
+    - 텍스트 조각: data: {"content": "..."}
+    - 완료: event: done / data: {"finish_reason": "stop" | "length" | "error"}
+    """
+    async def stream():
+        async for event in events:
+            if event["type"] == "delta":
+                yield f"data: {json.dumps({'content': event['content']}, ensure_ascii=False)}\n\n"
+            else:
+                yield f"event: done\ndata: {json.dumps({'finish_reason': event['finish_reason']})}\n\n"
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        # 프록시(nginx 등)가 응답을 모아서 보내지 않도록 함
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # ============================================================================
 # API 엔드포인트
 # ============================================================================
@@ -64,12 +121,27 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """헬스 체크"""
+    """헬스 체크 (프로필 블록 캐시 통계 포함)"""
     return {
         "status": "healthy",
-        "chatbot_ready": True
+        "chatbot_ready": True,
+        "profile_cache": prompt_cache_info()
     }
 
+@app.get("/analyze-price/cache")
+async def price_cache_stats():
+    """가격 분석 캐시 설정 및 적중 통계"""
+    if price_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **price_cache.info()}
+
+@app.delete("/analyze-price/cache")
+async def clear_price_cache():
+    """가격 분석 캐시 비우기 (가격 정보가 크게 바뀌었을 때 등)"""
+    if price_cache is not None:
+        await price_cache.clear()
+    return {"status": "cleared"}
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """
@@ -86,23 +158,7 @@ async def chat(request: ChatRequest):
         logger.info(f"대화 이력 길이: {len(request.conversation_history) if request.conversation_history else 0}")
         
         # 대화 이력 검증 및 정리
-        cleaned_history = None
-        if request.conversation_history:
-            cleaned_history = []
-            for msg in request.conversation_history:
-                if isinstance(msg, dict) and "role" in msg and "content" in msg:
-                    # role이 유효한지 확인
-                    if msg["role"] in ["user", "assistant", "system"]:
-                        cleaned_history.append({
-                            "role": msg["role"],
-                            "content": str(msg["content"])
-                        })
-                    else:
-                        logger.warning(f"유효하지 않은 role: {msg['role']}")
-                else:
-                    logger.warning(f"잘못된 메시지 형식: {msg}")
-            
-            logger.info(f"정리된 대화 이력 길이: {len(cleaned_history)}")
+        cleaned_history = clean_conversation_history(request.conversation_history)
         
         # 사용자 프로필 정보 로깅
         if request.user_profile:
@@ -114,24 +170,25 @@ async def chat(request: ChatRequest):
         
         if cleaned_history and len(cleaned_history) > 0:
             # 대화 이력이 있으면 전달
-            response = chatbot.chat(
+            response = await chatbot.chat(
                 request.message,
                 conversation_history=cleaned_history,
                 user_profile=request.user_profile,
-                context_info=request.context_info
+                context_info=request.context_info,
+                conversation_id=request.conversation_id
             )
         else:
             # 대화 이력이 없으면 간단한 호출 (사용자 프로필 및 컨텍스트는 전달)
             if request.user_profile or request.context_info:
                 # simple_chat은 user_profile과 context_info를 받지 않으므로 직접 chatbot.chat 호출
-                response = chatbot.chat(
+                response = await chatbot.chat(
                     request.message,
                     conversation_history=None,
                     user_profile=request.user_profile,
                     context_info=request.context_info
                 )
             else:
-                response = simple_chat(request.message)
+                response = await simple_chat(request.message)
         
         logger.info(f"챗봇 응답 생성 완료 (길이: {len(response)} 문자)")
         return ChatResponse(response=response)
@@ -152,6 +209,22 @@ async def chat(request: ChatRequest):
         
         raise HTTPException(status_code=500, detail=error_detail)
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    챗봇과 대화 (Server-Sent Events 스트리밍)
+    
+    응답 텍스트를 생성되는 즉시 조각 단위로 전송하고, 마지막에 done 이벤트로 완료 이유를 알립니다.
+    """
+    logger.info(f"챗봇 스트리밍 요청 수신: {request.message}")
+    return sse_response(chatbot.chat_stream(
+        request.message,
+        conversation_history=clean_conversation_history(request.conversation_history),
+        user_profile=request.user_profile,
+        context_info=request.context_info,
+        conversation_id=request.conversation_id
+    ))
+
 @app.post("/analyze-price", response_model=PriceAnalysisResponse)
 async def analyze_price_endpoint(request: PriceAnalysisRequest):
     """
@@ -166,10 +239,11 @@ async def analyze_price_endpoint(request: PriceAnalysisRequest):
     try:
         logger.info(f"가격 분석 요청: {request.product_name}, 가격: {request.price}")
         
-        analysis = analyze_price(
+        analysis = await analyze_price(
             request.product_name,
             request.price,
-            request.context
+            request.context,
+            use_cache=not request.no_cache
         )
         
         logger.info("가격 분석 완료")
@@ -179,6 +253,17 @@ async def analyze_price_endpoint(request: PriceAnalysisRequest):
         logger.error(f"가격 분석 실패: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/analyze-price/stream")
+async def analyze_price_stream(request: PriceAnalysisRequest):
+    """가격 분석 요청 (Server-Sent Events 스트리밍, 형식은 /chat/stream과 동일)"""
+    logger.info(f"가격 분석 스트리밍 요청: {request.product_name}, 가격: {request.price}")
+    return sse_response(chatbot.analyze_price_stream(
+        request.product_name,
+        request.price,
+        request.context,
+        use_cache=not request.no_cache
+    ))
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=9004)
@@ -2,10 +2,33 @@
 가격 분석 챗봇 서비스
 OpenAI API를 사용한 친절한 한국어 챗봇
 """
-from openai import OpenAI
+from openai import AsyncOpenAI
 import os
-from typing import List, Dict, Optional
+import time
+import httpx
+from typing import List, Dict, Optional, AsyncIterator
 import logging
+from app.config import (
+    OPENAI_TIMEOUT,
+    OPENAI_CONNECT_TIMEOUT,
+    OPENAI_MAX_RETRIES,
+    OPENAI_MAX_CONNECTIONS,
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+    CHAT_HISTORY_TOKEN_BUDGET,
+    CHAT_RECENT_MIN_MESSAGES,
+    CHAT_SUMMARY_CACHE_SIZE,
+    CHAT_SUMMARY_MODEL,
+    CHAT_SUMMARY_MAX_TOKENS,
+    CHAT_SUMMARY_CONCURRENCY,
+    PRICE_CACHE_ENABLED,
+    PRICE_CACHE_TTL,
+    PRICE_CACHE_MAX_ENTRIES,
+    PRICE_CACHE_BUCKET_PCT,
+    PRICE_CACHE_DB_PATH
+)
+from app.conversation_window import ConversationWindow, estimate_tokens
+from app.prompt_builder import build_messages
+from app.price_cache import PriceAnalysisCache
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
@@ -13,31 +36,208 @@ logger = logging.getLogger(__name__)
 
 # 클라이언트 생성 (환경변수에서 키 자동 인식)
 # API 키가 없으면 None으로 설정하고, 실제 사용 시에만 에러 발생
+# 비동기 클라이언트라 LLM 응답을 기다리는 동안 이벤트 루프가 다른 요청을 처리하며,
+# 모든 요청이 하나의 HTTP 연결 풀(keep-alive)을 공유함
 _openai_api_key = os.getenv("OPENAI_API_KEY")
 if _openai_api_key:
-    client = OpenAI(api_key=_openai_api_key)
+    client = AsyncOpenAI(
+        api_key=_openai_api_key,
+        max_retries=OPENAI_MAX_RETRIES,
+        http_client=httpx.AsyncClient(
+            timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS
+            )
+        )
+    )
 else:
     client = None
     logger.warning("OPENAI_API_KEY가 설정되지 않았습니다. OpenAI API 기능이 작동하지 않을 수 있습니다.")
 
+# 일반 대화에 사용하는 기본 시스템 메시지
+DEFAULT_SYSTEM_MESSAGE = "너는 친절한 한국을 여행 온 외국인 맞춤형 한국어 챗봇이야. 사용자의 질문에 정확하고 도움이 되는 답변을 제공해줘."
+
+# 가격 분석 요청에 사용하는 시스템 메시지
+PRICE_ANALYSIS_SYSTEM_MESSAGE = "너는 가격 분석 전문가야. 상품의 가격을 시장 가격, 경쟁사 가격, 가성비 등을 고려하여 분석해줘."
+
+# 응답이 max_tokens로 잘렸을 때 덧붙이는 안내
+TRUNCATED_NOTICE = "\n\n(응답이 길어서 일부가 잘렸을 수 있습니다.)"
+
+NO_API_KEY_MESSAGE = "죄송합니다. OpenAI API 키가 설정되지 않아 응답을 생성할 수 없습니다."
+
+# 오래된 대화 요약에 사용하는 시스템 메시지
+SUMMARY_SYSTEM_MESSAGE = (
+    "너는 대화 요약가야. 이전 요약과 이어지는 대화를 합쳐 하나의 간결한 한국어 요약으로 정리해줘. "
+    "사용자의 여행 일정, 선호, 제약 사항, 이미 답한 내용과 결정된 사항을 빠짐없이 남기고 인사말 등은 생략해줘."
+)
+
+
+async def _summarize(previous_summary: Optional[str], messages: List[Dict[str, str]]) -> str:
+    """
+    프롬프트에서 밀려난 대화를 이전 요약과 합쳐 누적 요약 생성
+    
+    Args:
+        previous_summary: 이전 요약 (없으면 None)
+        messages: 새로 요약에 포함할 대화 메시지
+    
+    Returns:
+        갱신된 요약
+    """
+    if client is None:
+        raise RuntimeError("OPENAI_API_KEY가 설정되지 않았습니다.")
+    
+    lines = [f"{'사용자' if msg.get('role') == 'user' else '챗봇'}: {msg.get('content', '')}" for msg in messages]
+    content = "이어지는 대화:\n" + "\n".join(lines)
+    if previous_summary:
+        content = f"이전 요약:\n{previous_summary}\n\n{content}"
+    
+    response = await client.chat.completions.create(
+        model=CHAT_SUMMARY_MODEL,
+        temperature=0,
+        max_tokens=CHAT_SUMMARY_MAX_TOKENS,
+        messages=[
+            {"role": "system", "content": SUMMARY_SYSTEM_MESSAGE},
+            {"role": "user", "content": content}
+        ]
+    )
+    return (response.choices[0].message.content or "").strip()
+
+
+# 대화별 토큰 예산 윈도우 (전역 챗봇 인스턴스와 함께 모든 요청이 공유)
+conversation_window = ConversationWindow(
+    _summarize,
+    token_budget=CHAT_HISTORY_TOKEN_BUDGET,
+    min_recent_messages=CHAT_RECENT_MIN_MESSAGES,
+    cache_size=CHAT_SUMMARY_CACHE_SIZE,
+    max_concurrent_summaries=CHAT_SUMMARY_CONCURRENCY
+)
+
+# 가격 분석 결과 캐시 (비활성화 시 None)
+price_cache = PriceAnalysisCache(
+    ttl=PRICE_CACHE_TTL,
+    max_entries=PRICE_CACHE_MAX_ENTRIES,
+    bucket_pct=PRICE_CACHE_BUCKET_PCT,
+    db_path=PRICE_CACHE_DB_PATH or None
+) if PRICE_CACHE_ENABLED else None
+
 class PriceAnalyzerChatbot:
-    """가격 분석 챗봇 클래스"""
+    """
+    가격 분석 챗봇 클래스
     
-    def __init__(self, model: str = "gpt-4o-mini", temperature: float = 0.7, max_tokens: int = 2000):
+    인스턴스 속성은 초기화 이후 바뀌지 않는 기본값이며, 요청별 설정(시스템 메시지, temperature, max_tokens)은
+    각 호출의 인자로만 전달합니다. 따라서 전역 인스턴스 하나를 여러 동시 요청이 공유해도 서로 영향을 주지 않습니다.
+    """
+    
+    def __init__(
+        self,
+        model: str = "gpt-4o-mini",
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        system_message: str = DEFAULT_SYSTEM_MESSAGE
+    ):
         """
         챗봇 초기화
         
         Args:
-            model: 사용할 모델 (기본값: gpt-3.5-turbo)
+            model: 사용할 모델 (기본값: gpt-4o-mini)
             temperature: 창의성 조절 (0.0 ~ 2.0, 기본값: 0.7)
-            max_tokens: 응답 길이 제한 (기본값: 300)
+            max_tokens: 응답 길이 제한 (기본값: 2000)
+            system_message: 기본 시스템 메시지
         """
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
-        self.system_message = "너는 친절한 한국을 여행 온 외국인 맞춤형 한국어 챗봇이야. 사용자의 질문에 정확하고 도움이 되는 답변을 제공해줘."
+        self.system_message = system_message
+    
+    def _completion_options(self, temperature: Optional[float] = None, max_tokens: Optional[int] = None) -> Dict:
+        """요청별 설정이 없으면 인스턴스 기본값을 사용한 OpenAI 요청 옵션"""
+        return {
+            "model": self.model,
+            "temperature": self.temperature if temperature is None else temperature,
+            "max_tokens": self.max_tokens if max_tokens is None else max_tokens
+        }
+    
+    def _build_messages(
+        self,
+        user_message: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        user_profile: Optional[Dict[str, str]] = None,
+        context_info: Optional[Dict] = None,
+        system_message: Optional[str] = None,
+        history_summary: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """
+        OpenAI 요청 메시지 구성 (순서와 블록 렌더링은 prompt_builder 참고)
+        
+        Args:
+            user_message: 사용자 메시지
+            conversation_history: 대화 이력 (선택사항)
+            user_profile: 사용자 프로필 정보 (선택사항)
+            context_info: 현재 위치 및 날씨 정보 (선택사항)
+            system_message: 이 요청에만 사용할 시스템 메시지 (없으면 self.system_message)
+            history_summary: 토큰 예산 밖으로 밀려난 오래된 대화의 요약 (선택사항)
         
-    def chat(self, user_message: str, conversation_history: Optional[List[Dict[str, str]]] = None, user_profile: Optional[Dict[str, str]] = None, context_info: Optional[Dict] = None) -> str:
+        Returns:
+            고정 시스템 메시지, 사용자 프로필, 이전 대화 요약, 대화 이력, 위치/날씨, 사용자 메시지 순의 메시지 리스트
+        """
+        return build_messages(
+            system_message or self.system_message,
+            user_message,
+            conversation_history,
+            user_profile,
+            context_info,
+            history_summary
+        )
+    
+    @staticmethod
+    def _error_message(e: Exception) -> str:
+        """OpenAI 호출 오류를 사용자에게 보여줄 메시지로 변환"""
+        error_str = str(e)
+        
+        # OpenAI API 키 오류 처리
+        if "invalid_api_key" in error_str.lower() or "incorrect api key" in error_str.lower() or "401" in error_str:
+            return "죄송합니다. OpenAI API 키 설정에 문제가 있습니다. 관리자에게 문의해주세요."
+        
+        # Rate limit 오류 처리
+        if "rate limit" in error_str.lower() or "429" in error_str:
+            return "죄송합니다. 요청이 너무 많습니다. 잠시 후 다시 시도해주세요."
+        
+        # 기타 오류는 간단한 메시지로
+        return "죄송합니다. 일시적인 오류가 발생했습니다. 잠시 후 다시 시도해주세요."
+    
+    def _prepare_messages(
+        self,
+        user_message: str,
+        conversation_history: Optional[List[Dict[str, str]]],
+        user_profile: Optional[Dict[str, str]],
+        context_info: Optional[Dict],
+        system_message: Optional[str],
+        conversation_id: Optional[str]
+    ) -> List[Dict[str, str]]:
+        """대화 이력을 토큰 예산에 맞게 자르고(오래된 부분은 요약) 요청 메시지 구성"""
+        history_summary = None
+        if conversation_history and isinstance(conversation_history, list):
+            history_summary, conversation_history = conversation_window.apply(
+                conversation_history,
+                conversation_id,
+                reserved_tokens=estimate_tokens(user_message)
+            )
+        return self._build_messages(
+            user_message, conversation_history, user_profile, context_info, system_message, history_summary
+        )
+    
+    async def chat(
+        self,
+        user_message: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        user_profile: Optional[Dict[str, str]] = None,
+        context_info: Optional[Dict] = None,
+        system_message: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        conversation_id: Optional[str] = None
+    ) -> str:
         """
         챗봇과 대화
         
@@ -46,125 +246,165 @@ class PriceAnalyzerChatbot:
             conversation_history: 대화 이력 (선택사항)
             user_profile: 사용자 프로필 정보 (선택사항)
             context_info: 현재 위치 및 날씨 정보 (선택사항)
+            system_message: 이 요청에만 사용할 시스템 메시지 (없으면 기본값)
+            temperature: 이 요청에만 사용할 temperature (없으면 기본값)
+            max_tokens: 이 요청에만 사용할 응답 길이 제한 (없으면 기본값)
+            conversation_id: 대화 ID (오래된 대화 요약을 재사용하는 키, 없으면 대화 앞부분으로 식별)
         
         Returns:
             챗봇의 응답 메시지
         """
         try:
-            # 시스템 메시지 구성 (사용자 프로필, 위치, 날씨 정보 포함)
-            system_message = self.system_message
-            context_parts = []
-            
-            # 사용자 프로필 정보 추가
-            if user_profile:
-                profile_parts = []
-                
-                if user_profile.get('gender'):
-                    profile_parts.append(f"성별: {user_profile['gender']}")
-                
-                if user_profile.get('age'):
-                    profile_parts.append(f"생년월일: {user_profile['age']}")
-                
-                if user_profile.get('nationality'):
-                    profile_parts.append(f"국적/거주지: {user_profile['nationality']}")
-                
-                if user_profile.get('religion'):
-                    profile_parts.append(f"종교: {user_profile['religion']}")
-                
-                if user_profile.get('dietary'):
-                    profile_parts.append(f"식이 제한: {user_profile['dietary']}")
-                
-                if profile_parts:
-                    context_parts.append("사용자 정보:")
-                    context_parts.extend(profile_parts)
-            
-            # 현재 위치 정보 추가
-            if context_info and context_info.get('location'):
-                location = context_info['location']
-                context_parts.append(f"\n현재 위치: 위도 {location.get('lat', 'N/A')}, 경도 {location.get('lng', 'N/A')}")
-            
-            # 날씨 정보 추가
-            if context_info and context_info.get('weather'):
-                weather = context_info['weather']
-                weather_text = f"현재 날씨: {weather.get('city', '알 수 없음')} 지역, {weather.get('temp', 'N/A')}°C, {weather.get('description', '')}"
-                context_parts.append(weather_text)
-            
-            # 컨텍스트 정보가 있으면 시스템 메시지에 추가
-            if context_parts:
-                context_text = "\n".join(context_parts)
-                system_message = f"{self.system_message}\n\n{context_text}\n\n위 정보들을 종합적으로 고려하여 개인화되고 상황에 맞는 답변을 제공해줘."
-            
-            # 메시지 구성
-            messages = [
-                {"role": "system", "content": system_message}
-            ]
-            
-            # 대화 이력이 있으면 추가
-            if conversation_history:
-                # 대화 이력이 리스트인지 확인하고, 각 메시지의 형식 검증
-                if isinstance(conversation_history, list):
-                    for msg in conversation_history:
-                        if isinstance(msg, dict) and "role" in msg and "content" in msg:
-                            # role이 'system'이 아닌 경우만 추가 (system 메시지는 이미 있음)
-                            if msg["role"] != "system":
-                                messages.append({
-                                    "role": msg["role"],
-                                    "content": str(msg["content"])
-                                })
-                        else:
-                            logger.warning(f"잘못된 대화 이력 형식: {msg}")
-                else:
-                    logger.warning(f"대화 이력이 리스트가 아닙니다: {type(conversation_history)}")
-            
-            logger.info(f"전송할 메시지 개수: {len(messages)}")
-            
-            # 사용자 메시지 추가
-            messages.append({"role": "user", "content": user_message})
+            messages = self._prepare_messages(
+                user_message, conversation_history, user_profile, context_info, system_message, conversation_id
+            )
+            options = self._completion_options(temperature, max_tokens)
             
             # 클라이언트 확인
             if client is None:
                 error_msg = "OPENAI_API_KEY가 설정되지 않았습니다. 환경 변수를 확인해주세요."
                 logger.error(error_msg)
-                return "죄송합니다. OpenAI API 키가 설정되지 않아 응답을 생성할 수 없습니다."
-            
-            # 챗봇 호출
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens
-            )
-            
-            # 응답 추출
-            bot_response = response.choices[0].message.content
-            
-            # 응답이 잘렸는지 확인
-            if response.choices[0].finish_reason == "length":
-                logger.warning(f"응답이 max_tokens({self.max_tokens})로 인해 잘렸습니다.")
-                bot_response += "\n\n(응답이 길어서 일부가 잘렸을 수 있습니다.)"
-            
-            logger.info(f"사용자: {user_message[:100]}...")
-            logger.info(f"챗봇 응답 길이: {len(bot_response)} 문자")
-            logger.info(f"응답 완료 이유: {response.choices[0].finish_reason}")
+                return NO_API_KEY_MESSAGE
             
-            return bot_response
+            return await self._complete(messages, options)
             
         except Exception as e:
-            error_str = str(e)
             logger.error(f"챗봇 호출 실패: {e}", exc_info=True)
+            return self._error_message(e)
+    
+    async def _complete(self, messages: List[Dict[str, str]], options: Dict) -> str:
+        """OpenAI 호출 후 응답 텍스트 반환 (실패 시 예외를 그대로 전달)"""
+        response = await client.chat.completions.create(messages=messages, **options)
+        
+        # 응답 추출
+        bot_response = response.choices[0].message.content
+        
+        # 응답이 잘렸는지 확인
+        if response.choices[0].finish_reason == "length":
+            logger.warning(f"응답이 max_tokens({options['max_tokens']})로 인해 잘렸습니다.")
+            bot_response += TRUNCATED_NOTICE
+        
+        logger.info(f"사용자: {messages[-1]['content'][:100]}...")
+        logger.info(f"챗봇 응답 길이: {len(bot_response)} 문자")
+        logger.info(f"응답 완료 이유: {response.choices[0].finish_reason}")
+        self._log_usage(getattr(response, "usage", None))
+        
+        return bot_response
+    
+    async def chat_stream(
+        self,
+        user_message: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        user_profile: Optional[Dict[str, str]] = None,
+        context_info: Optional[Dict] = None,
+        system_message: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        conversation_id: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, str]]:
+        """
+        챗봇과 대화 (스트리밍)
+        
+        OpenAI 스트리밍 응답의 텍스트 조각을 생성되는 즉시 전달합니다.
+        오류가 나면 chat()과 같은 안내 메시지를 조각으로 보낸 뒤 finish_reason "error"로 끝냅니다.
+        
+        Args:
+            chat()과 동일
+        
+        Yields:
+            {"type": "delta", "content": 텍스트 조각} 반복 후 마지막에 {"type": "done", "finish_reason": 완료 이유}
+        """
+        started = time.perf_counter()
+        first_token_at = None
+        finish_reason = None
+        length = 0
+        
+        try:
+            messages = self._prepare_messages(
+                user_message, conversation_history, user_profile, context_info, system_message, conversation_id
+            )
+            options = self._completion_options(temperature, max_tokens)
             
-            # OpenAI API 키 오류 처리
-            if "invalid_api_key" in error_str.lower() or "incorrect api key" in error_str.lower() or "401" in error_str:
-                return "죄송합니다. OpenAI API 키 설정에 문제가 있습니다. 관리자에게 문의해주세요."
+            if client is None:
+                logger.error("OPENAI_API_KEY가 설정되지 않았습니다. 환경 변수를 확인해주세요.")
+                yield {"type": "delta", "content": NO_API_KEY_MESSAGE}
+                yield {"type": "done", "finish_reason": "error"}
+                return
             
-            # Rate limit 오류 처리
-            if "rate limit" in error_str.lower() or "429" in error_str:
-                return "죄송합니다. 요청이 너무 많습니다. 잠시 후 다시 시도해주세요."
+            stream = await client.chat.completions.create(
+                messages=messages,
+                **options,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            usage = None
+            async for chunk in stream:
+                # include_usage면 마지막 청크는 choices 없이 usage만 포함
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    length += len(choice.delta.content)
+                    yield {"type": "delta", "content": choice.delta.content}
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+            
+            # 응답이 잘렸는지 확인
+            if finish_reason == "length":
+                logger.warning(f"응답이 max_tokens({options['max_tokens']})로 인해 잘렸습니다.")
+                yield {"type": "delta", "content": TRUNCATED_NOTICE}
             
-            # 기타 오류는 간단한 메시지로
-            return "죄송합니다. 일시적인 오류가 발생했습니다. 잠시 후 다시 시도해주세요."
+            self._log_usage(usage)
+        
+        except Exception as e:
+            logger.error(f"챗봇 스트리밍 호출 실패: {e}", exc_info=True)
+            finish_reason = "error"
+            yield {"type": "delta", "content": self._error_message(e)}
+        
+        finally:
+            total_ms = (time.perf_counter() - started) * 1000
+            ttft = f"{(first_token_at - started) * 1000:.0f}ms" if first_token_at else "-"
+            logger.info(
+                f"스트리밍 응답 완료: 첫 토큰 {ttft}, 전체 {total_ms:.0f}ms, "
+                f"{length} 문자, 완료 이유: {finish_reason}"
+            )
+        
+        yield {"type": "done", "finish_reason": finish_reason or "stop"}
+    
+    @staticmethod
+    def _log_usage(usage):
+        """프롬프트 캐시 적중 토큰 수 기록 (OpenAI는 1024토큰 이상의 동일한 접두사를 자동 캐싱)"""
+        if usage is not None:
+            details = getattr(usage, "prompt_tokens_details", None)
+            cached_tokens = getattr(details, "cached_tokens", 0) or 0
+            logger.info(f"프롬프트 토큰: {usage.prompt_tokens} (캐시 적중 {cached_tokens})")
     
-    def analyze_price(self, product_name: str, price: Optional[float] = None, context: Optional[str] = None) -> str:
+    @staticmethod
+    def _price_message(product_name: str, price: Optional[float] = None, context: Optional[str] = None) -> str:
+        """가격 분석 질문 구성 (가격 구간은 캐시 키에만 쓰고, 질문에는 사용자가 입력한 가격을 그대로 넣음)"""
+        # 가격 정보가 있으면 포함
+        if price:
+            message = f"{product_name}의 가격이 {price:,}원인데, 이 가격이 적정한지 분석해줘."
+        else:
+            message = f"{product_name}의 가격을 분석해줘."
+        
+        # 추가 컨텍스트가 있으면 포함
+        if context:
+            message += f"\n추가 정보: {context}"
+        return message
+    
+    async def analyze_price(
+        self,
+        product_name: str,
+        price: Optional[float] = None,
+        context: Optional[str] = None,
+        use_cache: bool = True
+    ) -> str:
         """
         가격 분석 요청
         
@@ -172,37 +412,92 @@ class PriceAnalyzerChatbot:
             product_name: 상품명
             price: 가격 (선택사항)
             context: 추가 컨텍스트 (선택사항)
+            use_cache: 저장된 분석 결과 사용 여부 (False면 항상 새로 분석하고 결과를 저장하지 않음)
         
         Returns:
             가격 분석 결과
         """
-        # 가격 정보가 있으면 포함
-        if price:
-            message = f"{product_name}의 가격이 {price:,}원인데, 이 가격이 적정한지 분석해줘."
-        else:
-            message = f"{product_name}의 가격을 분석해줘."
+        if client is None:
+            logger.error("OPENAI_API_KEY가 설정되지 않았습니다. 환경 변수를 확인해주세요.")
+            return NO_API_KEY_MESSAGE
         
-        # 추가 컨텍스트가 있으면 포함
-        if context:
-            message += f"\n추가 정보: {context}"
+        cached = price_cache is not None and use_cache
         
-        # 시스템 메시지를 가격 분석 전문가로 변경
-        original_system = self.system_message
-        self.system_message = "너는 가격 분석 전문가야. 상품의 가격을 시장 가격, 경쟁사 가격, 가성비 등을 고려하여 분석해줘."
+        # 공유 인스턴스를 바꾸지 않고 이 요청에만 가격 분석 전문가 시스템 메시지 사용
+        messages = self._build_messages(
+            self._price_message(product_name, price, context),
+            system_message=PRICE_ANALYSIS_SYSTEM_MESSAGE
+        )
+        options = self._completion_options()
         
         try:
-            response = self.chat(message)
-            return response
+            if not cached:
+                return await self._complete(messages, options)
+            # 오류는 예외로 전달되므로 성공한 분석만 저장됨
+            return await price_cache.get_or_compute(
+                price_cache.make_key(product_name, price, context),
+                lambda: self._complete(messages, options)
+            )
+        except Exception as e:
+            logger.error(f"가격 분석 호출 실패: {e}", exc_info=True)
+            return self._error_message(e)
+    
+    async def analyze_price_stream(
+        self,
+        product_name: str,
+        price: Optional[float] = None,
+        context: Optional[str] = None,
+        use_cache: bool = True
+    ) -> AsyncIterator[Dict[str, str]]:
+        """
+        가격 분석 요청 (스트리밍, 반환 형식은 chat_stream과 동일)
+        
+        저장된 결과나 같은 요청의 진행 중인 분석이 있으면 그 결과를 한 조각으로 보내고, 없으면 스트리밍으로
+        분석합니다. 정상 완료("stop")된 결과만 저장하며, 잘리거나 실패한 분석은 저장하지 않고 기다리던 요청이
+        직접 다시 분석합니다.
+        """
+        lead = None
+        if price_cache is not None and use_cache:
+            key = price_cache.make_key(product_name, price, context)
+            cached, lead = await price_cache.wait_or_lead(key)
+            if lead is None:
+                yield {"type": "delta", "content": cached}
+                yield {"type": "done", "finish_reason": "stop"}
+                return
+        
+        parts = []
+        try:
+            async for event in self.chat_stream(
+                self._price_message(product_name, price, context),
+                system_message=PRICE_ANALYSIS_SYSTEM_MESSAGE
+            ):
+                if event["type"] == "delta":
+                    parts.append(event["content"])
+                elif lead is not None and event["finish_reason"] == "stop":
+                    analysis = "".join(parts)
+                    await price_cache.set(key, analysis)
+                    price_cache.resolve(key, lead, analysis)
+                yield event
         finally:
-            # 원래 시스템 메시지로 복원
-            self.system_message = original_system
+            # 클라이언트 연결 종료, 잘린 응답, 오류 등으로 저장하지 못한 경우
+            if lead is not None:
+                price_cache.abandon(key, lead)
 
 
 # 전역 챗봇 인스턴스
 chatbot = PriceAnalyzerChatbot()
 
 
-def simple_chat(user_message: str) -> str:
+async def close_client():
+    """진행 중인 대화 요약 작업 취소, 가격 분석 캐시 및 공유 HTTP 연결 풀 종료 (서비스 종료 시 호출)"""
+    await conversation_window.close()
+    if price_cache is not None:
+        price_cache.close()
+    if client is not None:
+        await client.close()
+
+
+async def simple_chat(user_message: str) -> str:
     """
     간단한 챗봇 호출 함수
     
@@ -212,10 +507,15 @@ def simple_chat(user_message: str) -> str:
     Returns:
         챗봇 응답
     """
-    return chatbot.chat(user_message)
+    return await chatbot.chat(user_message)
 
 
-def analyze_price(product_name: str, price: Optional[float] = None, context: Optional[str] = None) -> str:
+async def analyze_price(
+    product_name: str,
+    price: Optional[float] = None,
+    context: Optional[str] = None,
+    use_cache: bool = True
+) -> str:
     """
     가격 분석 함수
     
@@ -223,31 +523,39 @@ def analyze_price(product_name: str, price: Optional[float] = None, context: Opt
         product_name: 상품명
         price: 가격 (선택사항)
         context: 추가 컨텍스트 (선택사항)
+        use_cache: 저장된 분석 결과 사용 여부
     
     Returns:
         가격 분석 결과
     """
-    return chatbot.analyze_price(product_name, price, context)
+    return await chatbot.analyze_price(product_name, price, context, use_cache)
 
 
 # 테스트 코드
 if __name__ == "__main__":
-    # 기본 챗봇 테스트
-    print("=== 기본 챗봇 테스트 ===")
-    response = simple_chat("안녕, 오늘 날씨 어때?")
-    print(f"응답: {response}\n")
-    
-    # 가격 분석 테스트
-    print("=== 가격 분석 테스트 ===")
-    analysis = analyze_price("아이폰 15", 1200000, "최신 스마트폰, 애플 제품")
-    print(f"분석 결과: {analysis}\n")
-    
-    # 대화 이력 테스트
-    print("=== 대화 이력 테스트 ===")
-    history = [
-        {"role": "user", "content": "안녕하세요"},
-        {"role": "assistant", "content": "안녕하세요! 무엇을 도와드릴까요?"}
-    ]
-    response = chatbot.chat("제 이름은 홍길동이에요", conversation_history=history)
-    print(f"응답: {response}")
+    import asyncio
+    
+    async def main():
+        # 기본 챗봇 테스트
+        print("=== 기본 챗봇 테스트 ===")
+        response = await simple_chat("안녕, 오늘 날씨 어때?")
+        print(f"응답: {response}\n")
+        
+        # 가격 분석 테스트
+        print("=== 가격 분석 테스트 ===")
+        analysis = await analyze_price("아이폰 15", 1200000, "최신 스마트폰, 애플 제품")
+        print(f"분석 결과: {analysis}\n")
+        
+        # 대화 이력 테스트
+        print("=== 대화 이력 테스트 ===")
+        history = [
+            {"role": "user", "content": "안녕하세요"},
+            {"role": "assistant", "content": "안녕하세요! 무엇을 도와드릴까요?"}
+        ]
+        response = await chatbot.chat("제 이름은 홍길동이에요", conversation_history=history)
+        print(f"응답: {response}")
+        
+        await close_client()
+    
+    asyncio.run(main())
 
@@ -0,0 +1,263 @@
+"""
+가격 분석 결과 캐시 모듈
+같은 상품·비슷한 가격·같은 추가 정보의 분석 요청은 LLM을 다시 호출하지 않고 저장된 결과를 반환
+
+- 키: 정규화한 상품명 + 가격 구간 + 추가 정보 해시
+- 메모리 LRU (최대 개수, TTL) + 선택적 SQLite 저장소 (재시작 후에도 유지, 여러 워커 간 공유)
+- 같은 키의 동시 요청은 하나의 LLM 호출 결과를 함께 기다림
+"""
+import re
+import math
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Optional, Dict, Callable, Awaitable, Tuple, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+def normalize_product_name(product_name: str) -> str:
+    """대소문자, 전각/반각, 공백 차이를 없앤 상품명 ("아이폰  15" == "아이폰 15", "iPhone" == "IPHONE")"""
+    text = unicodedata.normalize("NFKC", product_name).lower()
+    return re.sub(r"\s+", " ", text).strip()
+
+def price_bucket(price: Optional[float], bucket_pct: float) -> str:
+    """
+    가격 구간 (bucket_pct% 폭의 로그 구간이라 가격대와 관계없이 같은 비율의 차이를 같은 구간으로 묶음)
+    
+    Args:
+        price: 가격 (없으면 "-")
+        bucket_pct: 구간 폭 (%, 0 이하면 가격이 정확히 같을 때만 같은 구간)
+    """
+    if not price or price <= 0:
+        return "-"
+    if bucket_pct <= 0:
+        return f"={price:g}"
+    return str(math.floor(math.log(price) / math.log1p(bucket_pct / 100)))
+
+
+class _ComputeCancelled(Exception):
+    """같은 키의 결과를 생성하던 요청이 취소됨 (기다리던 요청은 직접 다시 생성)"""
+
+
+class PriceAnalysisCache:
+    """가격 분석 결과 캐시 (메모리 LRU + 선택적 SQLite)"""
+    
+    def __init__(
+        self,
+        ttl: float = 21600,
+        max_entries: int = 1000,
+        bucket_pct: float = 5.0,
+        db_path: Optional[str] = None
+    ):
+        """
+        Args:
+            ttl: 결과 유효 시간 (초)
+            max_entries: 메모리에 보관할 최대 결과 수 (오래 쓰지 않은 결과부터 제거)
+            bucket_pct: 같은 결과를 재사용할 가격 구간 폭 (%)
+            db_path: SQLite 파일 경로 (없으면 메모리에만 보관)
+        """
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.bucket_pct = bucket_pct
+        self.db_path = db_path
+        
+        # {키: (저장 시각, 분석 결과)}
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        # 진행 중인 LLM 호출 {키: Future}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS price_analysis_cache (
+                    key TEXT PRIMARY KEY,
+                    analysis TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_price_analysis_cache_created_at ON price_analysis_cache(created_at)"
+            )
+            self._conn.commit()
+        
+        self.stats = {"hits": 0, "db_hits": 0, "misses": 0, "coalesced": 0}
+    
+    def make_key(self, product_name: str, price: Optional[float] = None, context: Optional[str] = None) -> str:
+        """상품명, 가격 구간, 추가 정보 해시로 만든 캐시 키"""
+        context_hash = ""
+        if context and context.strip():
+            normalized = re.sub(r"\s+", " ", unicodedata.normalize("NFKC", context)).strip().lower()
+            context_hash = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+        return f"{normalize_product_name(product_name)}|{price_bucket(price, self.bucket_pct)}|{context_hash}"
+    
+    async def get(self, key: str) -> Optional[str]:
+        """유효한 캐시 결과 (메모리 → SQLite 순으로 조회, 없으면 None)"""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            del self._entries[key]
+        
+        if self._conn is not None:
+            row = await asyncio.to_thread(self._db_get, key, now - self.ttl)
+            if row is not None:
+                self._remember(key, row[0], row[1])
+                self.stats["db_hits"] += 1
+                return row[1]
+        
+        self.stats["misses"] += 1
+        return None
+    
+    async def set(self, key: str, analysis: str):
+        """분석 결과 저장"""
+        created_at = time.time()
+        self._remember(key, created_at, analysis)
+        if self._conn is not None:
+            try:
+                await asyncio.to_thread(self._db_set, key, analysis, created_at)
+            except sqlite3.Error as e:
+                logger.warning(f"가격 분석 캐시 저장 실패: {e}")
+    
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """
+        캐시 결과를 반환하고, 없으면 compute()로 생성해 저장
+        
+        같은 키로 동시에 들어온 요청은 하나의 compute() 결과를 함께 기다립니다.
+        compute()가 예외를 던지면 저장하지 않고 기다리던 요청 모두에 예외를 전달하며,
+        compute()를 실행하던 요청이 취소되면 기다리던 요청 중 하나가 compute()를 다시 실행합니다.
+        """
+        cached, lead = await self.wait_or_lead(key)
+        if lead is None:
+            return cached
+        
+        try:
+            analysis = await compute()
+            await self.set(key, analysis)
+        except asyncio.CancelledError:
+            self.abandon(key, lead)
+            raise
+        except Exception as e:
+            self.abandon(key, lead, e)
+            raise
+        self.resolve(key, lead, analysis)
+        return analysis
+    
+    async def wait_or_lead(self, key: str) -> Tuple[Optional[str], Optional[asyncio.Future]]:
+        """
+        캐시 결과나 같은 키로 진행 중인 생성 결과를 기다려 반환하고, 둘 다 없으면 이 요청이 생성을 맡음
+        
+        스트리밍처럼 compute() 하나로 감쌀 수 없는 생성에 사용합니다. 생성을 맡은 요청은 반드시
+        resolve() (저장할 결과) 또는 abandon() (저장하지 않음)으로 끝내야 합니다.
+        
+        Returns:
+            (결과, None) 또는 생성을 맡았으면 (None, resolve/abandon에 넘길 future)
+        """
+        checked_cache = False
+        while True:
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                self.stats["coalesced"] += 1
+                try:
+                    return await asyncio.shield(inflight), None
+                except _ComputeCancelled:
+                    continue
+            
+            if not checked_cache:
+                checked_cache = True
+                cached = await self.get(key)
+                if cached is not None:
+                    return cached, None
+                # get()이 SQLite를 조회하는 동안 같은 키의 계산이 시작됐을 수 있음
+                continue
+            
+            lead = asyncio.get_running_loop().create_future()
+            self._inflight[key] = lead
+            return None, lead
+    
+    def resolve(self, key: str, lead: asyncio.Future, analysis: str):
+        """맡은 생성의 결과를 기다리던 요청에 전달 (저장은 호출 측에서 set()으로 먼저 수행)"""
+        self._release(key, lead)
+        if not lead.done():
+            lead.set_result(analysis)
+    
+    def abandon(self, key: str, lead: asyncio.Future, error: Optional[Exception] = None):
+        """
+        맡은 생성을 저장하지 않고 종료
+        
+        error가 있으면 기다리던 요청에 그 예외를 전달하고, 없으면 (취소, 잘린 응답 등)
+        기다리던 요청 중 하나가 다시 생성합니다.
+        """
+        self._release(key, lead)
+        if not lead.done():
+            lead.set_exception(error or _ComputeCancelled())
+            # 기다리는 요청이 없을 때 "exception was never retrieved" 경고 방지
+            lead.exception()
+    
+    def _release(self, key: str, lead: asyncio.Future):
+        if self._inflight.get(key) is lead:
+            del self._inflight[key]
+    
+    async def clear(self):
+        """모든 캐시 결과 삭제"""
+        self._entries.clear()
+        if self._conn is not None:
+            await asyncio.to_thread(self._db_clear)
+    
+    def info(self) -> Dict[str, Any]:
+        """캐시 설정 및 통계"""
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "bucket_pct": self.bucket_pct,
+            "persistent": self._conn is not None,
+            **self.stats
+        }
+    
+    def close(self):
+        if self._conn is not None:
+            with self._db_lock:
+                self._conn.close()
+                self._conn = None
+    
+    def _remember(self, key: str, created_at: float, analysis: str):
+        self._entries[key] = (created_at, analysis)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _db_get(self, key: str, min_created_at: float) -> Optional[Tuple[float, str]]:
+        with self._db_lock:
+            return self._conn.execute(
+                "SELECT created_at, analysis FROM price_analysis_cache WHERE key = ? AND created_at > ?",
+                (key, min_created_at)
+            ).fetchone()
+    
+    def _db_set(self, key: str, analysis: str, created_at: float):
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO price_analysis_cache (key, analysis, created_at) VALUES (?, ?, ?)",
+                (key, analysis, created_at)
+            )
+            # 만료된 결과 정리
+            self._conn.execute(
+                "DELETE FROM price_analysis_cache WHERE created_at <= ?",
+                (created_at - self.ttl,)
+            )
+            self._conn.commit()
+    
+    def _db_clear(self):
+        with self._db_lock:
+            self._conn.execute("DELETE FROM price_analysis_cache")
+            self._conn.commit()
@@ -0,0 +1,150 @@
+"""
+프롬프트 구성 모듈
+요청 메시지를 바뀌는 빈도 순으로 배치해 OpenAI 프롬프트 캐시(동일 접두사 자동 캐싱)가 적중하도록 구성
+
+    [고정 시스템 메시지] [사용자 프로필] [이전 대화 요약] [대화 이력] [현재 위치/날씨] [사용자 메시지]
+
+사용자 프로필 블록은 세션 동안 바뀌지 않으므로 프로필 지문별로 한 번만 렌더링해 LRU 캐시에 보관하고,
+매 요청 바뀌는 위치/날씨 블록은 대화 이력 뒤에 별도 메시지로 두어 앞쪽 접두사가 바이트 단위로 유지되게 합니다.
+"""
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
+import logging
+from app.config import PROMPT_PROFILE_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# 프롬프트에 포함하는 사용자 프로필 항목 (순서대로 렌더링)
+PROFILE_FIELDS = (
+    ("gender", "성별"),
+    ("age", "생년월일"),
+    ("nationality", "국적/거주지"),
+    ("religion", "종교"),
+    ("dietary", "식이 제한")
+)
+
+PROFILE_INSTRUCTION = "위 사용자 정보를 고려하여 개인화된 답변을 제공해줘."
+SITUATION_INSTRUCTION = "위 상황 정보를 고려하여 상황에 맞는 답변을 제공해줘."
+
+def profile_fingerprint(user_profile: Optional[Dict[str, str]]) -> Tuple[Tuple[str, str], ...]:
+    """프롬프트에 쓰이는 프로필 항목만 추린 지문 (다른 항목이 달라도 같은 블록을 재사용)"""
+    if not user_profile:
+        return ()
+    return tuple(
+        (field, str(user_profile[field]))
+        for field, _ in PROFILE_FIELDS
+        if user_profile.get(field)
+    )
+
+@lru_cache(maxsize=PROMPT_PROFILE_CACHE_SIZE)
+def _render_profile(fingerprint: Tuple[Tuple[str, str], ...]) -> str:
+    labels = dict(PROFILE_FIELDS)
+    lines = ["사용자 정보:"]
+    lines.extend(f"{labels[field]}: {value}" for field, value in fingerprint)
+    return "\n".join(lines) + f"\n\n{PROFILE_INSTRUCTION}"
+
+def render_profile_block(user_profile: Optional[Dict[str, str]]) -> Optional[str]:
+    """
+    사용자 프로필 블록 (프로필 지문별 LRU 캐시)
+    
+    Args:
+        user_profile: 사용자 프로필 정보
+    
+    Returns:
+        렌더링된 블록, 포함할 항목이 없으면 None
+    """
+    fingerprint = profile_fingerprint(user_profile)
+    if not fingerprint:
+        return None
+    return _render_profile(fingerprint)
+
+def render_situation_block(context_info: Optional[Dict]) -> Optional[str]:
+    """
+    현재 위치 및 날씨 블록 (요청마다 바뀌므로 캐시하지 않음)
+    
+    Args:
+        context_info: 현재 위치 및 날씨 정보
+    
+    Returns:
+        렌더링된 블록, 포함할 정보가 없으면 None
+    """
+    if not context_info:
+        return None
+    
+    lines = []
+    if context_info.get('location'):
+        location = context_info['location']
+        lines.append(f"현재 위치: 위도 {location.get('lat', 'N/A')}, 경도 {location.get('lng', 'N/A')}")
+    
+    if context_info.get('weather'):
+        weather = context_info['weather']
+        lines.append(f"현재 날씨: {weather.get('city', '알 수 없음')} 지역, {weather.get('temp', 'N/A')}°C, {weather.get('description', '')}")
+    
+    if not lines:
+        return None
+    return "\n".join(lines) + f"\n\n{SITUATION_INSTRUCTION}"
+
+def build_messages(
+    system_message: str,
+    user_message: str,
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+    user_profile: Optional[Dict[str, str]] = None,
+    context_info: Optional[Dict] = None,
+    history_summary: Optional[str] = None
+) -> List[Dict[str, str]]:
+    """
+    OpenAI 요청 메시지 구성 (바뀌지 않는 부분부터 배치)
+    
+    Args:
+        system_message: 고정 시스템 메시지
+        user_message: 사용자 메시지
+        conversation_history: 대화 이력 (선택사항)
+        user_profile: 사용자 프로필 정보 (선택사항)
+        context_info: 현재 위치 및 날씨 정보 (선택사항)
+        history_summary: 토큰 예산 밖으로 밀려난 오래된 대화의 요약 (선택사항)
+    
+    Returns:
+        메시지 리스트
+    """
+    messages = [{"role": "system", "content": system_message}]
+    
+    profile_block = render_profile_block(user_profile)
+    if profile_block:
+        messages.append({"role": "system", "content": profile_block})
+    
+    # 윈도우 밖의 오래된 대화는 요약으로 대체
+    if history_summary:
+        messages.append({"role": "system", "content": f"이전 대화 요약:\n{history_summary}"})
+    
+    # 대화 이력이 있으면 추가
+    if conversation_history:
+        # 대화 이력이 리스트인지 확인하고, 각 메시지의 형식 검증
+        if isinstance(conversation_history, list):
+            for msg in conversation_history:
+                if isinstance(msg, dict) and "role" in msg and "content" in msg:
+                    # role이 'system'이 아닌 경우만 추가 (system 메시지는 이미 있음)
+                    if msg["role"] != "system":
+                        messages.append({
+                            "role": msg["role"],
+                            "content": str(msg["content"])
+                        })
+                else:
+                    logger.warning(f"잘못된 대화 이력 형식: {msg}")
+        else:
+            logger.warning(f"대화 이력이 리스트가 아닙니다: {type(conversation_history)}")
+    
+    # 매 요청 바뀌는 위치/날씨는 대화 이력 뒤에 두어 앞쪽 접두사의 캐시 적중을 깨지 않도록 함
+    situation_block = render_situation_block(context_info)
+    if situation_block:
+        messages.append({"role": "system", "content": situation_block})
+    
+    logger.info(f"전송할 메시지 개수: {len(messages)}")
+    
+    # 사용자 메시지 추가
+    messages.append({"role": "user", "content": user_message})
+    return messages
+
+def cache_info() -> Dict[str, int]:
+    """프로필 블록 캐시 통계"""
+    info = _render_profile.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
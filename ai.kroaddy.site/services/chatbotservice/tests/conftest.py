@@ -0,0 +1,8 @@
+"""
+챗봇 서비스 테스트 공통 설정
+chatbotservice 디렉토리에서 `python -m pytest -q tests`로 실행 (app 패키지를 서비스 루트 기준으로 import)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,234 @@
+"""PriceAnalysisCache 테스트 (키, TTL/LRU, SQLite 저장소, 동시 요청 병합)"""
+import time
+import asyncio
+import pytest
+from app.price_cache import PriceAnalysisCache, normalize_product_name, price_bucket
+
+
+def _counting_compute(result="분석 결과", delay=0.05, calls=None):
+    """호출 횟수를 calls에 기록하고 delay 후 result를 반환하는 compute 함수"""
+    async def compute():
+        calls.append(time.monotonic())
+        await asyncio.sleep(delay)
+        return result
+    
+    return compute
+
+
+def test_product_name_normalization():
+    assert normalize_product_name("  아이폰   15 ") == normalize_product_name("아이폰 15")
+    assert normalize_product_name("iPhone") == normalize_product_name("IPHONE")
+    # 전각 문자는 반각으로
+    assert normalize_product_name("ＩＰＨＯＮＥ１５") == "iphone15"
+
+
+def test_key_groups_similar_prices_and_contexts():
+    cache = PriceAnalysisCache(bucket_pct=5.0)
+    # 5% 구간: 1,160,000과 1,190,000은 같은 구간, 1,210,000은 다음 구간
+    key = cache.make_key("아이폰 15", 1_160_000, "중고,  배터리 90%")
+    
+    assert cache.make_key("아이폰  15", 1_190_000, "중고, 배터리 90%") == key
+    assert cache.make_key("아이폰 15", 1_210_000, "중고, 배터리 90%") != key
+    assert cache.make_key("아이폰 15", 1_200_000, "새 제품") != key
+    assert cache.make_key("아이폰 15", 1_200_000) != key
+    # 가격이 없으면 별도 구간
+    assert cache.make_key("아이폰 15") == cache.make_key("아이폰 15", None, "  ")
+
+
+def test_price_bucket_edges():
+    assert price_bucket(None, 5.0) == "-"
+    assert price_bucket(0, 5.0) == "-"
+    assert price_bucket(1000, 0) == "=1000"
+    # 로그 구간이라 가격대와 관계없이 같은 비율의 차이는 같은 구간 수만큼 떨어짐
+    assert int(price_bucket(2_000, 5.0)) - int(price_bucket(1_000, 5.0)) == int(price_bucket(2_000_000, 5.0)) - int(price_bucket(1_000_000, 5.0))
+
+
+def test_ttl_and_lru_in_memory():
+    async def run():
+        cache = PriceAnalysisCache(ttl=0.05, max_entries=2)
+        await cache.set("a", "A")
+        await cache.set("b", "B")
+        assert await cache.get("a") == "A"
+        # a를 최근에 사용했으므로 c를 넣으면 b가 밀려남
+        await cache.set("c", "C")
+        assert await cache.get("b") is None
+        assert await cache.get("a") == "A"
+        
+        await asyncio.sleep(0.06)
+        assert await cache.get("a") is None
+        return cache.info()
+    
+    info = asyncio.run(run())
+    assert info["size"] == 1
+    assert info["hits"] == 2
+    assert info["misses"] == 2
+
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "price_cache.db")
+    
+    async def run():
+        cache = PriceAnalysisCache(ttl=60, db_path=path)
+        await cache.set("k", "저장된 분석")
+        cache.close()
+        
+        restarted = PriceAnalysisCache(ttl=60, db_path=path)
+        try:
+            assert await restarted.get("k") == "저장된 분석"
+            # SQLite에서 읽은 결과는 메모리에도 올라감
+            assert await restarted.get("k") == "저장된 분석"
+            assert restarted.stats["db_hits"] == 1 and restarted.stats["hits"] == 1
+            
+            # TTL이 지난 행은 없는 것으로 취급
+            restarted.ttl = 0.0
+            restarted._entries.clear()
+            assert await restarted.get("k") is None
+            
+            await restarted.clear()
+            restarted.ttl = 60
+            assert await restarted.get("k") is None
+        finally:
+            restarted.close()
+    
+    asyncio.run(run())
+
+
+def test_concurrent_requests_share_one_compute():
+    calls = []
+    
+    async def run():
+        cache = PriceAnalysisCache()
+        compute = _counting_compute(calls=calls)
+        results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+        # 완료 후에는 캐시에서 반환
+        results.append(await cache.get_or_compute("k", compute))
+        return results, cache.stats
+    
+    results, stats = asyncio.run(run())
+    assert results == ["분석 결과"] * 6
+    assert len(calls) == 1
+    assert stats["coalesced"] == 4
+
+
+def test_compute_error_reaches_waiters_and_is_not_cached():
+    calls = []
+    
+    async def run():
+        cache = PriceAnalysisCache()
+        
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            raise RuntimeError("LLM 오류")
+        
+        results = await asyncio.gather(
+            *(cache.get_or_compute("k", failing) for _ in range(3)),
+            return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        # 실패한 결과는 저장하지 않으므로 다음 요청은 다시 생성
+        return await cache.get_or_compute("k", _counting_compute(calls=calls, delay=0))
+    
+    assert asyncio.run(run()) == "분석 결과"
+    assert len(calls) == 2
+
+
+def test_cancelled_leader_hands_over_to_waiter():
+    calls = []
+    
+    async def run():
+        cache = PriceAnalysisCache()
+        compute = _counting_compute(calls=calls, delay=0.05)
+        leader = asyncio.create_task(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(cache.get_or_compute("k", compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        # 기다리던 요청은 CancelledError 대신 다시 생성한 결과를 받음
+        return await asyncio.gather(*waiters)
+    
+    assert asyncio.run(run()) == ["분석 결과"] * 3
+    assert len(calls) == 2
+
+
+def test_streaming_lead_is_shared_and_abandon_hands_over():
+    async def run():
+        cache = PriceAnalysisCache()
+        cached, lead = await cache.wait_or_lead("k")
+        assert cached is None and lead is not None
+        
+        waiter = asyncio.create_task(cache.wait_or_lead("k"))
+        await asyncio.sleep(0.01)
+        # 잘린 응답 등으로 저장하지 않으면 기다리던 요청이 생성을 넘겨받음
+        cache.abandon("k", lead)
+        cached, next_lead = await waiter
+        assert cached is None and next_lead is not None
+        
+        waiter = asyncio.create_task(cache.wait_or_lead("k"))
+        await asyncio.sleep(0.01)
+        await cache.set("k", "스트리밍 결과")
+        cache.resolve("k", next_lead, "스트리밍 결과")
+        # resolve 후의 abandon은 아무 영향 없음
+        cache.abandon("k", next_lead)
+        return await waiter, await cache.wait_or_lead("k")
+    
+    shared, later = asyncio.run(run())
+    assert shared == ("스트리밍 결과", None)
+    assert later == ("스트리밍 결과", None)
+
+
+def _fake_stream(calls, finish_reason="stop", delay=0.05):
+    """chat_stream 대체 (조각 두 개 후 finish_reason으로 종료)"""
+    async def chat_stream(self, user_message, **kwargs):
+        calls.append(user_message)
+        yield {"type": "delta", "content": "적정한 "}
+        await asyncio.sleep(delay)
+        yield {"type": "delta", "content": "가격입니다."}
+        yield {"type": "done", "finish_reason": finish_reason}
+    
+    return chat_stream
+
+
+async def _collect(stream) -> str:
+    return "".join([event["content"] async for event in stream if event["type"] == "delta"])
+
+
+def test_analyze_price_stream_coalesces_and_caches_only_stop(monkeypatch):
+    import app.price_analyzer as price_analyzer
+    
+    calls = []
+    monkeypatch.setattr(price_analyzer, "price_cache", PriceAnalysisCache())
+    monkeypatch.setattr(price_analyzer.PriceAnalyzerChatbot, "chat_stream", _fake_stream(calls))
+    chatbot = price_analyzer.PriceAnalyzerChatbot()
+    
+    async def run():
+        return await asyncio.gather(*(
+            _collect(chatbot.analyze_price_stream("아이폰 15", 1_200_000)) for _ in range(3)
+        ))
+    
+    assert asyncio.run(run()) == ["적정한 가격입니다."] * 3
+    assert len(calls) == 1
+    # 질문에는 입력한 가격 그대로
+    assert "1,200,000원" in calls[0]
+
+
+def test_analyze_price_stream_does_not_cache_truncated(monkeypatch):
+    import app.price_analyzer as price_analyzer
+    
+    calls = []
+    monkeypatch.setattr(price_analyzer, "price_cache", PriceAnalysisCache())
+    monkeypatch.setattr(price_analyzer.PriceAnalyzerChatbot, "chat_stream", _fake_stream(calls, "length", delay=0.02))
+    chatbot = price_analyzer.PriceAnalyzerChatbot()
+    
+    async def run():
+        # 동시에 기다리던 요청은 잘린 결과를 받지 않고 직접 다시 분석
+        first = await asyncio.gather(*(_collect(chatbot.analyze_price_stream("갤럭시", 900_000)) for _ in range(2)))
+        second = await _collect(chatbot.analyze_price_stream("갤럭시", 900_000))
+        return first + [second]
+    
+    asyncio.run(run())
+    assert len(calls) == 3
+    assert price_analyzer.price_cache.info()["size"] == 0